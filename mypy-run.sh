@@ -1,9 +1,11 @@
 #!/bin/bash -eux
 
-EXCLUDE='(^example/|^ez_setup\.py$)'
+EXCLUDE='(^example/|^ez_setup\.py$|^stone/lang/parsetab\.py$)'
+# Files with syntax that Python 2 doesn't have.
+PY3_ONLY='^stone/target/python_rsrc/stone_asgi\.py$'
 
 # Include all Python files registered in Git, that don't occur in $EXCLUDE.
 INCLUDE=$(git ls-files "$@" | grep '\.py$' | grep -Ev "$EXCLUDE" | tr '\n' '\0' | xargs -0 | cat)
 MYPY_CMD=mypy
 $MYPY_CMD $INCLUDE
-$MYPY_CMD --py2 $INCLUDE
+$MYPY_CMD --py2 $(echo $INCLUDE | tr ' ' '\n' | grep -Ev "$PY3_ONLY" | xargs | cat)
@@ -46,6 +46,7 @@ dist = setup(
         'console_scripts': ['stone=stone.cli:main'],
     },
     packages=['stone',
+              'stone.bench',
               'stone.lang',
               'stone.target',
               'stone.target.python_rsrc'],
@@ -11,6 +11,8 @@ from stone.data_type import (
     is_composite_type,
     is_list_type,
     is_nullable_type,
+    is_struct_type,
+    is_user_defined_type,
 )
 
 _MYPY = False
@@ -79,6 +81,64 @@ class Api(object):
         assert self.route_schema is None
         self.route_schema = route_schema
 
+    def prune_unreachable_data_types(self):
+        # type: () -> typing.List[typing.Union[UserDefined, Alias]]
+        """
+        Removes the data types and aliases that no route refers to, directly
+        or indirectly, and then the namespaces left empty. Use this after
+        filtering routes so that generators only see the data types that the
+        remaining routes need.
+
+        A data type refers to the data types of its fields, its parent type,
+        and its subtypes, since a route that returns a struct may return any
+        of its subtypes. Examples and defaults only refer to the data types
+        of fields, so they're covered.
+
+        :return: The removed data types and aliases.
+        """
+        reachable = set()  # type: typing.Set[typing.Union[UserDefined, Alias]]
+        stack = []  # type: typing.List[typing.Any]
+
+        def visit(data_type):
+            while is_list_type(data_type) or is_nullable_type(data_type):
+                data_type = data_type.data_type
+            if ((is_user_defined_type(data_type) or is_alias(data_type)) and
+                    data_type not in reachable):
+                reachable.add(data_type)
+                stack.append(data_type)
+
+        for namespace in self.namespaces.values():
+            for route in namespace.routes:
+                visit(route.arg_data_type)
+                visit(route.result_data_type)
+                visit(route.error_data_type)
+        while stack:
+            data_type = stack.pop()
+            if is_alias(data_type):
+                visit(data_type.data_type)
+                continue
+            if data_type.parent_type:
+                visit(data_type.parent_type)
+            if is_struct_type(data_type):
+                for subtype in data_type.subtypes:
+                    visit(subtype)
+            for field in data_type.fields:
+                visit(field.data_type)
+
+        removed = []  # type: typing.List[typing.Union[UserDefined, Alias]]
+        for namespace in list(self.namespaces.values()):
+            removed.extend(dt for dt in namespace.data_types if dt not in reachable)
+            removed.extend(alias for alias in namespace.aliases if alias not in reachable)
+            namespace.data_types = [dt for dt in namespace.data_types if dt in reachable]
+            namespace.data_type_by_name = {dt.name: dt for dt in namespace.data_types}
+            namespace.aliases = [alias for alias in namespace.aliases if alias in reachable]
+            namespace.alias_by_name = {alias.name: alias for alias in namespace.aliases}
+            if not (namespace.routes or namespace.data_types or namespace.aliases):
+                del self.namespaces[namespace.name]
+        for namespace in self.namespaces.values():
+            namespace.update_imported_namespaces()
+        return removed
+
 class _ImportReason(object):
     """
     Tracks the reason a namespace was imported.
@@ -162,6 +222,32 @@ class ApiNamespace(object):
         if imported_data_type:
             reason.data_type = True
 
+    def update_imported_namespaces(self):
+        # type: () -> None
+        """
+        Recomputes the namespaces that this namespace imports from the data
+        types, aliases, and routes that it declares, such as after some of
+        them were removed.
+        """
+        self._imported_namespaces = {}
+        referenced = []  # type: typing.List[typing.Any]
+        for data_type in self.data_types:
+            referenced.append(data_type.parent_type)
+            referenced.extend(field.data_type for field in data_type.fields)
+        referenced.extend(alias.data_type for alias in self.aliases)
+        for route in self.routes:
+            referenced.extend((route.arg_data_type, route.result_data_type,
+                               route.error_data_type))
+        for data_type in referenced:
+            while is_list_type(data_type) or is_nullable_type(data_type):
+                data_type = data_type.data_type
+            if ((is_user_defined_type(data_type) or is_alias(data_type)) and
+                    data_type.namespace != self):
+                self.add_imported_namespace(
+                    data_type.namespace,
+                    imported_alias=is_alias(data_type),
+                    imported_data_type=not is_alias(data_type))
+
     def linearize_data_types(self):
         # type: () -> typing.List[UserDefined]
         """
@@ -295,6 +381,9 @@ class ApiRoute(object):
     Represents an API endpoint.
     """
 
+    __slots__ = ('name', '_token', 'deprecated', 'raw_doc', 'doc', 'arg_data_type',
+                 'result_data_type', 'error_data_type', 'attrs')
+
     def __init__(self,
                  name,
                  token):
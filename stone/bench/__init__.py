@@ -0,0 +1,27 @@
+"""
+Benchmarks of Stone and of the code that it generates.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import gc
+from timeit import default_timer
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+
+def time_calls(f, number):
+    # type: (typing.Callable[[], typing.Any], int) -> float
+    """
+    Returns the number of seconds that calling a function a number of times
+    takes, after collecting garbage so that collections left over from
+    earlier work don't count. Uses :func:`timeit.default_timer`, the most
+    precise clock that doesn't jump.
+    """
+    gc.collect()
+    start = default_timer()
+    for _ in range(number):
+        f()
+    return default_timer() - start
@@ -0,0 +1,196 @@
+"""
+Uses the examples in specs as a corpus for the Python types that
+:class:`stone.target.python_types.PythonTypesGenerator` makes.
+
+Each example of a struct or union is decoded with
+``json_compat_obj_decode``, using the validator generated for its type, then
+encoded again with ``json_compat_obj_encode``, which must give back the same
+value. This checks that generated code accepts what the spec says is valid,
+and times how long each type takes to decode and encode, on payloads that the
+spec's authors chose rather than synthetic ones.
+
+Timings are a fixed number of rounds over the examples of each type, so that
+they can be compared between runs of the same specs with
+:func:`stone.bench.toolchain.compare`, and the fastest of several runs is
+kept.
+
+Run ``python -m stone.bench.examples --help`` for the command-line
+interface, which exits with status 1 when an example doesn't round-trip.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict
+import functools
+import io
+import json
+import shutil
+import sys
+import tempfile
+
+import six
+
+from ..lang.tower import TowerOfStone
+from ..target.python_helpers import class_name_for_data_type
+from .runtime import generate_python_types
+from . import time_calls
+from .toolchain import add_baseline_arguments, check_baseline
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Hack to get around some of Python 2's standard library modules that
+# accept ascii-encodable unicode literals in lieu of strs, but where
+# actually passing such literals results in errors with mypy --py2. See
+# <https://github.com/python/typeshed/issues/756> and
+# <https://github.com/python/mypy/issues/2536>.
+import importlib
+argparse = importlib.import_module(str('argparse'))  # type: typing.Any
+
+
+def round_trip_examples(api, number=100, repeat=3):
+    # type: (...) -> typing.Tuple[typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]], typing.List[typing.Text]]  # noqa: E501 # pylint: disable=line-too-long
+    """
+    Round-trips the examples of every struct and union of an API through
+    the Python types generated for it, in a temporary folder.
+
+    Args:
+        api (stone.api.Api): The API.
+        number (int): The number of times to decode and encode the examples
+            of each type per timing.
+        repeat (int): The number of times to time each type.
+
+    Returns:
+        Tuple[Dict[str, dict], List[str]]: The results, by name, such as
+        "files.Metadata/decode", each of which has the number of seconds and
+        examples; and a description of each example that didn't round-trip,
+        whose type isn't timed.
+    """
+    folder = tempfile.mkdtemp()
+    try:
+        modules, serializers = generate_python_types(api, folder)
+    finally:
+        shutil.rmtree(folder)
+    results = OrderedDict()  # type: typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]
+    failures = []  # type: typing.List[typing.Text]
+    for namespace in api.namespaces.values():
+        module = modules[namespace.name]
+        for data_type in namespace.data_types:
+            examples = data_type.get_examples()
+            name = '%s.%s' % (namespace.name, data_type.name)
+            validator = getattr(module, class_name_for_data_type(data_type) + '_validator')
+            values = []
+            objects = []
+            catch_all = getattr(data_type, 'catch_all_field', None)
+            for label, example in list(examples.items()):
+                if catch_all is not None and example.value == {'.tag': catch_all.name}:
+                    # The catch-all tag stands for tags that the types don't
+                    # know about, so it can be decoded but not encoded.
+                    del examples[label]
+                    continue
+                error = _round_trip(serializers, validator, example.value)
+                if error:
+                    failures.append('%s example "%s": %s' % (name, label, error))
+                else:
+                    values.append(example.value)
+                    objects.append(serializers.json_compat_obj_decode(validator, example.value))
+            if not values or len(values) < len(examples):
+                continue
+            for operation, f in (
+                    ('decode', functools.partial(
+                        _each, serializers.json_compat_obj_decode, validator, values)),
+                    ('encode', functools.partial(
+                        _each, serializers.json_compat_obj_encode, validator, objects))):
+                results['%s/%s' % (name, operation)] = {
+                    'seconds': min(time_calls(f, number) for _ in range(repeat)),
+                    'examples': len(values),
+                    'peak_bytes': None,
+                }
+    return results, failures
+
+
+def _round_trip(serializers, validator, value):
+    # type: (typing.Any, typing.Any, typing.Any) -> typing.Optional[typing.Text]
+    """
+    Decodes and encodes a value, and returns why it didn't round-trip, if
+    it didn't.
+    """
+    try:
+        obj = serializers.json_compat_obj_decode(validator, value)
+        encoded = serializers.json_compat_obj_encode(validator, obj)
+    except serializers.bv.ValidationError as e:
+        return six.text_type(e)
+    except Exception as e:  # pylint: disable=broad-except
+        # A bug in generated code shouldn't stop the other examples from
+        # being checked.
+        return '%s: %s' % (type(e).__name__, e)
+    expected = json.dumps(value, sort_keys=True)
+    actual = json.dumps(encoded, sort_keys=True)
+    if actual != expected:
+        return 'encoded as %s instead of %s' % (actual, expected)
+    return None
+
+
+def _each(f, validator, items):
+    # type: (typing.Callable[..., typing.Any], typing.Any, typing.List[typing.Any]) -> None
+    for item in items:
+        f(validator, item)
+
+
+def format_results(results):
+    # type: (typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]) -> typing.Text
+    width = max([len(name) for name in results] + [len('Benchmark')])
+    lines = ['%-*s  %8s  %8s' % (width, 'Benchmark', 'Examples', 'Seconds')]
+    for name, result in results.items():
+        lines.append('%-*s  %8d  %8.3f' % (width, name, result['examples'], result['seconds']))
+    return '\n'.join(lines) + '\n'
+
+
+_cmdline_parser = argparse.ArgumentParser(
+    prog='python -m stone.bench.examples',
+    description=('Decode and encode the examples in specs with the Python types '
+                 'generated for them, check that each round-trips, and time each type.'))
+_cmdline_parser.add_argument(
+    'spec',
+    nargs='+',
+    type=six.text_type,
+    help='Path to API specifications. Each must have a .stone extension.',
+)
+_cmdline_parser.add_argument(
+    '--number',
+    type=int,
+    default=100,
+    help='The number of times to decode and encode the examples of each type per '
+         'timing. Defaults to 100.',
+)
+_cmdline_parser.add_argument(
+    '--repeat',
+    type=int,
+    default=3,
+    help='The number of times to time each type. The fastest time is kept. '
+         'Defaults to 3.',
+)
+add_baseline_arguments(_cmdline_parser)
+
+
+def main(argv=None):
+    # type: (typing.Optional[typing.List[str]]) -> int
+    """The entry point for "python -m stone.bench.examples"."""
+    args = _cmdline_parser.parse_args(argv)
+    specs = []
+    for path in args.spec:
+        with io.open(path, 'r', encoding='utf-8') as f:
+            specs.append((path, f.read()))
+    api = TowerOfStone(specs).parse()
+    results, failures = round_trip_examples(api, args.number, args.repeat)
+    if results:
+        print(format_results(results), end='')
+    for failure in failures:
+        print('Failed to round-trip %s' % failure, file=sys.stderr)
+    status = check_baseline(args, results)
+    return 1 if failures else status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""
+Benchmarks of the Python types made by
+:class:`stone.target.python_types.PythonTypesGenerator`, and the serializers
+they use at runtime: constructing objects, reading their fields, validating
+them, and encoding them to and decoding them from JSON, in both the current
+and old styles.
+
+The types are generated from a spec that has what real APIs have a lot of:
+wide structs, struct inheritance, structs with enumerated subtypes, big lists,
+unions with struct payloads, timestamps, and bytes. Each benchmark is a fixed
+number of operations on one value, so that its time can be compared between
+runs with :func:`stone.bench.toolchain.compare`, and its fastest time is
+kept. Results are also reported as the number of Stone objects handled per
+second, and on Python 3, the peak number of bytes allocated per object while
+handling the value once, as measured by :mod:`tracemalloc`.
+
+Values with structs that enumerate subtypes can't be decoded from the old
+style of JSON, which only encoding supports, so those benchmarks are skipped.
+
+Run ``python -m stone.bench.runtime --help`` for the command-line interface.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict
+import datetime
+import functools
+import gc
+import importlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+from ..compiler import Compiler
+from ..lang.tower import TowerOfStone
+from ..target import python_types
+from . import time_calls
+from .toolchain import add_baseline_arguments, check_baseline
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Hack to get around some of Python 2's standard library modules that
+# accept ascii-encodable unicode literals in lieu of strs, but where
+# actually passing such literals results in errors with mypy --py2. See
+# <https://github.com/python/typeshed/issues/756> and
+# <https://github.com/python/mypy/issues/2536>.
+argparse = importlib.import_module(str('argparse'))  # type: typing.Any
+
+# The field types of the wide struct, each with a value.
+_wide_fields = [
+    ('String', 'a string value'),
+    ('UInt64', 2 ** 40),
+    ('Int32', -7),
+    ('Float64', 1.5),
+    ('Boolean', True),
+    ('Timestamp("%Y-%m-%dT%H:%M:%SZ")', datetime.datetime(2017, 1, 2, 3, 4, 5)),
+    ('Bytes', b'\x00\x01\x02bytes'),
+    ('String?', 'an optional string'),
+    ('List(String)', ['a', 'b', 'c']),
+]
+
+_wide_field_count = 36
+
+_deep_levels = 8
+
+_list_length = 1000
+
+_spec = '\n'.join(
+    ['namespace bench', '', 'struct Wide'] +
+    ['    f%d %s' % (i, _wide_fields[i % len(_wide_fields)][0])
+     for i in range(_wide_field_count)] +
+    [''] +
+    ['struct Level%d%s\n    l%d String\n    n%d UInt64\n' % (
+        i, ' extends Level%d' % (i - 1) if i else '', i, i)
+     for i in range(_deep_levels)] +
+    ["""\
+struct Entry
+    union
+        file File
+        folder Folder
+    name String
+    path_lower String?
+
+struct File extends Entry
+    id String
+    size UInt64
+    client_modified Timestamp("%Y-%m-%dT%H:%M:%SZ")
+    content_hash Bytes
+
+struct Folder extends Entry
+    id String
+
+struct Listing
+    entries List(Entry)
+    cursor String
+    has_more Boolean
+
+union Change
+    added Entry
+    modified Wide
+    deleted String
+    reset
+"""])
+
+
+def generate_python_types(api, folder):
+    # type: (typing.Any, typing.Text) -> typing.Tuple[typing.Dict[typing.Text, typing.Any], typing.Any]  # noqa: E501 # pylint: disable=line-too-long
+    """
+    Generates the Python types of an API in a new package in a folder, and
+    imports it.
+
+    Returns:
+        Tuple[Dict[str, module], module]: The module of each namespace, by
+        name, and the serializers module.
+    """
+    # Each package has a different name, so that it's imported again.
+    package = 'stone_bench_%s' % os.path.basename(folder)
+    package_folder = os.path.join(folder, package)
+    Compiler(api, python_types, [], package_folder).build()
+    with io.open(os.path.join(package_folder, '__init__.py'), 'w', encoding='utf-8'):
+        pass
+    sys.path.insert(0, folder)
+    try:
+        modules = {name: importlib.import_module(str('%s.%s' % (package, name)))
+                   for name in api.namespaces}
+        return modules, importlib.import_module(str('%s.stone_serializers' % package))
+    finally:
+        sys.path.remove(folder)
+
+
+def generate_types(folder):
+    # type: (typing.Text) -> typing.Tuple[typing.Any, typing.Any]
+    """
+    Generates the Python types of the benchmark spec with
+    :func:`generate_python_types`, and returns the module of its namespace
+    and the serializers module.
+    """
+    modules, serializers = generate_python_types(
+        TowerOfStone([('bench.stone', _spec)]).parse(), folder)
+    return modules['bench'], serializers
+
+
+class _Case(object):
+    """A value of a type, and how to construct it."""
+
+    def __init__(self, name, validator, construct):
+        # type: (typing.Text, typing.Any, typing.Callable[[], typing.Any]) -> None
+        self.name = name
+        self.validator = validator
+        self.construct = construct
+        self.value = construct()
+        self.objects = _count_objects(self.value)
+
+
+def _cases(bench):
+    # type: (typing.Any) -> typing.List[_Case]
+    wide_kwargs = {'f%d' % i: _wide_fields[i % len(_wide_fields)][1]
+                   for i in range(_wide_field_count)}
+
+    def wide():
+        return bench.Wide(**wide_kwargs)
+
+    deep_kwargs = {}  # type: typing.Dict[str, typing.Any]
+    for i in range(_deep_levels):
+        deep_kwargs['l%d' % i] = 'level %d' % i
+        deep_kwargs['n%d' % i] = i
+    deep_class = getattr(bench, 'Level%d' % (_deep_levels - 1))
+
+    def deep():
+        return deep_class(**deep_kwargs)
+
+    def entry(i):
+        if i % 3:
+            return bench.File(name='file%d.txt' % i, path_lower='/folder/file%d.txt' % i,
+                              id='id:%d' % i, size=i * 1024,
+                              client_modified=datetime.datetime(2017, 1, 2, 3, 4, 5),
+                              content_hash=b'\x00\x01\x02\x03')
+        return bench.Folder(name='folder%d' % i, id='id:%d' % i)
+
+    def change():
+        return bench.Change.modified(wide())
+
+    def listing():
+        return bench.Listing(entries=[entry(i) for i in range(_list_length)],
+                             cursor='cursor', has_more=False)
+
+    return [
+        _Case('wide struct', bench.Wide_validator, wide),
+        _Case('deep subtype', getattr(bench, 'Level%d_validator' % (_deep_levels - 1)), deep),
+        _Case('enumerated subtype', bench.Entry_validator, lambda: entry(1)),
+        _Case('union with struct', bench.Change_validator, change),
+        _Case('big list', bench.Listing_validator, listing),
+    ]
+
+
+def _count_objects(value):
+    # type: (typing.Any) -> int
+    """Returns the number of structs and unions in a value."""
+    if isinstance(value, list):
+        return sum(_count_objects(item) for item in value)
+    if hasattr(value, '_all_fields_'):
+        return 1 + sum(_count_objects(getattr(value, name)) for name, _ in value._all_fields_)
+    if hasattr(value, '_tag'):
+        return 1 + _count_objects(value._value)
+    return 0
+
+
+def _access(value):
+    # type: (typing.Any) -> None
+    """Reads every field of a value, including those of values in it."""
+    if isinstance(value, list):
+        for item in value:
+            _access(item)
+    elif hasattr(value, '_all_fields_'):
+        for name, _ in value._all_fields_:
+            _access(getattr(value, name))
+    elif hasattr(value, '_tag'):
+        if value._value is not None:
+            _access(getattr(value, 'get_%s' % value._tag)())
+
+
+def run_benchmarks(scale=1.0, repeat=3, memory=True, log=None):
+    # type: (...) -> typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]
+    """
+    Runs the benchmarks.
+
+    Args:
+        scale (float): Multiplies the number of operations of each benchmark,
+            which is about 2000 objects. Results can only be compared to
+            ones with the same scale.
+        repeat (int): The number of times to time each benchmark.
+        memory (bool): Whether to also measure peak memory, if
+            :mod:`tracemalloc` is available.
+        log (Optional[Callable[[str], None]]): Called with the name of each
+            case before it's benchmarked.
+
+    Returns:
+        Dict[str, dict]: The results of each benchmark, in the order they
+        ran, by name, such as "big list/decode". Each has the number of
+        seconds, the number of objects per second, and the peak number of
+        bytes allocated per object, or None if it wasn't measured.
+    """
+    folder = tempfile.mkdtemp()
+    try:
+        bench, serializers = generate_types(folder)
+    finally:
+        shutil.rmtree(folder)
+    results = OrderedDict()  # type: typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]
+    for case in _cases(bench):
+        if log:
+            log(case.name)
+        number = max(1, int(round(2000 * scale / case.objects)))
+        operations = [
+            ('construct', case.construct),
+            ('access', lambda: _access(case.value)),
+            ('validate', lambda: case.validator.validate(case.value)),
+        ]
+        for old_style in (False, True):
+            style = ' (old style)' if old_style else ''
+            encoded = serializers.json_encode(case.validator, case.value, old_style=old_style)
+            operations.append(('encode' + style, functools.partial(
+                serializers.json_encode, case.validator, case.value, old_style=old_style)))
+            decode = functools.partial(
+                serializers.json_decode, case.validator, encoded, old_style=old_style)
+            try:
+                decode()
+            except serializers.bv.ValidationError:
+                # The old style of structs with enumerated subtypes can be
+                # encoded, but not decoded.
+                continue
+            operations.append(('decode' + style, decode))
+        for name, operation in operations:
+            seconds = min(time_calls(operation, number) for _ in range(repeat))
+            peak_bytes = _peak_bytes(operation) if memory else None
+            results['%s/%s' % (case.name, name)] = {
+                'seconds': seconds,
+                'objects_per_second': case.objects * number / seconds if seconds else None,
+                'peak_bytes': None if peak_bytes is None else peak_bytes // case.objects,
+            }
+    return results
+
+
+def _peak_bytes(operation):
+    # type: (typing.Callable[[], typing.Any]) -> typing.Optional[int]
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        operation()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def format_results(results):
+    # type: (typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]) -> typing.Text
+    width = max([len(name) for name in results] + [len('Benchmark')])
+    lines = ['%-*s  %8s  %14s  %12s' % (
+        width, 'Benchmark', 'Seconds', 'Objects/second', 'Bytes/object')]
+    for name, result in results.items():
+        objects_per_second = result['objects_per_second']
+        peak_bytes = result['peak_bytes']
+        lines.append('%-*s  %8.3f  %14s  %12s' % (
+            width, name, result['seconds'],
+            '-' if objects_per_second is None else '%d' % objects_per_second,
+            '-' if peak_bytes is None else peak_bytes))
+    return '\n'.join(lines) + '\n'
+
+
+_cmdline_parser = argparse.ArgumentParser(
+    prog='python -m stone.bench.runtime',
+    description=('Benchmark constructing, reading, validating, encoding, and '
+                 'decoding objects of generated Python types.'))
+_cmdline_parser.add_argument(
+    '--scale',
+    type=float,
+    default=1.0,
+    help='Multiplies the number of operations of each benchmark. Results can only be '
+         'compared to ones with the same scale. Defaults to 1.',
+)
+_cmdline_parser.add_argument(
+    '--repeat',
+    type=int,
+    default=3,
+    help='The number of times to time each benchmark. The fastest time is kept. '
+         'Defaults to 3.',
+)
+_cmdline_parser.add_argument(
+    '--no-memory',
+    action='store_true',
+    help="Don't measure peak memory.",
+)
+add_baseline_arguments(_cmdline_parser)
+
+
+def main(argv=None):
+    # type: (typing.Optional[typing.List[str]]) -> int
+    """The entry point for "python -m stone.bench.runtime"."""
+    args = _cmdline_parser.parse_args(argv)
+
+    def log(case):
+        print('Benchmarking %s...' % case, file=sys.stderr)
+
+    results = run_benchmarks(scale=args.scale, repeat=args.repeat,
+                             memory=not args.no_memory, log=log)
+    print(format_results(results), end='')
+    return check_baseline(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Benchmarks of the dispatchers made by
+:class:`stone.target.python_server.PythonServerGenerator`: handling a request
+for an RPC route with ``Dispatcher.dispatch``, with its WSGI application
+called in this process, and over HTTP, with a :mod:`wsgiref` server that runs
+in a thread and a new connection for each request, since :mod:`wsgiref`
+doesn't keep connections alive.
+
+Each benchmark is a fixed number of requests, so that its time can be
+compared between runs with :func:`stone.bench.toolchain.compare`, and its
+fastest time is kept. Results are also reported as the number of requests
+handled per second.
+
+Run ``python -m stone.bench.server --help`` for the command-line interface.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict
+import functools
+import importlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+from six.moves import http_client
+
+from ..compiler import Compiler
+from ..lang.tower import TowerOfStone
+from ..target import python_client, python_server, python_types
+from . import time_calls
+from .toolchain import add_baseline_arguments, check_baseline
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Hack to get around some of Python 2's standard library modules that
+# accept ascii-encodable unicode literals in lieu of strs, but where
+# actually passing such literals results in errors with mypy --py2. See
+# <https://github.com/python/typeshed/issues/756> and
+# <https://github.com/python/mypy/issues/2536>.
+argparse = importlib.import_module(str('argparse'))  # type: typing.Any
+
+_spec = """\
+namespace calc
+
+route eval(Expression, Result, Void)
+
+struct Expression
+    op Operator = add
+    left Int64
+    right Int64
+
+union Operator
+    add
+    sub
+
+struct Result
+    answer Int64
+"""
+
+_path = '/calc/eval'
+
+_body = b'{"op": "sub", "left": 2, "right": 1}'
+
+# The number of requests of each benchmark, at a scale of 1.
+_requests = OrderedDict([
+    ('dispatch', 20000),
+    ('wsgi', 20000),
+    ('http (wsgiref)', 1000),
+])
+
+
+def generate_modules(folder, client=False):
+    # type: (typing.Text, bool) -> typing.Dict[typing.Text, typing.Any]
+    """
+    Generates the Python types and server of the benchmark spec, and its
+    client if asked to, in a new package in a folder, and imports them.
+
+    Returns:
+        Dict[str, module]: The modules, by name: "calc" and "server", and
+        "client" and "stone_transport" with a client.
+    """
+    api = TowerOfStone([('calc.stone', _spec)]).parse()
+    # Each package has a different name, so that it's imported again.
+    package = 'stone_bench_%s' % os.path.basename(folder)
+    package_folder = os.path.join(folder, package)
+    Compiler(api, python_types, [], package_folder).build()
+    Compiler(api, python_server, ['-m', 'server', '-c', 'Server'], package_folder).build()
+    names = ['calc', 'server']
+    if client:
+        Compiler(api, python_client, ['-m', 'client', '-c', 'Client', '-t', package],
+                 package_folder).build()
+        names.extend(['client', 'stone_transport'])
+    with io.open(os.path.join(package_folder, '__init__.py'), 'w', encoding='utf-8'):
+        pass
+    sys.path.insert(0, folder)
+    try:
+        return {name: importlib.import_module(str('%s.%s' % (package, name)))
+                for name in names}
+    finally:
+        sys.path.remove(folder)
+
+
+def make_dispatcher(modules):
+    # type: (typing.Dict[typing.Text, typing.Any]) -> typing.Any
+    """
+    Returns a dispatcher that implements the route of the benchmark spec,
+    given the modules returned by :func:`generate_modules`.
+    """
+    calc = modules['calc']
+
+    class CalcServer(modules['server'].Server):
+
+        def calc_eval(self, arg):
+            if arg.op.is_add():
+                return calc.Result(answer=arg.left + arg.right)
+            return calc.Result(answer=arg.left - arg.right)
+
+    return CalcServer()
+
+
+def generate_dispatcher(folder):
+    # type: (typing.Text) -> typing.Any
+    """
+    Generates the Python types and server of the benchmark spec in a new
+    package in a folder, imports them, and returns a dispatcher that
+    implements its route.
+    """
+    return make_dispatcher(generate_modules(folder))
+
+
+class _QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+def _dispatch(dispatcher):
+    # type: (typing.Any) -> None
+    response = dispatcher.dispatch(_path, _body)
+    assert response.status == 200, response.body
+
+
+def _call_wsgi_app(dispatcher):
+    # type: (typing.Any) -> None
+    environ = {
+        'REQUEST_METHOD': 'POST',
+        'PATH_INFO': str(_path),
+        'CONTENT_LENGTH': str(len(_body)),
+        'wsgi.input': io.BytesIO(_body),
+    }
+    statuses = []
+
+    def start_response(status, headers):
+        statuses.append(status)
+
+    b''.join(dispatcher.wsgi_app(environ, start_response))
+    assert statuses[0].startswith('200'), statuses[0]
+
+
+def _post(port):
+    # type: (int) -> None
+    conn = http_client.HTTPConnection('127.0.0.1', port)
+    try:
+        conn.request('POST', _path, _body, {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 200, response.status
+    finally:
+        conn.close()
+
+
+def run_benchmarks(scale=1.0, repeat=3, log=None):
+    # type: (float, int, typing.Optional[typing.Callable[[typing.Text], None]]) -> typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]  # noqa: E501 # pylint: disable=line-too-long
+    """
+    Generates a dispatcher, and times handling requests with it.
+
+    Args:
+        scale (float): Multiplies the number of requests of each benchmark.
+        repeat (int): The number of times to time each benchmark.
+        log (Optional[Callable[[str], None]]): Called with the name of each
+            benchmark before it runs.
+
+    Returns:
+        Dict[str, dict]: The results, by name, such as "dispatch", each of
+        which has the number of seconds and of requests per second.
+    """
+    folder = tempfile.mkdtemp()
+    try:
+        dispatcher = generate_dispatcher(folder)
+    finally:
+        shutil.rmtree(folder)
+    httpd = make_server(str('127.0.0.1'), 0, dispatcher.wsgi_app, handler_class=_QuietHandler)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        operations = {
+            'dispatch': functools.partial(_dispatch, dispatcher),
+            'wsgi': functools.partial(_call_wsgi_app, dispatcher),
+            'http (wsgiref)': functools.partial(_post, httpd.server_port),
+        }
+        results = \
+            OrderedDict()  # type: typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]
+        for name, requests in _requests.items():
+            if log is not None:
+                log(name)
+            number = max(1, int(requests * scale))
+            seconds = min(time_calls(operations[name], number) for _ in range(repeat))
+            results[name] = {
+                'seconds': seconds,
+                'requests_per_second': number / seconds if seconds else None,
+                'peak_bytes': None,
+            }
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
+    return results
+
+
+def format_results(results):
+    # type: (typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]) -> typing.Text
+    width = max([len(name) for name in results] + [len('Benchmark')])
+    lines = ['%-*s  %8s  %15s' % (width, 'Benchmark', 'Seconds', 'Requests/second')]
+    for name, result in results.items():
+        requests_per_second = result['requests_per_second']
+        lines.append('%-*s  %8.3f  %15s' % (
+            width, name, result['seconds'],
+            '-' if requests_per_second is None else '%d' % requests_per_second))
+    return '\n'.join(lines) + '\n'
+
+
+_cmdline_parser = argparse.ArgumentParser(
+    prog='python -m stone.bench.server',
+    description=('Benchmark handling requests with a dispatcher generated by the '
+                 'python_server generator.'))
+_cmdline_parser.add_argument(
+    '--scale',
+    type=float,
+    default=1.0,
+    help='Multiplies the number of requests of each benchmark. Results can only be '
+         'compared to ones with the same scale. Defaults to 1.',
+)
+_cmdline_parser.add_argument(
+    '--repeat',
+    type=int,
+    default=3,
+    help='The number of times to time each benchmark. The fastest time is kept. '
+         'Defaults to 3.',
+)
+add_baseline_arguments(_cmdline_parser)
+
+
+def main(argv=None):
+    # type: (typing.Optional[typing.List[str]]) -> int
+    """The entry point for "python -m stone.bench.server"."""
+    args = _cmdline_parser.parse_args(argv)
+
+    def log(name):
+        print('Benchmarking %s...' % name, file=sys.stderr)
+
+    results = run_benchmarks(scale=args.scale, repeat=args.repeat, log=log)
+    print(format_results(results), end='')
+    return check_baseline(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
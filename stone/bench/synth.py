@@ -0,0 +1,322 @@
+"""
+Generates synthetic specs of any size, to measure how Stone scales without
+needing large real-world specs.
+
+The specs exercise most of the language: struct inheritance, enumerated
+subtypes, unions with void and typed tags, aliases, nullable references to
+types in the same and imported namespaces, examples, routes, and
+documentation with references. The same parameters and seed always produce
+the same specs, on every version of Python, so results can be reproduced.
+
+Run ``python -m stone.bench.synth --help`` for the command-line interface.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import io
+import os
+import random
+
+import six
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Hack to get around some of Python 2's standard library modules that
+# accept ascii-encodable unicode literals in lieu of strs, but where
+# actually passing such literals results in errors with mypy --py2. See
+# <https://github.com/python/typeshed/issues/756> and
+# <https://github.com/python/mypy/issues/2536>.
+import importlib
+argparse = importlib.import_module(str('argparse'))  # type: typing.Any
+
+_words = ('the a an of to for with when if and or not this that each its '
+          'user account file folder link team member path revision session '
+          'request response value entry list error result returned given '
+          'must may be is are has have been deleted shared created').split()
+
+# The primitive field types, with the cumulative probability of each and the
+# value used for it in examples.
+_field_types = [
+    (0.35, 'String', '"value"'),
+    (0.50, 'UInt64', '42'),
+    (0.60, 'Boolean', 'true'),
+    (0.65, 'Float64', '1.5'),
+    (0.70, 'List(String)', '["a", "b"]'),
+    (0.80, 'Id', '"id"'),
+]
+
+
+def generate_specs(namespaces=10,
+                   types_per_namespace=20,
+                   fields_per_type=4,
+                   inheritance_depth=2,
+                   union_ratio=0.25,
+                   union_width=4,
+                   subtype_density=0.3,
+                   import_density=0.1,
+                   example_density=0.5,
+                   routes_per_namespace=5,
+                   seed=0):
+    # type: (...) -> typing.List[typing.Tuple[typing.Text, typing.Text]]
+    """
+    Generates specs with one namespace each.
+
+    Args:
+        namespaces (int): The number of namespaces.
+        types_per_namespace (int): The number of structs and unions in each
+            namespace.
+        fields_per_type (int): The number of fields that each struct
+            declares, in addition to those it inherits.
+        inheritance_depth (int): The number of ancestors of the last struct
+            in each chain of structs that extend each other. In chains whose
+            first struct enumerates its subtypes, they all extend it.
+        union_ratio (float): The fraction of types that are unions.
+        union_width (int): The number of tags of each union.
+        subtype_density (float): The fraction of chains of structs whose
+            first struct enumerates its subtypes.
+        import_density (float): The probability that a namespace imports
+            each namespace before it. Half the references of a namespace
+            that imports others are to their types.
+        example_density (float): The fraction of types with an example.
+        routes_per_namespace (int): The number of routes in each namespace.
+        seed (int): The seed of the random choices made.
+
+    Returns:
+        List[Tuple[str, str]]: The file name and text of each spec, which
+        can be passed to :class:`stone.lang.tower.TowerOfStone`.
+    """
+    names = ['ns%0*d' % (len(str(namespaces - 1)), i) for i in range(namespaces)]
+    union_count = min(int(round(types_per_namespace * union_ratio)), types_per_namespace)
+    struct_count = types_per_namespace - union_count
+    type_names = ['S%d' % k for k in range(struct_count)] + ['U%d' % k for k in range(union_count)]
+    specs = []
+    for i, name in enumerate(names):
+        # Each namespace has its own generator, so that its spec doesn't
+        # depend on the ones before it. Python 2 and 3 make the same floats
+        # from the same integer seed, unlike other random functions.
+        rng = random.Random(seed * 1000003 + i)
+        imports = [names[j] for j in range(i) if rng.random() < import_density]
+        spec = _NamespaceSpec(rng, name, imports, type_names, struct_count, fields_per_type,
+                              inheritance_depth, union_width, subtype_density, example_density)
+        specs.append(('%s.stone' % name, spec.generate(routes_per_namespace)))
+    return specs
+
+
+def write_specs(folder, **kwargs):
+    # type: (typing.Text, typing.Any) -> typing.List[typing.Text]
+    """
+    Writes the specs made by :func:`generate_specs`, which is passed the
+    keyword arguments, to a folder, and returns their paths.
+    """
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    paths = []
+    for filename, text in generate_specs(**kwargs):
+        path = os.path.join(folder, filename)
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+class _NamespaceSpec(object):
+    """Generates the spec of a namespace."""
+
+    def __init__(self, rng, name, imports, type_names, struct_count, fields_per_type,
+                 inheritance_depth, union_width, subtype_density, example_density):
+        # type: (...) -> None
+        self.rng = rng
+        self.name = name
+        self.imports = imports
+        self.type_names = type_names
+        self.struct_count = struct_count
+        self.fields_per_type = fields_per_type
+        self.chain_length = inheritance_depth + 1
+        self.union_width = union_width
+        self.subtype_density = subtype_density
+        self.example_density = example_density
+        self.lines = []  # type: typing.List[typing.Text]
+
+    def generate(self, route_count):
+        # type: (int) -> typing.Text
+        self.emit('namespace %s' % self.name)
+        self.emit('    "%s"' % self.sentence())
+        self.emit()
+        for imported in self.imports:
+            self.emit('import %s' % imported)
+        self.emit()
+        self.emit('alias Id = String(min_length=1, max_length=64)')
+        self.emit()
+
+        # The required primitive fields of each struct, with example values,
+        # including those it inherits.
+        required = {}  # type: typing.Dict[int, typing.List[typing.Tuple[typing.Text, typing.Text]]]
+        for chain_start in range(0, self.struct_count, self.chain_length):
+            chain_end = min(chain_start + self.chain_length, self.struct_count)
+            subtypes = list(range(chain_start + 1, chain_end))
+            # Subtypes that a struct enumerates can't be extended, so they
+            # all extend the first struct instead of each other.
+            enumerated = subtypes and self.rng.random() < self.subtype_density
+            required[chain_start] = self.struct(
+                chain_start, None, subtypes if enumerated else [], [])
+            for k in subtypes:
+                parent = chain_start if enumerated else k - 1
+                inherited = required[parent]
+                required[k] = inherited + self.struct(k, parent, [], inherited)
+
+        for k in range(len(self.type_names) - self.struct_count):
+            self.union(k)
+
+        structs = self.type_names[:self.struct_count]
+        unions = self.type_names[self.struct_count:]
+        for r in range(route_count):
+            if not structs:
+                break
+            self.emit('route r%d(%s, %s, %s)' % (
+                r, self.choose(structs), self.choose(structs),
+                self.choose(unions) if unions else 'Void'))
+            doc = self.sentence()
+            if r > 0:
+                doc += ' See :route:`r%d`.' % (r - 1)
+            self.emit('    "%s"' % doc)
+            self.emit()
+        return '\n'.join(self.lines).rstrip('\n') + '\n'
+
+    def struct(self, k, parent, subtypes, inherited):
+        # type: (...) -> typing.List[typing.Tuple[typing.Text, typing.Text]]
+        """
+        Emits struct Sk, and returns its required primitive fields with
+        example values.
+        """
+        self.emit('struct S%d%s' % (k, '' if parent is None else ' extends S%d' % parent))
+        self.emit('    "%s"' % self.type_doc('S%d' % k))
+        if subtypes:
+            self.emit('    union')
+            for subtype in subtypes:
+                self.emit('        sub%d S%d' % (subtype, subtype))
+            self.emit()
+        fields = []
+        for j in range(self.fields_per_type):
+            field_name = 's%d_f%d' % (k, j)
+            data_type, example = self.field_type()
+            self.emit('    %s %s' % (field_name, data_type))
+            doc = self.sentence()
+            if self.fields_per_type > 1:
+                other = (j + 1 + int(self.rng.random() * (self.fields_per_type - 1))) % \
+                    self.fields_per_type
+                doc += ' See :field:`s%d_f%d`.' % (k, other)
+            self.emit('        "%s"' % doc)
+            if example is not None:
+                fields.append((field_name, example))
+        self.emit()
+        # Structs with enumerated subtypes need examples of a subtype.
+        if not subtypes and self.rng.random() < self.example_density:
+            self.emit('    example default')
+            for field_name, example in inherited + fields:
+                self.emit('        %s = %s' % (field_name, example))
+            if not inherited + fields:
+                self.lines.pop()
+            else:
+                self.emit()
+        return fields
+
+    def union(self, k):
+        # type: (int) -> None
+        self.emit('union U%d' % k)
+        self.emit('    "%s"' % self.type_doc('U%d' % k))
+        for j in range(self.union_width):
+            if j % 3 == 0:
+                # The first tag is void, for examples.
+                self.emit('    t%d' % j)
+            else:
+                data_type, _ = self.field_type(nullable=False)
+                self.emit('    t%d %s' % (j, data_type))
+            self.emit('        "%s"' % self.sentence())
+        self.emit()
+        if self.union_width and self.rng.random() < self.example_density:
+            self.emit('    example default')
+            self.emit('        t0 = null')
+            self.emit()
+
+    def field_type(self, nullable=True):
+        # type: (bool) -> typing.Tuple[typing.Text, typing.Optional[typing.Text]]
+        """
+        Returns a random field type, and an example value if it's a
+        required primitive type.
+        """
+        r = self.rng.random()
+        for p, data_type, example in _field_types:
+            if r < p:
+                return data_type, example
+        if self.imports and self.rng.random() < 0.5:
+            target = '%s.%s' % (self.choose(self.imports), self.choose(self.type_names))
+        else:
+            target = self.choose(self.type_names)
+        return target + ('?' if nullable else ''), None
+
+    def type_doc(self, type_name):
+        # type: (typing.Text) -> typing.Text
+        other = self.choose(self.type_names)
+        doc = self.sentence()
+        if other != type_name:
+            doc += ' See :type:`%s`.' % other
+        return doc
+
+    def sentence(self):
+        # type: () -> typing.Text
+        count = 4 + int(self.rng.random() * 24)
+        words = [self.choose(_words) for _ in range(count)]
+        return ' '.join(words).capitalize() + '.'
+
+    def choose(self, items):
+        # type: (typing.Sequence[typing.Text]) -> typing.Text
+        return items[int(self.rng.random() * len(items))]
+
+    def emit(self, line=''):
+        # type: (typing.Text) -> None
+        self.lines.append(line)
+
+
+_cmdline_parser = argparse.ArgumentParser(
+    prog='python -m stone.bench.synth',
+    description=('Write synthetic specs, for benchmarks. The same arguments '
+                 'always produce the same specs.'))
+_cmdline_parser.add_argument(
+    'folder',
+    type=six.text_type,
+    help='The folder to write the specs to.',
+)
+for _name, _type, _default, _help in [
+        ('namespaces', int, 10, 'The number of namespaces, each in its own spec.'),
+        ('types-per-namespace', int, 20, 'The number of structs and unions in each namespace.'),
+        ('fields-per-type', int, 4, 'The number of fields each struct declares.'),
+        ('inheritance-depth', int, 2, 'The length of each chain of structs that extend '
+                                      'each other, not counting the first.'),
+        ('union-ratio', float, 0.25, 'The fraction of types that are unions.'),
+        ('union-width', int, 4, 'The number of tags of each union.'),
+        ('subtype-density', float, 0.3, 'The fraction of chains of structs whose first '
+                                        'struct enumerates its subtypes.'),
+        ('import-density', float, 0.1, 'The probability that a namespace imports each '
+                                       'namespace before it.'),
+        ('example-density', float, 0.5, 'The fraction of types with an example.'),
+        ('routes-per-namespace', int, 5, 'The number of routes in each namespace.'),
+        ('seed', int, 0, 'The seed of the random choices made.'),
+]:
+    _cmdline_parser.add_argument(
+        '--' + _name, type=_type, default=_default,
+        help='%s Defaults to %s.' % (_help, _default))
+
+
+def main(argv=None):
+    # type: (typing.Optional[typing.List[str]]) -> None
+    """The entry point for "python -m stone.bench.synth"."""
+    args = vars(_cmdline_parser.parse_args(argv))
+    folder = args.pop('folder')
+    paths = write_specs(folder, **args)
+    print('Wrote %d specs to %s.' % (len(paths), folder))
+
+
+if __name__ == '__main__':
+    main()
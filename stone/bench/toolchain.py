@@ -0,0 +1,441 @@
+"""
+Benchmarks of the whole toolchain on synthetic specs of several sizes, made by
+:mod:`stone.bench.synth`: lexing, parsing, each phase of
+:meth:`stone.lang.tower.TowerOfStone.parse`, removing aliases, and each
+built-in generator.
+
+Each benchmark is timed several times and the fastest time is kept, since
+slower runs are slowed down by other processes. The peak memory that each
+benchmark allocates is measured in a separate run with :mod:`tracemalloc`,
+which slows it down, on versions of Python that have it.
+
+Results can be saved as a baseline, which is a JSON file, and later results
+compared to it. A result regresses when it's worse than the baseline by more
+than a threshold, which is a fraction of the baseline. Thresholds are saved in
+the baseline, so that they can be tuned for each machine that runs the
+benchmarks. Times that differ by less than a minimum number of seconds are
+never considered regressions, since short benchmarks are the noisiest.
+
+Run ``python -m stone.bench.toolchain --help`` for the command-line
+interface, which exits with status 1 when a result regresses.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict
+import gc
+import inspect
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from timeit import default_timer
+
+import six
+
+from .. import profiling
+from ..generator import Generator, remove_aliases_from_api
+from ..lang.lexer import StoneLexer
+from ..lang.parser import StoneParser
+from ..lang.tower import TowerOfStone
+from .synth import generate_specs
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Hack to get around some of Python 2's standard library modules that
+# accept ascii-encodable unicode literals in lieu of strs, but where
+# actually passing such literals results in errors with mypy --py2. See
+# <https://github.com/python/typeshed/issues/756> and
+# <https://github.com/python/mypy/issues/2536>.
+import importlib
+argparse = importlib.import_module(str('argparse'))  # type: typing.Any
+
+# Increment this whenever the contents of baselines change.
+BASELINE_FORMAT_VERSION = 1
+
+# The parameters of generate_specs() for each size of specs.
+SIZES = OrderedDict([
+    ('small', dict(namespaces=5, types_per_namespace=10)),
+    ('medium', dict(namespaces=20, types_per_namespace=40)),
+    ('huge', dict(namespaces=100, types_per_namespace=80)),
+])
+
+# The built-in generators, with the arguments they need.
+TARGETS = OrderedDict([
+    ('js_client', ['routes.js']),
+    ('js_types', ['types.js']),
+    ('obj_c_client', ['-m', 'DBXRoutes', '-c', 'DBXRoutes', '-t', 'DBXTransportClient',
+                      '-w', 'user', '-y', '{}', '-z', '{"rpc": "DBRpcTask"}']),
+    ('obj_c_types', []),
+    ('python_client', ['-m', 'client', '-c', 'Client', '-t', 'types']),
+    ('python_server', ['-m', 'server', '-c', 'Server']),
+    ('python_type_stubs', []),
+    ('python_types', []),
+    ('swift_client', ['-m', 'Routes', '-c', 'Routes', '-t', 'DropboxTransportClient',
+                      '-y', '{}', '-z', '{"rpc": "RpcRequest"}']),
+    ('swift_types', []),
+    ('tsd_client', ['routes.d.ts.template', 'routes.d.ts']),
+    ('tsd_types', ['types.d.ts.template', 'types.d.ts']),
+])
+
+# The route attributes that the client generators need.
+_stone_cfg = ('stone_cfg.stone', """\
+namespace stone_cfg
+
+struct Route
+    auth String = "user"
+    style String = "rpc"
+""")
+
+# The templates that tsd_client and tsd_types fill in.
+_templates = {
+    'routes.d.ts.template': 'declare class Routes {\n/*ROUTES*/\n}\n',
+    'types.d.ts.template': 'declare module Types {\n/*TYPES*/\n}\n',
+}
+
+# The thresholds used when a baseline doesn't have them.
+DEFAULT_THRESHOLDS = {
+    'seconds': 0.25,
+    'peak_bytes': 0.1,
+    'min_seconds': 0.01,
+}
+
+
+def run_benchmarks(sizes=None, targets=None, repeat=3, memory=True, log=None):
+    # type: (...) -> typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]
+    """
+    Runs the benchmarks.
+
+    Args:
+        sizes (Optional[Dict[str, dict]]): The parameters of
+            :func:`stone.bench.synth.generate_specs` for each size of specs
+            to run the benchmarks on. Defaults to :data:`SIZES`.
+        targets (Optional[Dict[str, List[str]]]): The arguments of each
+            built-in generator to run. Defaults to :data:`TARGETS`.
+        repeat (int): The number of times to time each benchmark.
+        memory (bool): Whether to also measure peak memory, if
+            :mod:`tracemalloc` is available.
+        log (Optional[Callable[[str], None]]): Called with the name of each
+            size of specs before it's benchmarked.
+
+    Returns:
+        Dict[str, dict]: The results of each benchmark, in the order they
+        ran, by name, such as "medium/tower/populate examples". Each has the
+        number of seconds, and the peak number of bytes allocated or None if
+        it wasn't measured.
+    """
+    sizes = SIZES if sizes is None else sizes
+    targets = TARGETS if targets is None else targets
+    results = OrderedDict()  # type: typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]
+    for size, params in sizes.items():
+        if log:
+            log(size)
+        specs = generate_specs(**params) + [_stone_cfg]
+        for _ in range(repeat):
+            for name, seconds, _ in _run_once(specs, targets, False):
+                result = results.setdefault('%s/%s' % (size, name),
+                                            {'seconds': seconds, 'peak_bytes': None})
+                result['seconds'] = min(result['seconds'], seconds)
+        if memory and tracemalloc is not None:
+            for name, _, peak_bytes in _run_once(specs, targets, True):
+                results['%s/%s' % (size, name)]['peak_bytes'] = peak_bytes
+    return results
+
+
+def _run_once(specs, targets, trace):
+    # type: (...) -> typing.List[typing.Tuple[typing.Text, float, typing.Optional[int]]]
+    """
+    Runs each benchmark once, and returns the name, seconds, and peak bytes
+    allocated of each, if traced.
+    """
+    measurements = []  # type: typing.List[typing.Tuple[typing.Text, float, typing.Optional[int]]]
+
+    def measure(name, f, *args):
+        gc.collect()
+        if trace:
+            tracemalloc.start()
+        start = default_timer()
+        try:
+            return f(*args)
+        finally:
+            seconds = default_timer() - start
+            peak_bytes = None
+            if trace:
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            measurements.append((name, seconds, peak_bytes))
+
+    measure('lex', _lex, specs)
+    measure('parse', _parse, specs)
+
+    profile = profiling.Profile()
+    previous = profiling.activate(profile)
+    try:
+        api = measure('tower', TowerOfStone(specs).parse)
+    finally:
+        profiling.activate(previous)
+    # The phases can't be traced separately, but are timed all the same.
+    measurements.extend(('tower/%s' % p['name'], p['seconds'], None) for p in profile.phases)
+
+    api_no_aliases = measure('remove aliases', remove_aliases_from_api, api)
+
+    for target, args in targets.items():
+        module = __import__('stone.target.%s' % target, fromlist=[''])
+        # Each target writes to an empty folder, since generators don't
+        # write files that haven't changed.
+        folder = tempfile.mkdtemp()
+        try:
+            for filename, text in _templates.items():
+                with io.open(os.path.join(folder, filename), 'w', encoding='utf-8') as f:
+                    f.write(text)
+            measure('target/%s' % target, _run_target, module, args, api, api_no_aliases,
+                    folder)
+        finally:
+            shutil.rmtree(folder)
+    return measurements
+
+
+def _lex(specs):
+    # type: (typing.List[typing.Tuple[typing.Text, typing.Text]]) -> None
+    lexer = StoneLexer()
+    for _, text in specs:
+        lexer.input(text)
+        while lexer.token() is not None:
+            pass
+
+
+def _parse(specs):
+    # type: (typing.List[typing.Tuple[typing.Text, typing.Text]]) -> None
+    parser = StoneParser()
+    for path, text in specs:
+        parser.parse(text, path)
+        errors = parser.get_errors()
+        if errors:
+            raise ValueError('%s:%s: %s' % (errors[0][2], errors[0][1], errors[0][0]))
+
+
+def _run_target(module, args, api, api_no_aliases, folder):
+    # type: (typing.Any, typing.List[typing.Text], typing.Any, typing.Any, typing.Text) -> None
+    """Runs the generators of a module like :class:`stone.compiler.Compiler`."""
+    for attr_key in dir(module):
+        attr_value = getattr(module, attr_key)
+        if (inspect.isclass(attr_value) and
+                issubclass(attr_value, Generator) and
+                not inspect.isabstract(attr_value)):
+            generator = attr_value(folder, args)
+            generator.generate(api if generator.preserve_aliases else api_no_aliases)
+
+
+def compare(results, baseline, thresholds=None):
+    # type: (...) -> typing.List[typing.Text]
+    """
+    Compares results to a baseline.
+
+    Args:
+        results (Dict[str, dict]): Returned by :func:`run_benchmarks`.
+        baseline (dict): Returned by :func:`load_baseline`.
+        thresholds (Optional[dict]): Overrides the thresholds of the
+            baseline, by name: "seconds", "peak_bytes", or "min_seconds".
+
+    Returns:
+        List[str]: A description of each regression. Benchmarks that aren't
+        in the baseline are ignored.
+    """
+    limits = dict(DEFAULT_THRESHOLDS)
+    limits.update(baseline.get('thresholds', {}))
+    limits.update(thresholds or {})
+    regressions = []
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for key in ('seconds', 'peak_bytes'):
+            value, base_value = result.get(key), base.get(key)
+            if value is None or not base_value:
+                continue
+            if key == 'seconds' and value - base_value < limits['min_seconds']:
+                continue
+            change = value / base_value - 1
+            if change > limits[key]:
+                regressions.append('%s: %s %s is %.0f%% more than the baseline %s' % (
+                    name, _format(key, value), key.replace('_', ' '), change * 100,
+                    _format(key, base_value)))
+    return regressions
+
+
+def load_baseline(path):
+    # type: (typing.Text) -> typing.Dict[typing.Text, typing.Any]
+    with io.open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BASELINE_FORMAT_VERSION:
+        raise ValueError('%s has version %s of the baseline format, not %s.' % (
+            path, baseline.get('version'), BASELINE_FORMAT_VERSION))
+    return baseline
+
+
+def save_baseline(path, results, thresholds=None):
+    # type: (typing.Text, typing.Dict[typing.Text, typing.Any], typing.Any) -> None
+    """
+    Saves results as a baseline, with thresholds, which default to those of
+    the baseline being replaced, if any.
+    """
+    if thresholds is None:
+        thresholds = dict(DEFAULT_THRESHOLDS)
+        if os.path.exists(path):
+            thresholds.update(load_baseline(path).get('thresholds', {}))
+    baseline = {
+        'version': BASELINE_FORMAT_VERSION,
+        'python': platform.python_version(),
+        'thresholds': thresholds,
+        'results': results,
+    }
+    data = json.dumps(baseline, indent=1, separators=(',', ': '), sort_keys=True)
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(six.text_type(data) + '\n')
+
+
+def format_results(results):
+    # type: (typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]) -> typing.Text
+    width = max([len(name) for name in results] + [len('Benchmark')])
+    lines = ['%-*s  %8s  %12s' % (width, 'Benchmark', 'Seconds', 'Peak bytes')]
+    for name, result in results.items():
+        peak_bytes = result['peak_bytes']
+        lines.append('%-*s  %8.3f  %12s' % (
+            width, name, result['seconds'], '-' if peak_bytes is None else peak_bytes))
+    return '\n'.join(lines) + '\n'
+
+
+def add_baseline_arguments(parser):
+    # type: (typing.Any) -> None
+    """Adds the arguments that :func:`check_baseline` needs to a parser."""
+    parser.add_argument(
+        '--baseline',
+        type=six.text_type,
+        help='A baseline to compare the results to. Exits with status 1 if any result '
+             'regressed by more than its threshold.',
+    )
+    parser.add_argument(
+        '--save-baseline',
+        type=six.text_type,
+        help='Save the results as a baseline, keeping the thresholds of the baseline '
+             'being replaced, if any.',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        help='Overrides the fraction of the baseline that times may regress by.',
+    )
+    parser.add_argument(
+        '--memory-threshold',
+        type=float,
+        help='Overrides the fraction of the baseline that peak memory may regress by.',
+    )
+
+
+def check_baseline(args, results):
+    # type: (typing.Any, typing.Dict[typing.Text, typing.Any]) -> int
+    """
+    Saves results as a baseline and compares them to one, as the arguments
+    added by :func:`add_baseline_arguments` say. Prints each regression, and
+    returns 1 if there are any, or 0 otherwise.
+    """
+    # The baseline is loaded first, in case it's also the one being saved.
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+    if baseline is None:
+        return 0
+    if baseline.get('python') != platform.python_version():
+        print('Warning: The baseline was made with Python %s.' % baseline.get('python'),
+              file=sys.stderr)
+    thresholds = {}
+    if args.threshold is not None:
+        thresholds['seconds'] = args.threshold
+    if args.memory_threshold is not None:
+        thresholds['peak_bytes'] = args.memory_threshold
+    regressions = compare(results, baseline, thresholds)
+    for regression in regressions:
+        print('Regression: %s' % regression, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def _format(key, value):
+    # type: (typing.Text, typing.Any) -> typing.Text
+    return '%.3f' % value if key == 'seconds' else '%d' % value
+
+
+def _split(value):
+    # type: (typing.Text) -> typing.List[typing.Text]
+    return [item for item in value.split(',') if item]
+
+
+_cmdline_parser = argparse.ArgumentParser(
+    prog='python -m stone.bench.toolchain',
+    description=('Benchmark lexing, parsing, each phase of resolving the API, '
+                 'removing aliases, and each built-in generator, on synthetic '
+                 'specs of several sizes.'))
+_cmdline_parser.add_argument(
+    '--sizes',
+    type=_split,
+    default=list(SIZES),
+    help='Comma-separated sizes of specs to run the benchmarks on. Defaults to %s.' %
+    ','.join(SIZES),
+)
+_cmdline_parser.add_argument(
+    '--targets',
+    type=_split,
+    default=list(TARGETS),
+    help='Comma-separated built-in generators to run. Defaults to all of them.',
+)
+_cmdline_parser.add_argument(
+    '--repeat',
+    type=int,
+    default=3,
+    help='The number of times to time each benchmark. The fastest time is kept. '
+         'Defaults to 3.',
+)
+_cmdline_parser.add_argument(
+    '--no-memory',
+    action='store_true',
+    help="Don't measure peak memory, which takes another run of each benchmark.",
+)
+add_baseline_arguments(_cmdline_parser)
+
+
+def main(argv=None):
+    # type: (typing.Optional[typing.List[str]]) -> int
+    """The entry point for "python -m stone.bench.toolchain"."""
+    args = _cmdline_parser.parse_args(argv)
+    for size in args.sizes:
+        if size not in SIZES:
+            _cmdline_parser.error('Unknown size: %s' % size)
+    for target in args.targets:
+        if target not in TARGETS:
+            _cmdline_parser.error('Unknown target: %s' % target)
+
+    def log(size):
+        print('Benchmarking %s specs...' % size, file=sys.stderr)
+
+    results = run_benchmarks(
+        sizes=OrderedDict((size, SIZES[size]) for size in args.sizes),
+        targets=OrderedDict((target, TARGETS[target]) for target in args.targets),
+        repeat=args.repeat,
+        memory=not args.no_memory,
+        log=log)
+    print(format_results(results), end='')
+
+    return check_baseline(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Benchmarks of the HTTP transport that clients made by
+:class:`stone.target.python_client.PythonClientGenerator` use, from
+``stone_transport.py``: requests for an RPC route sent over a pool of
+keep-alive connections, compared to a new connection for each request, which
+is what a pool that keeps no idle connections does. Requests are made one at
+a time, and from several threads at once.
+
+The server is a dispatcher made by
+:class:`stone.target.python_server.PythonServerGenerator`, served over
+HTTP/1.1 with keep-alive by :mod:`BaseHTTPServer` in this process, since the
+server of :mod:`wsgiref` closes every connection.
+
+Each benchmark is a fixed number of requests, so that its time can be
+compared between runs with :func:`stone.bench.toolchain.compare`, and its
+fastest time is kept. Results are also reported as the number of requests
+handled per second.
+
+Run ``python -m stone.bench.transport --help`` for the command-line
+interface.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict
+import functools
+import importlib
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+
+from six.moves import socketserver
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from . import time_calls
+from .server import format_results, generate_modules, make_dispatcher
+from .toolchain import add_baseline_arguments, check_baseline
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Hack to get around some of Python 2's standard library modules that
+# accept ascii-encodable unicode literals in lieu of strs, but where
+# actually passing such literals results in errors with mypy --py2. See
+# <https://github.com/python/typeshed/issues/756> and
+# <https://github.com/python/mypy/issues/2536>.
+argparse = importlib.import_module(str('argparse'))  # type: typing.Any
+
+# The number of requests of each benchmark, at a scale of 1.
+_requests = 1000
+
+# The number of threads that send requests at once in the concurrent
+# benchmarks.
+_threads = 4
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+
+    protocol_version = str('HTTP/1.1')
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        # Headers and body are written separately, so avoid waiting on a
+        # delayed ack before sending the body.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        response = self.server.dispatcher.dispatch(self.path, body)
+        self.send_response(response.status)
+        for name, value in response.headers:
+            self.send_header(str(name), str(value))
+        self.send_header(str('Content-Length'), str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class _KeepAliveServer(socketserver.ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+
+def _call(client, number):
+    # type: (typing.Any, int) -> None
+    for i in range(number):
+        assert client.calc_eval(left=i, right=1).answer == i + 1
+
+
+def _call_concurrently(client, number):
+    # type: (typing.Any, int) -> None
+    threads = [threading.Thread(target=_call, args=(client, number // _threads))
+               for _ in range(_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_benchmarks(scale=1.0, repeat=3, log=None):
+    # type: (float, int, typing.Optional[typing.Callable[[typing.Text], None]]) -> typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]  # noqa: E501 # pylint: disable=line-too-long
+    """
+    Generates a client and a dispatcher, and times sending requests from one
+    to the other.
+
+    Args:
+        scale (float): Multiplies the number of requests of each benchmark.
+        repeat (int): The number of times to time each benchmark.
+        log (Optional[Callable[[str], None]]): Called with the name of each
+            benchmark before it runs.
+
+    Returns:
+        Dict[str, dict]: The results, by name, such as "pooled", each of
+        which has the number of seconds and of requests per second.
+    """
+    folder = tempfile.mkdtemp()
+    try:
+        modules = generate_modules(folder, client=True)
+    finally:
+        shutil.rmtree(folder)
+
+    class Client(modules['stone_transport'].HttpTransport, modules['client'].Client):
+        pass
+
+    httpd = _KeepAliveServer((str('127.0.0.1'), 0), _KeepAliveHandler)
+    httpd.dispatcher = make_dispatcher(modules)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    number = max(_threads, int(_requests * scale))
+    clients = []
+    try:
+        results = \
+            OrderedDict()  # type: typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]
+        for name, pool_size, f in (
+                ('pooled', _threads, _call),
+                ('per call', 0, _call),
+                ('pooled, %d threads' % _threads, _threads, _call_concurrently),
+                ('per call, %d threads' % _threads, 0, _call_concurrently)):
+            if log is not None:
+                log(name)
+            client = Client('127.0.0.1', httpd.server_port, scheme='http', pool_size=pool_size)
+            clients.append(client)
+            operation = functools.partial(f, client, number)
+            seconds = min(time_calls(operation, 1) for _ in range(repeat))
+            results[name] = {
+                'seconds': seconds,
+                'requests_per_second': number / seconds if seconds else None,
+                'peak_bytes': None,
+            }
+    finally:
+        for client in clients:
+            client.close()
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
+    return results
+
+
+_cmdline_parser = argparse.ArgumentParser(
+    prog='python -m stone.bench.transport',
+    description=('Benchmark sending requests with the HTTP transport of generated '
+                 'Python clients, over pooled connections and over a new connection '
+                 'for each request.'))
+_cmdline_parser.add_argument(
+    '--scale',
+    type=float,
+    default=1.0,
+    help='Multiplies the number of requests of each benchmark. Results can only be '
+         'compared to ones with the same scale. Defaults to 1.',
+)
+_cmdline_parser.add_argument(
+    '--repeat',
+    type=int,
+    default=3,
+    help='The number of times to time each benchmark. The fastest time is kept. '
+         'Defaults to 3.',
+)
+add_baseline_arguments(_cmdline_parser)
+
+
+def main(argv=None):
+    # type: (typing.Optional[typing.List[str]]) -> int
+    """The entry point for "python -m stone.bench.transport"."""
+    args = _cmdline_parser.parse_args(argv)
+
+    def log(name):
+        print('Benchmarking %s...' % name, file=sys.stderr)
+
+    results = run_benchmarks(scale=args.scale, repeat=args.repeat, log=log)
+    print(format_results(results), end='')
+    return check_baseline(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
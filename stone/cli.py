@@ -5,18 +5,20 @@ A command-line interface for StoneAPI.
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import codecs
-import imp
 import io
 import logging
+import multiprocessing
 import os
+import shlex
 import six
 import sys
+import time
 import traceback
 
-from .cli_helpers import parse_route_attr_filter
-from .compiler import Compiler, GeneratorException
-from .lang.exception import InvalidSpec
-from .lang.tower import TowerOfStone
+# The parser, the data types, and the generators take much longer to import
+# than the rest of the CLI, so they're imported by the functions that need
+# them. This way, "stone --help" and arguments that are in error don't pay
+# for them, nor does a build pay for the generators that it doesn't run.
 
 _MYPY = False
 if _MYPY:
@@ -42,6 +44,7 @@ _builtin_generators = (
     'python_types',
     'python_type_stubs',
     'python_client',
+    'python_server',
     'swift_types',
     'swift_client',
 )
@@ -67,13 +70,15 @@ _generator_help = (
     'The following generators are built-in: ' + ', '.join(_builtin_generators))
 _cmdline_parser.add_argument(
     'generator',
+    nargs='?',
     type=six.text_type,
-    help=_generator_help,
+    help=_generator_help + '. Omit when using --target.',
 )
 _cmdline_parser.add_argument(
     'output',
+    nargs='?',
     type=six.text_type,
-    help='The folder to save generated files to.',
+    help='The folder to save generated files to. Omit when using --target.',
 )
 _cmdline_parser.add_argument(
     'spec',
@@ -84,6 +89,18 @@ _cmdline_parser.add_argument(
           'namespaces can be provided over stdin by concatenating multiple '
           'specs together.'),
 )
+_cmdline_parser.add_argument(
+    '-t',
+    '--target',
+    action='append',
+    type=six.text_type,
+    default=[],
+    help=('Run a generator, in the form "generator:output[:args]", where args '
+          'are the arguments to pass to the generator. Use more than once to '
+          'run several generators on the same specs; with --jobs, they run in '
+          'parallel. When set, the generator and output arguments are omitted '
+          'and "--" may not be used.'),
+)
 _cmdline_parser.add_argument(
     '--clean-build',
     action='store_true',
@@ -101,6 +118,68 @@ _cmdline_parser.add_argument(
           'combine multiple expressions with "and"/"or" and use parentheses '
           'to enforce precedence.'),
 )
+_cmdline_parser.add_argument(
+    '-j',
+    '--jobs',
+    type=int,
+    default=1,
+    help=('The number of processes to parse specs with. Use 0 for one per '
+          'CPU. With --target, also the number of generators to run at once; '
+          'otherwise, also the number of processes that the generator may '
+          'write files in. Defaults to 1.'),
+)
+_cmdline_parser.add_argument(
+    '--cache-dir',
+    type=six.text_type,
+    help=('A folder in which to cache parsed specs. Specs that have not '
+          'changed since they were cached are not parsed again.'),
+)
+_cmdline_parser.add_argument(
+    '--manifest',
+    action='store_true',
+    help=('Record the files that each generator writes in .stone-manifest.json '
+          'in the output folder, and warn about files that a generator wrote '
+          'on an earlier build with --manifest but no longer writes.'),
+)
+_cmdline_parser.add_argument(
+    '--incremental',
+    action='store_true',
+    help=('Only regenerate the namespaces whose specs, or the specs of the '
+          'namespaces they depend on, changed since the last incremental '
+          'build into the same output folder. Nothing is parsed or generated '
+          'if no spec changed. Generators that do not support this are run '
+          'on every namespace when anything changed.'),
+)
+_cmdline_parser.add_argument(
+    '--watch',
+    action='store_true',
+    help=('Keep running, and build again whenever a spec or generator module '
+          'changes. Only the specs that changed are parsed again. Press '
+          'Ctrl-C to stop.'),
+)
+_cmdline_parser.add_argument(
+    '--emit-ir',
+    type=six.text_type,
+    help=('Also write a snapshot of the API, after routes and attributes are '
+          'filtered, to this path. Use --from-ir to run other generators on '
+          'the snapshot without parsing the specs again.'),
+)
+_cmdline_parser.add_argument(
+    '--from-ir',
+    type=six.text_type,
+    help=('Read the API from a snapshot written by --emit-ir instead of from '
+          'specs. Routes and attributes are filtered again, so only those '
+          'kept when the snapshot was written are available.'),
+)
+_cmdline_parser.add_argument(
+    '--compact-ir',
+    action='store_true',
+    help=('Once specs are parsed, only keep the locations of data types, '
+          'fields, and routes from the parser output, which takes less memory '
+          'and makes --emit-ir snapshots and the copies of the API sent to '
+          'generators run with --jobs smaller. Generators that read the '
+          'parser output, through the _token attributes, cannot be used.'),
+)
 _cmdline_parser.add_argument(
     '-a',
     '--attribute',
@@ -130,32 +209,252 @@ _filter_ns_group.add_argument(
     default=[],
     help='If set, generators will not see any routes for the specified namespaces.',
 )
+_cmdline_parser.add_argument(
+    '--prune-unreachable-types',
+    action='store_true',
+    help=('After routes are filtered, remove the data types and aliases that '
+          'no remaining route refers to, directly or indirectly, along with '
+          'namespaces left empty.'),
+)
+_cmdline_parser.add_argument(
+    '--profile',
+    action='store_true',
+    help=('Print how long each phase of the build took, such as parsing '
+          'specs, populating examples, and running each generator, and '
+          'which files took longest to generate.'),
+)
+_cmdline_parser.add_argument(
+    '--profile-json',
+    type=six.text_type,
+    help=('Write how long each phase of the build took, and how long each '
+          'file took to generate along with its size, to this path as JSON.'),
+)
+_cmdline_parser.add_argument(
+    '--profile-cprofile',
+    type=six.text_type,
+    help=('Run each phase of the build under cProfile, which slows it down, '
+          'and write the statistics of the slowest phase to this path, to be '
+          'read with the pstats module.'),
+)
 
-
-def main():
-    """The entry point for the program."""
-
-    if '--' in sys.argv:
-        cli_args = sys.argv[1:sys.argv.index('--')]
-        generator_args = sys.argv[sys.argv.index('--') + 1:]
-    else:
-        cli_args = sys.argv[1:]
-        generator_args = []
-
-    args = _cmdline_parser.parse_args(cli_args)
-    debug = False
-    if args.verbose is None:
-        logging_level = logging.WARNING
-    elif args.verbose == 1:
-        logging_level = logging.INFO
-    elif args.verbose == 2:
-        logging_level = logging.DEBUG
-        debug = True
+# How often to check for changes with --watch, in seconds.
+_watch_interval = 0.5
+
+
+def _check_generator(generator):
+    """
+    Returns an error message if a generator is not a built-in generator or
+    the path to a generator module, or else None.
+    """
+    from .compiler import Compiler
+
+    if generator in _builtin_generators:
+        return None
+    elif not os.path.exists(generator):
+        return "Generator '%s' cannot be found." % generator
+    elif not os.path.isfile(generator):
+        return "Generator '%s' must be a file." % generator
+    elif not Compiler.is_stone_generator(generator):
+        return "Generator '%s' must have a .stoneg.py extension." % generator
+    return None
+
+
+def _load_generator(generator):
+    """
+    Imports a generator module given the name of a built-in generator or the
+    path to a generator module. A module that was already imported is run
+    again, so that a process that builds over and over doesn't carry state
+    over from one build to the next, such as class attributes that
+    generators fill in.
+    """
+    if generator in _builtin_generators:
+        name = str('stone.target.%s' % generator)
+        if name in sys.modules:
+            return six.moves.reload_module(sys.modules[name])
+        return importlib.import_module(name)
+    # A bit hacky, but we add the folder that the generator is in to our
+    # python path to support the case where the generator imports other
+    # files in its local directory.
+    new_python_path = os.path.dirname(generator)
+    if new_python_path not in sys.path:
+        sys.path.append(new_python_path)
+    # Otherwise, _load_source() reuses the module of the last generator
+    # loaded, along with any generator classes defined in it.
+    sys.modules.pop('user_generator', None)
+    return _load_source('user_generator', generator)
+
+
+def _load_source(name, path):
+    """
+    Imports a module from the path to a Python file, under the given name,
+    like imp.load_source(), which is deprecated in Python 3.
+    """
+    if six.PY2:
+        import imp  # pylint: disable=deprecated-module,useless-suppression
+        return imp.load_source(name, path)
+    import importlib.util  # pylint: disable=import-error,no-name-in-module,useless-suppression
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+# The serialized API that generators are run on in a worker process.
+_worker_ir = None  # type: typing.Optional[bytes]
+
+
+def _init_generator_worker(ir):
+    global _worker_ir  # pylint: disable=global-statement
+    _worker_ir = ir
+
+
+def _run_generator_in_worker(target):
+    """
+    Runs a single generator in a worker process, on its own copy of the API.
+
+    Args:
+        target (Tuple[str, str, List[str], bool, bool, Optional[Set[str]]]):
+            The generator, the output folder, the arguments to pass to the
+            generator, whether to make a clean build, whether to keep a
+            manifest of the files written, and the namespaces that changed
+            since the last build, if only those are regenerated.
+
+    Returns:
+        Tuple[float, Optional[str], Any]: The number of seconds taken, an
+            error message if the generator failed, and what the generator
+            recorded in the active profile, if any.
+    """
+    from . import profiling
+    from .compiler import Compiler, GeneratorException
+    from .ir import read_api
+
+    generator, output, generator_args, clean_build, manifest, namespaces = target
+    start = time.time()
+    position = profiling.mark()
+    error = None
+    try:
+        generator_module = _load_generator(generator)
+    except Exception:  # pylint: disable=broad-except
+        error = 'Importing generator module raised an exception:\n%s' % (
+            traceback.format_exc()[:-1])
     else:
-        print('error: I can only be so garrulous, try -vv.', file=sys.stderr)
-        sys.exit(1)
-
-    logging.basicConfig(level=logging_level)
+        try:
+            with profiling.phase('read API'):
+                api = read_api(io.BytesIO(_worker_ir))
+            Compiler(api, generator_module, generator_args, output,
+                     clean_build=clean_build, namespaces=namespaces,
+                     manifest=manifest).build()
+        except GeneratorException as e:
+            error = '%s raised an exception:\n%s' % (e.generator_name, e.traceback)
+        except SystemExit as e:
+            # Raised by a generator that was passed invalid arguments, after
+            # it printed its usage. A worker process must not exit.
+            error = 'Exited with status %s.' % e.code
+        except Exception:  # pylint: disable=broad-except
+            error = 'Raised an exception:\n%s' % traceback.format_exc()[:-1]
+    return time.time() - start, error, profiling.records_since(position)
+
+
+def _run_generators(ir, targets, jobs):
+    """
+    Runs several generators on an API. Each generator gets its own copy of
+    the API, since generators may modify it, and a generator that fails
+    doesn't stop the others.
+
+    Args:
+        ir (bytes): The API, as written by stone.ir.write_api().
+        targets (List[Tuple[str, str, List[str], bool, bool, Optional[Set[str]]]]):
+            The arguments of _run_generator_in_worker() for each generator to
+            run.
+        jobs (int): The number of worker processes to run generators in. If
+            1, generators run one at a time in this process.
+
+    Returns:
+        List[Tuple[float, Optional[str]]]: For each target, the number of
+            seconds taken and an error message if the generator failed.
+    """
+    from . import profiling
+
+    jobs = min(jobs, len(targets))
+    if jobs <= 1:
+        _init_generator_worker(ir)
+        try:
+            results = [_run_generator_in_worker(target) for target in targets]
+        finally:
+            _init_generator_worker(None)
+        return [(seconds, error) for seconds, error, _ in results]
+    pool = multiprocessing.Pool(jobs, _init_generator_worker, (ir,))
+    try:
+        # Generators take long enough that there's no point in sending them
+        # to the workers in chunks.
+        results = pool.map(_run_generator_in_worker, targets, 1)
+    finally:
+        pool.terminate()
+        pool.join()
+    for _, _, records in results:
+        profiling.merge_records(records)
+    return [(seconds, error) for seconds, error, _ in results]
+
+
+def build(args, targets, debug, jobs, cache):
+    """
+    Reads and parses the specs, or reads an IR snapshot, and runs the
+    generators, given what :func:`parse_args` returns, like the stone
+    command. Processes that build more than once, such as with --watch, can
+    call this for each build, since generator modules are imported again
+    each time. Errors are printed, and exit with a status of 1. With
+    --profile, --profile-json, or --profile-cprofile, the build is profiled
+    and the results reported once it succeeds.
+
+    Returns:
+        Optional[stone.api.Api]: The API, or None if the output was up to
+            date.
+    """
+    from . import profiling
+
+    if not (args.profile or args.profile_json or args.profile_cprofile):
+        return _build_api(args, targets, debug, jobs, cache)
+    profile = profiling.Profile(cprofile=bool(args.profile_cprofile))
+    previous = profiling.activate(profile)
+    try:
+        api = _build_api(args, targets, debug, jobs, cache)
+    finally:
+        profiling.activate(previous)
+    profile.end = time.time()
+    if args.profile:
+        sys.stderr.write(profile.format_report())
+    if args.profile_json:
+        profile.write_json(args.profile_json)
+    if args.profile_cprofile:
+        name = profile.dump_slowest_phase(args.profile_cprofile)
+        if name is not None:
+            print("Wrote cProfile statistics of the slowest phase, '%s', to %s." %
+                  (name, args.profile_cprofile), file=sys.stderr)
+    return api
+
+
+def _build_api(args, targets, debug, jobs, cache):
+    """
+    Does the work of build().
+    """
+    from . import profiling
+    from .cli_helpers import parse_route_attr_filter
+    from .compiler import Compiler, GeneratorException
+    from .data_type import cache_fields
+    from .incremental import (
+        BuildState,
+        namespace_fingerprints,
+        options_digest,
+        spec_digest,
+    )
+    from .ir import InvalidIR, read_api, write_api
+    from .lang.exception import InvalidSpec
+    from .lang.tower import TowerOfStone
 
     if args.spec and args.spec[0].startswith('+') and args.spec[0].endswith('.py'):
         # Hack: Special case for defining a spec in Python for testing purposes
@@ -163,13 +462,18 @@ def main():
         # The module should should contain an api variable that references a
         # :class:`stone.api.Api` object.
         try:
-            api = imp.load_source('api', args.api[0]).api  # pylint: disable=redefined-outer-name
+            api = _load_source('api', args.api[0]).api  # pylint: disable=redefined-outer-name
         except ImportError as e:
             print('error: Could not import API description due to:',
                   e, file=sys.stderr)
             sys.exit(1)
     else:
-        if args.spec:
+        if args.from_ir:
+            if args.spec:
+                print('error: Do not specify specifications with --from-ir.',
+                      file=sys.stderr)
+                sys.exit(1)
+        elif args.spec:
             specs = []
             read_from_stdin = False
             for spec_path in args.spec:
@@ -192,7 +496,7 @@ def main():
                       "simultaneously.", file=sys.stderr)
                 sys.exit(1)
 
-        if not args.spec or read_from_stdin:
+        if not args.from_ir and (not args.spec or read_from_stdin):
             specs = []
             if debug:
                 print('Reading specification from stdin.')
@@ -215,6 +519,22 @@ def main():
                     specs.append(('stdin.%s' % (len(specs) + 1),
                                   'namespace%s' % parts.pop(0)))
 
+        if args.incremental:
+            spec_digests = {path: spec_digest(text) for path, text in specs}
+            build_states = [BuildState.load(output, generator)
+                            for generator, output, _ in targets]
+            route_options = [args.filter_by_route_attr, sorted(args.attribute),
+                             args.whitelist_namespace_routes,
+                             args.blacklist_namespace_routes,
+                             args.prune_unreachable_types]
+            build_options = [options_digest(generator, generator_args, route_options)
+                             for generator, _, generator_args in targets]
+            if not args.clean_build and all(
+                    state.is_up_to_date(options, spec_digests)
+                    for state, options in zip(build_states, build_options)):
+                logging.info('No spec changed since the last build.')
+                return None
+
         if args.filter_by_route_attr:
             route_filter, route_filter_errors = parse_route_attr_filter(
                 args.filter_by_route_attr, debug)
@@ -227,21 +547,37 @@ def main():
         else:
             route_filter = None
 
-        # TODO: Needs version
-        tower = TowerOfStone(specs, debug=debug)
-
-        try:
-            api = tower.parse()
-        except InvalidSpec as e:
-            print('%s:%s: error: %s' % (e.path, e.lineno, e.msg), file=sys.stderr)
-            if debug:
-                print('A traceback is included below in case this is a bug in '
-                      'Stone.\n', traceback.format_exc(), file=sys.stderr)
-            sys.exit(1)
-        if api is None:
-            print('You must fix the above parsing errors for generation to '
-                  'continue.', file=sys.stderr)
-            sys.exit(1)
+        if args.from_ir:
+            try:
+                with open(args.from_ir, 'rb') as f, profiling.phase('read API'):
+                    api = read_api(f)
+            except (IOError, InvalidIR) as e:
+                print("error: Could not read IR '%s': %s" % (args.from_ir, e),
+                      file=sys.stderr)
+                sys.exit(1)
+        else:
+            # TODO: Needs version
+            tower = TowerOfStone(specs, debug=debug, jobs=jobs, cache=cache,
+                                 compact=args.compact_ir)
+
+            start = time.time()
+            hits = cache.hits if cache is not None else 0
+            try:
+                api = tower.parse()
+            except InvalidSpec as e:
+                print('%s:%s: error: %s' % (e.path, e.lineno, e.msg), file=sys.stderr)
+                if debug:
+                    print('A traceback is included below in case this is a bug in '
+                          'Stone.\n', traceback.format_exc(), file=sys.stderr)
+                sys.exit(1)
+            if api is None:
+                print('You must fix the above parsing errors for generation to '
+                      'continue.', file=sys.stderr)
+                sys.exit(1)
+            if args.watch:
+                unchanged = cache.hits - hits
+                print('Parsed %d specs in %.2fs, and reused %d unchanged specs.' %
+                      (len(specs) - unchanged, time.time() - start, unchanged))
 
         if args.whitelist_namespace_routes:
             for namespace_name in args.whitelist_namespace_routes:
@@ -274,6 +610,12 @@ def main():
                         del namespace.route_by_name[route.name]
                 namespace.routes = filtered_routes
 
+        if args.prune_unreachable_types:
+            with profiling.phase('prune unreachable types'):
+                removed = api.prune_unreachable_data_types()
+            logging.info('Removed %d data types and aliases that no route refers to.',
+                         len(removed))
+
         if args.attribute:
             attrs = set(args.attribute)
             if ':all' in attrs:
@@ -292,6 +634,7 @@ def main():
             if field.name not in attrs:
                 api.route_schema.fields.remove(field)
                 del api.route_schema._fields_by_name[field.name]
+                cache_fields([api.route_schema])
             else:
                 attrs.remove(field.name)
 
@@ -302,50 +645,254 @@ def main():
                   attr, file=sys.stderr)
             sys.exit(1)
 
-    if args.generator in _builtin_generators:
-        generator_module = __import__(
-            'stone.target.%s' % args.generator, fromlist=[''])
-    elif not os.path.exists(args.generator):
-        print("error: Generator '%s' cannot be found." % args.generator,
-              file=sys.stderr)
-        sys.exit(1)
-    elif not os.path.isfile(args.generator):
-        print("error: Generator '%s' must be a file." % args.generator,
-              file=sys.stderr)
-        sys.exit(1)
-    elif not Compiler.is_stone_generator(args.generator):
-        print("error: Generator '%s' must have a .stoneg.py extension." %
-              args.generator, file=sys.stderr)
-        sys.exit(1)
-    else:
-        # A bit hacky, but we add the folder that the generator is in to our
-        # python path to support the case where the generator imports other
-        # files in its local directory.
-        new_python_path = os.path.dirname(args.generator)
-        if new_python_path not in sys.path:
-            sys.path.append(new_python_path)
+    if args.emit_ir:
+        # Written before generators run, since they may modify the API.
+        with open(args.emit_ir, 'wb') as f, profiling.phase('write API'):
+            write_api(api, f)
+
+    # For each target, the namespaces to regenerate, or None for all of them.
+    changed_namespaces = \
+        [None] * len(targets)  # type: typing.List[typing.Optional[typing.Set[str]]]
+    if args.incremental:
+        with profiling.phase('fingerprint namespaces'):
+            fingerprints = namespace_fingerprints(
+                api, tower.spec_paths_by_namespace, spec_digests)
+        up_to_date = []
+        for i, (state, options) in enumerate(zip(build_states, build_options)):
+            if args.clean_build:
+                continue
+            if state.options == options and state.namespaces == fingerprints:
+                up_to_date.append(i)
+            else:
+                changed_namespaces[i] = state.changed_namespaces(options, fingerprints)
+                if changed_namespaces[i] is None:
+                    logging.info('Regenerating all namespaces with %s.', targets[i][0])
+                else:
+                    logging.info('Namespaces changed since the last build with %s: %s',
+                                 targets[i][0], ', '.join(sorted(changed_namespaces[i])))
+        for i in up_to_date:
+            # Only the paths of the specs changed.
+            build_states[i].update(build_options[i], spec_digests, fingerprints)
+            build_states[i].save()
+        targets, changed_namespaces, build_states, build_options = [
+            [x for i, x in enumerate(values) if i not in up_to_date]
+            for values in (targets, changed_namespaces, build_states, build_options)]
+
+    for generator, _, _ in targets:
+        error = _check_generator(generator)
+        if error:
+            print('error: %s' % error, file=sys.stderr)
+            sys.exit(1)
+
+    start = time.time()
+    if len(targets) == 1:
+        generator, output, generator_args = targets[0]
         try:
-            generator_module = imp.load_source('user_generator', args.generator)
+            generator_module = _load_generator(generator)
         except:
             print("error: Importing generator '%s' module raised an exception:" %
-                  args.generator, file=sys.stderr)
+                  generator, file=sys.stderr)
             raise
 
-    c = Compiler(
-        api,
-        generator_module,
-        generator_args,
-        args.output,
-        clean_build=args.clean_build,
-    )
+        c = Compiler(
+            api,
+            generator_module,
+            generator_args,
+            output,
+            clean_build=args.clean_build,
+            namespaces=changed_namespaces[0],
+            jobs=jobs,
+            manifest=args.manifest,
+        )
+        try:
+            c.build()
+        except GeneratorException as e:
+            print('%s: error: %s raised an exception:\n%s' %
+                  (generator, e.generator_name, e.traceback),
+                  file=sys.stderr)
+            sys.exit(1)
+        if args.incremental:
+            build_states[0].update(build_options[0], spec_digests, fingerprints)
+            build_states[0].save()
+    elif targets:
+        f = io.BytesIO()
+        with profiling.phase('write API'):
+            write_api(api, f)
+        results = _run_generators(
+            f.getvalue(),
+            [target + (args.clean_build, args.manifest, namespaces)
+             for target, namespaces in zip(targets, changed_namespaces)],
+            jobs)
+        failed = False
+        for i, ((generator, output, _), (seconds, error)) in enumerate(
+                zip(targets, results)):
+            if error is None:
+                logging.info('Ran %s into %s in %.2fs.', generator, output, seconds)
+                if args.incremental:
+                    build_states[i].update(build_options[i], spec_digests, fingerprints)
+                    build_states[i].save()
+            else:
+                print('%s: error: %s' % (generator, error), file=sys.stderr)
+                failed = True
+        if failed:
+            sys.exit(1)
+
+    if args.watch and targets:
+        print('Generated output in %.2fs.' % (time.time() - start))
+    return api
+
+
+def _get_mtimes(paths):
+    """
+    Returns the modification time and size of each file, or None for files
+    that don't exist, which is briefly the case while some editors save.
+    """
+    mtimes = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            mtimes.append(None)
+        else:
+            mtimes.append((st.st_mtime, st.st_size))
+    return mtimes
+
+
+def _watch(args, targets, debug, jobs):
+    """
+    Builds, and then builds again whenever a spec or generator module
+    changes, until interrupted. Unchanged specs aren't parsed again. A build
+    that fails is reported like a normal run, and the next change is awaited.
+    """
+    from .lang.cache import DiskAstCache, MemoryAstCache
+
+    paths = list(args.spec)
+    paths.extend(generator for generator, _, _ in targets
+                 if generator not in _builtin_generators)
+    cache = DiskAstCache(args.cache_dir) if args.cache_dir else MemoryAstCache()
+    mtimes = _get_mtimes(paths)
     try:
-        c.build()
-    except GeneratorException as e:
-        print('%s: error: %s raised an exception:\n%s' %
-              (args.generator, e.generator_name, e.traceback),
-              file=sys.stderr)
+        while True:
+            try:
+                build(args, targets, debug, jobs, cache)
+            except SystemExit:
+                # The error was already printed.
+                pass
+            except Exception:  # pylint: disable=broad-except
+                traceback.print_exc()
+            print('Watching %d files for changes. Press Ctrl-C to stop.' % len(paths))
+            sys.stdout.flush()
+            sys.stderr.flush()
+            while True:
+                time.sleep(_watch_interval)
+                new_mtimes = _get_mtimes(paths)
+                if new_mtimes == mtimes:
+                    continue
+                # Wait for the files to stop changing, in case several are
+                # being saved at once.
+                mtimes = new_mtimes
+                while True:
+                    time.sleep(_watch_interval)
+                    new_mtimes = _get_mtimes(paths)
+                    if new_mtimes == mtimes:
+                        break
+                    mtimes = new_mtimes
+                break
+    except KeyboardInterrupt:
+        pass
+
+
+def parse_args(argv):
+    """
+    Parses the command-line arguments of a build. Errors are printed, and
+    exit with a status of 1 or 2.
+
+    Returns:
+        Tuple[argparse.Namespace, List[Tuple[str, str, List[str]]], int, bool, int]:
+            The arguments, the generator, output folder, and generator
+            arguments of each target, the logging level, whether to debug,
+            and the number of processes to use.
+    """
+    if '--' in argv:
+        cli_args = argv[:argv.index('--')]
+        generator_args = argv[argv.index('--') + 1:]
+    else:
+        cli_args = argv
+        generator_args = []
+
+    args = _cmdline_parser.parse_args(cli_args)
+    debug = False
+    if args.verbose is None:
+        logging_level = logging.WARNING
+    elif args.verbose == 1:
+        logging_level = logging.INFO
+    elif args.verbose == 2:
+        logging_level = logging.DEBUG
+        debug = True
+    else:
+        print('error: I can only be so garrulous, try -vv.', file=sys.stderr)
+        sys.exit(1)
+
+    if args.target:
+        if generator_args:
+            print('error: Pass arguments to generators as part of each --target.',
+                  file=sys.stderr)
+            sys.exit(1)
+        # Without the generator and output arguments, all positional arguments
+        # are specs.
+        args.spec = [arg for arg in (args.generator, args.output)
+                     if arg is not None] + args.spec
+        targets = []
+        for target in args.target:
+            parts = target.split(':', 2)
+            if len(parts) < 2 or not parts[0] or not parts[1]:
+                print("error: Target '%s' must be in the form "
+                      "generator:output[:args]." % target, file=sys.stderr)
+                sys.exit(1)
+            targets.append((parts[0], parts[1],
+                            shlex.split(parts[2]) if len(parts) == 3 else []))
+    elif args.generator is None or args.output is None:
+        _cmdline_parser.error('the generator and output arguments are required.')
+    else:
+        targets = [(args.generator, args.output, generator_args)]
+
+    if args.jobs < 0:
+        print('error: --jobs must not be negative.', file=sys.stderr)
+        sys.exit(1)
+    jobs = args.jobs or multiprocessing.cpu_count()
+
+    if args.incremental and args.from_ir:
+        print('error: Do not use --incremental with --from-ir.', file=sys.stderr)
         sys.exit(1)
 
+    return args, targets, logging_level, debug, jobs
+
+
+def main():
+    """The entry point for the program."""
+
+    if sys.argv[1:2] == ['serve']:
+        from .server import serve_main
+        serve_main(sys.argv[2:])
+        return None
+
+    args, targets, logging_level, debug, jobs = parse_args(sys.argv[1:])
+    logging.basicConfig(level=logging_level)
+
+    if args.watch:
+        if args.from_ir or not args.spec or '-' in args.spec:
+            print('error: Specify specification files with --watch.', file=sys.stderr)
+            sys.exit(1)
+        _watch(args, targets, debug, jobs)
+        return None
+
+    if args.cache_dir:
+        from .lang.cache import DiskAstCache
+        cache = DiskAstCache(args.cache_dir)
+    else:
+        cache = None
+    api = build(args, targets, debug, jobs, cache)
+
     if not sys.argv[0].endswith('stone'):
         # If we aren't running from an entry_point, then return api to make it
         # easier to do debugging.
@@ -1,15 +1,23 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from collections import OrderedDict
+import copy
 import logging
 import inspect
 import os
 import shutil
 import traceback
 
+from stone import profiling
 from stone.generator import (
     Generator,
     remove_aliases_from_api,
 )
+from stone.output import OutputManifest
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
 
 
 class GeneratorException(Exception):
@@ -38,7 +46,10 @@ class Compiler(object):
                  generator_module,
                  generator_args,
                  build_path,
-                 clean_build=False):
+                 clean_build=False,
+                 namespaces=None,
+                 jobs=1,
+                 manifest=False):
         """
         Creates a Compiler.
 
@@ -52,6 +63,19 @@ class Compiler(object):
             source files are compiled into the same directories.
         :param bool clean_build: If True, the build_path is removed before
             source files are compiled into them.
+        :param namespaces: If set, the names of the namespaces that changed
+            since the last build. Generators that are namespace-scoped are
+            only passed those namespaces, and others are passed all of them.
+        :param int jobs: The number of processes that generators may run
+            their independent units of work in. See
+            :meth:`stone.generator.Generator.run_work_units`.
+        :param bool manifest: If True, the files that generators write are
+            recorded in a :class:`stone.output.OutputManifest` in the build
+            path.
+
+        With a manifest, after a build, :attr:`stale_files` holds the paths
+        of files in the build path that generators wrote on an earlier build
+        but not on this one.
         """
         self._logger = logging.getLogger('stone.compiler')
 
@@ -59,6 +83,10 @@ class Compiler(object):
         self.generator_module = generator_module
         self.generator_args = generator_args
         self.build_path = build_path
+        self.namespaces = namespaces
+        self.jobs = jobs
+        self.manifest = manifest
+        self.stale_files = []  # type: typing.List[str]
 
         # Remove existing build directory if it's a clean build
         if clean_build and os.path.exists(self.build_path):
@@ -100,6 +128,7 @@ class Compiler(object):
     def _execute_generator_on_spec(self):
         """Renders a source file into its final form."""
 
+        manifest = OutputManifest.load(self.build_path) if self.manifest else None
         api_no_aliases_cache = None
         for attr_key in dir(self.generator_module):
             attr_value = getattr(self.generator_module, attr_key)
@@ -108,19 +137,53 @@ class Compiler(object):
                     not inspect.isabstract(attr_value)):
                 self._logger.info('Running generator: %s', attr_value.__name__)
                 generator = attr_value(self.build_path, self.generator_args)
+                generator.jobs = self.jobs
 
                 if generator.preserve_aliases:
                     api = self.api
                 else:
                     if not api_no_aliases_cache:
-                        api_no_aliases_cache = remove_aliases_from_api(self.api)
+                        with profiling.phase('remove aliases'):
+                            api_no_aliases_cache = remove_aliases_from_api(self.api)
                     api = api_no_aliases_cache
 
+                if generator.namespace_scoped and self.namespaces is not None:
+                    api = _api_with_namespaces(api, self.namespaces)
+
                 try:
-                    generator.generate(api)
+                    with profiling.phase('run %s' % attr_value.__name__):
+                        generator.generate(api)
                 except:
                     # Wrap this exception so that it isn't thought of as a bug
                     # in the stone parser, but rather a bug in the generator.
                     # Remove the last char of the traceback b/c it's a newline.
                     raise GeneratorException(attr_value.__name__,
                                              traceback.format_exc()[:-1])
+
+                self._logger.info('%s wrote %d files, of which %d were unchanged.',
+                                  attr_value.__name__, len(generator.output_files),
+                                  generator.unchanged_file_count)
+                if manifest is not None:
+                    complete = not (generator.namespace_scoped and self.namespaces is not None)
+                    stale = manifest.update(attr_value.__name__, generator.output_files,
+                                            complete)
+                    for path in stale:
+                        if path not in self.stale_files:
+                            self.stale_files.append(path)
+        if manifest is not None:
+            manifest.save()
+        if self.stale_files:
+            self._logger.warning(
+                'These files in %s are no longer generated, and can be deleted: %s',
+                self.build_path, ', '.join(self.stale_files))
+
+
+def _api_with_namespaces(api, names):
+    """
+    Returns a shallow copy of an API with only the namespaces named.
+    """
+    api_copy = copy.copy(api)
+    api_copy.namespaces = OrderedDict(
+        (name, namespace) for name, namespace in api.namespaces.items()
+        if name in names)
+    return api_copy
@@ -33,6 +33,26 @@ class ParameterError(Exception):
     pass
 
 
+def cache_fields(data_types):
+    """
+    Caches the field lists of user-defined types, such as
+    :attr:`Struct.all_fields`, and :attr:`UserDefined.field_by_name`, each
+    once it's first accessed. Until then, they're computed on every access.
+
+    :meth:`stone.lang.tower.TowerOfStone.parse` calls this once the fields
+    of every type and their defaults are populated. The cached values of a
+    type depend on its parents, and on the data types and defaults of their
+    fields, so call this again on the types affected after changing any of
+    those other than through :meth:`UserDefined.prepend_field`.
+
+    :param Iterable[UserDefined] data_types: The types whose cached values
+        may be stale, including the subtypes of each type whose fields
+        changed.
+    """
+    for data_type in data_types:
+        data_type._field_cache = {}
+
+
 def generic_type_name(v):
     """
     Return a descriptive type name that isn't Python specific. For example, an
@@ -519,6 +539,10 @@ class Field(object):
     Represents a field in a composite type.
     """
 
+    # Fields are the most numerous objects of an API, so they don't have a
+    # __dict__.
+    __slots__ = ('name', 'data_type', 'raw_doc', 'doc', '_token')
+
     def __init__(self,
                  name,
                  data_type,
@@ -549,6 +573,8 @@ class StructField(Field):
     Represents a field of a struct.
     """
 
+    __slots__ = ('deprecated', 'has_default', '_default')
+
     def __init__(self,
                  name,
                  data_type,
@@ -604,6 +630,8 @@ class UnionField(Field):
     Represents a field of a union.
     """
 
+    __slots__ = ('catch_all',)
+
     def __init__(self,
                  name,
                  data_type,
@@ -650,7 +678,11 @@ class UserDefined(Composite):
         self.parent_type = None
         self._raw_examples = None
         self._examples = None
+        self._computed_examples = None
         self._fields_by_name = None
+        # The values that cache_fields() cached, by name, or None if they
+        # aren't cached.
+        self._field_cache = None  # type: typing.Optional[typing.Dict[str, typing.Any]]
 
     def set_attributes(self, doc, fields, parent_type=None):
         """
@@ -666,8 +698,12 @@ class UserDefined(Composite):
         self.doc = doc_unwrap(doc)
         self.fields = fields
         self.parent_type = parent_type
+        self._field_cache = None
         self._raw_examples = OrderedDict()
         self._examples = OrderedDict()
+        # Maps a label to its computed Example, or to None while it's being
+        # computed.
+        self._computed_examples = {}  # Dict[str, Optional[Example]]
         self._fields_by_name = {}  # Dict[str, Field]
 
         # Check that no two fields share the same name.
@@ -699,6 +735,26 @@ class UserDefined(Composite):
     def all_fields(self):
         raise NotImplementedError
 
+    @property
+    def field_by_name(self):
+        """
+        A dict mapping the name of each field in :attr:`all_fields` to the
+        field. Once cached by :func:`cache_fields`, it must not be mutated.
+        """
+        return self._get_cached_field_value(
+            'field_by_name', lambda: {f.name: f for f in self.all_fields})
+
+    def _get_cached_field_value(self, key, compute):
+        """
+        Returns what ``compute()`` returns for ``key``, which is cached if
+        the fields of this type are cached.
+        """
+        if self._field_cache is None:
+            return compute()
+        elif key not in self._field_cache:
+            self._field_cache[key] = compute()
+        return self._field_cache[key]
+
     def has_documented_type_or_fields(self, include_inherited_fields=False):
         """Returns whether this type, or any of its fields, are documented.
 
@@ -727,6 +783,44 @@ class UserDefined(Composite):
 
     def prepend_field(self, field):
         self.fields.insert(0, field)
+        if self._field_cache is not None:
+            cache_fields(self._with_subtypes())
+
+    def _with_subtypes(self):
+        """
+        Returns a list of this type and the types that extend it, directly or
+        not, as far as they're known.
+        """
+        return [self]
+
+    def _compute_example(self, label):
+        """
+        Returns the Example with the given ``label``, with references to other
+        examples resolved.
+
+        Examples are computed once and then shared by every example that
+        refers to them, so the returned Example must not be mutated.
+        """
+        if label in self._computed_examples:
+            example = self._computed_examples[label]
+            if example is None:
+                raw_example = self._raw_examples[label]
+                raise InvalidSpec(
+                    "Example for '%s' with label '%s' refers to itself, "
+                    "directly or through other examples." % (self.name, label),
+                    raw_example.lineno, raw_example.path)
+            return example
+        self._computed_examples[label] = None
+        try:
+            example = self._compute_example_uncached(label)
+        except Exception:
+            del self._computed_examples[label]
+            raise
+        self._computed_examples[label] = example
+        return example
+
+    def _compute_example_uncached(self, label):
+        raise NotImplementedError
 
     def get_examples(self, compact=False):
         """
@@ -770,6 +864,8 @@ class UserDefined(Composite):
 class Example(object):
     """An example of a struct or union type."""
 
+    __slots__ = ('label', 'text', 'value', '_token')
+
     def __init__(self, label, text, value, token=None):
         assert isinstance(label, six.text_type), type(label)
         self.label = label
@@ -837,10 +933,12 @@ class Struct(UserDefined):
     @property
     def all_fields(self):
         """
-        Returns an iterator of all fields. Required fields before optional
-        fields. Super type fields before type fields.
+        Returns a list of all fields. Required fields before optional
+        fields. Super type fields before type fields. Once cached by
+        :func:`cache_fields`, it must not be mutated.
         """
-        return self.all_required_fields + self.all_optional_fields
+        return self._get_cached_field_value(
+            'all_fields', lambda: self.all_required_fields + self.all_optional_fields)
 
     def _filter_fields(self, filter_function):
         """
@@ -859,22 +957,36 @@ class Struct(UserDefined):
     @property
     def all_required_fields(self):
         """
-        Returns an iterator that traverses required fields in all super types
-        first, and then for this type.
+        Returns a list of the required fields in all super types first, and
+        then of this type. Once cached by :func:`cache_fields`, it must not be
+        mutated.
         """
-        def required_check(f):
-            return not is_nullable_type(f.data_type) and not f.has_default
-        return self._filter_fields(required_check)
+        def compute():
+            fields = self.parent_type.all_required_fields if self.parent_type else []
+            return fields + [
+                f for f in self.fields
+                if not is_nullable_type(f.data_type) and not f.has_default]
+        return self._get_cached_field_value('all_required_fields', compute)
 
     @property
     def all_optional_fields(self):
         """
-        Returns an iterator that traverses optional fields in all super types
-        first, and then for this type.
+        Returns a list of the optional fields in all super types first, and
+        then of this type. Once cached by :func:`cache_fields`, it must not be
+        mutated.
         """
-        def optional_check(f):
-            return is_nullable_type(f.data_type) or f.has_default
-        return self._filter_fields(optional_check)
+        def compute():
+            fields = self.parent_type.all_optional_fields if self.parent_type else []
+            return fields + [
+                f for f in self.fields
+                if is_nullable_type(f.data_type) or f.has_default]
+        return self._get_cached_field_value('all_optional_fields', compute)
+
+    def _with_subtypes(self):
+        data_types = [self]
+        for subtype in self.subtypes:
+            data_types.extend(subtype._with_subtypes())
+        return data_types
 
     def has_enumerated_subtypes(self):
         """
@@ -1108,7 +1220,7 @@ class Struct(UserDefined):
 
         # Check for fields in the example that don't belong.
         for label, example_field in example.fields.items():
-            if not any(label == f.name for f in self.all_fields):
+            if label not in self.field_by_name:
                 raise InvalidSpec(
                     "Example for '%s' has unknown field '%s'." %
                     (self.name, label),
@@ -1150,7 +1262,7 @@ class Struct(UserDefined):
         for label in self._raw_examples:
             self._examples[label] = self._compute_example(label)
 
-    def _compute_example(self, label):
+    def _compute_example_uncached(self, label):
         if self.has_enumerated_subtypes():
             return self._compute_example_enumerated_subtypes(label)
         else:
@@ -1233,8 +1345,9 @@ class Struct(UserDefined):
         ordered_value = OrderedDict([('.tag', example_field.name)])
         flat_example = data_type._compute_example_flat_helper(ref.label)
         ordered_value.update(flat_example.value)
-        flat_example.value = ordered_value
-        return flat_example
+        example = copy.copy(flat_example)
+        example.value = ordered_value
+        return example
 
     def __repr__(self):
         return 'Struct(%r, %r)' % (self.name, self.fields)
@@ -1303,13 +1416,12 @@ class Union(UserDefined):
     def all_fields(self):
         """
         Returns a list of all fields. Subtype fields come before this type's
-        fields.
+        fields. Once cached by :func:`cache_fields`, it must not be mutated.
         """
-        fields = []
-        if self.parent_type:
-            fields.extend(self.parent_type.all_fields)
-        fields.extend([f for f in self.fields])
-        return fields
+        def compute():
+            fields = self.parent_type.all_fields if self.parent_type else []
+            return fields + self.fields
+        return self._get_cached_field_value('all_fields', compute)
 
     def _add_example(self, example):
         """Adds a "raw example" for this type.
@@ -1389,7 +1501,7 @@ class Union(UserDefined):
                     Example(
                         field.name, None, OrderedDict([('.tag', field.name)]))
 
-    def _compute_example(self, label):
+    def _compute_example_uncached(self, label):
         """
         From the "raw example," resolves references to examples of other data
         types to compute the final example.
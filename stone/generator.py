@@ -2,14 +2,24 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 from abc import ABCMeta, abstractmethod
 from contextlib import contextmanager
+import errno
+import hashlib
+import multiprocessing
 import os
+import re
 import six
+import sys
 import textwrap
+import time
+import traceback
 
+from stone import profiling
 from stone.lang.tower import doc_ref_re
 from stone.data_type import (
+    cache_fields,
     is_alias,
 )
+from stone.output import StreamedOutputFile, write_if_changed
 
 _MYPY = False
 if _MYPY:
@@ -32,6 +42,113 @@ logging = importlib.import_module(str('logging'))  # type: typing.Any
 open = open  # type: typing.Any # pylint: disable=redefined-builtin
 
 
+# The generator and work units of the call to Generator.run_work_units() in
+# progress. Worker processes are forked, so they inherit them rather than
+# receive them pickled, and units can be any callable.
+_work_units = None  # type: typing.Optional[typing.Tuple[Generator, typing.List[typing.Callable[[], None]]]]  # noqa: E501 # pylint: disable=line-too-long
+
+
+# Indentation strings by the number of spaces or tabs, shared by generators,
+# since most lines emitted are indented.
+_space_indents = {}  # type: typing.Dict[int, typing.Text]
+_tab_indents = {}  # type: typing.Dict[int, typing.Text]
+
+
+class _LruCache(object):
+    """
+    A map of limited size, which evicts the entries that were least recently
+    used, approximately: entries are kept in two generations of up to half
+    the size each, entries found in the older generation move to the newer
+    one, and the older generation is evicted once the newer one is full.
+    Unlike tracking the exact order of use, most lookups are then a single
+    dict lookup.
+    """
+
+    def __init__(self, maxsize):
+        # type: (int) -> None
+        self._generation_size = max(maxsize // 2, 1)
+        self._new = {}  # type: typing.Dict[typing.Any, typing.Any]
+        self._old = {}  # type: typing.Dict[typing.Any, typing.Any]
+
+    def get(self, key):
+        """Returns the value of a key, or None if it's not in the cache."""
+        value = self._new.get(key)
+        if value is None:
+            value = self._old.pop(key, None)
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        assert value is not None
+        self._new[key] = value
+        if len(self._new) >= self._generation_size:
+            self._old = self._new
+            self._new = {}
+
+    def clear(self):
+        self._new = {}
+        self._old = {}
+
+
+# Docstrings are processed and wrapped by many generators, and again on each
+# build by --watch and compile servers, so the references found in each
+# docstring and the result of each call to textwrap.fill() are cached.
+_doc_ref_cache = _LruCache(8192)
+_wrap_cache = _LruCache(32768)
+
+# The characters that textwrap.fill() replaces with spaces.
+_wrap_whitespace_re = re.compile('[\t\n\x0b\x0c\r]')
+
+
+def _fill(s, initial_indent, subsequent_indent, width, break_long_words, break_on_hyphens):
+    # type: (typing.Text, typing.Text, typing.Text, int, bool, bool) -> typing.Text
+    """
+    Returns the result of textwrap.fill() with the given arguments.
+    """
+    if (s and len(initial_indent) + len(s) <= width and not s[-1].isspace() and
+            not _wrap_whitespace_re.search(s)):
+        # The text fits on the first line as it is.
+        return initial_indent + s
+    key = (s, initial_indent, subsequent_indent, width, break_long_words, break_on_hyphens)
+    text = _wrap_cache.get(key)
+    if text is None:
+        text = textwrap.fill(s,
+                             initial_indent=initial_indent,
+                             subsequent_indent=subsequent_indent,
+                             width=width,
+                             break_long_words=break_long_words,
+                             break_on_hyphens=break_on_hyphens,
+                             )
+        _wrap_cache.put(key, text)
+    return text
+
+
+def _can_fork_workers():
+    # type: () -> bool
+    """
+    Returns whether run_work_units() can run units in forked worker
+    processes.
+    """
+    if not hasattr(os, 'fork') or sys.platform == 'darwin':
+        return False
+    if six.PY3:
+        # pylint: disable=no-member,useless-suppression
+        return multiprocessing.get_start_method() == 'fork'
+    return True
+
+
+def _run_work_unit_in_worker(index):
+    assert _work_units is not None
+    generator, units = _work_units
+    position = profiling.mark()
+    try:
+        files = generator._collect_output_files(units[index])
+    except Exception:  # pylint: disable=broad-except
+        return None, None, traceback.format_exc()[:-1]
+    return files, profiling.records_since(position), None
+
+
 def remove_aliases_from_api(api):
     for namespace in api.namespaces.values():
         # Important: Even if this namespace has no aliases, it may reference
@@ -75,6 +192,12 @@ def remove_aliases_from_api(api):
         namespace.aliases = []
         namespace.alias_by_name = {}
 
+    # A field whose alias was nullable is now optional.
+    data_types = [data_type for namespace in api.namespaces.values()
+                  for data_type in namespace.data_types]
+    if api.route_schema is not None:
+        data_types.append(api.route_schema)
+    cache_fields(data_types)
     return api
 
 
@@ -96,7 +219,9 @@ class Generator(object):
     2. Use the family of emit*() functions to write to the output file.
 
     The target_folder_path attribute is the path to the folder where all
-    generated files should be created.
+    generated files should be created. Files that are copied rather than
+    generated should be written with copy_to_relative_path(). Files whose
+    contents didn't change since the last build aren't written again.
     """
 
     # Can be overridden by a subclass
@@ -111,6 +236,18 @@ class Generator(object):
     # For backwards compatibility with existing generators defaults to false.
     preserve_aliases = False
 
+    # Can be overridden by a subclass. If true, generate() writes a separate
+    # set of files for each namespace in the API, and those files only depend
+    # on the namespace and those it depends on. Any other files must not
+    # depend on which namespaces are in the API. Incremental builds can then
+    # pass an API with only the namespaces that changed.
+    namespace_scoped = False
+
+    # If set, the number of characters that the output buffer of a file may
+    # hold before it's written to a temporary file, which replaces the file
+    # once it's complete. This bounds the memory used for very large files.
+    output_spill_threshold = None  # type: typing.Optional[int]
+
     def __init__(self, target_folder_path, args):
         # type: (str, typing.Optional[typing.Sequence[str]]) -> None
         """
@@ -126,6 +263,21 @@ class Generator(object):
         self.output = []  # type: typing.List[typing.Text]
         self.lineno = 1
         self.cur_indent = 0
+        # The path of the file being written, the number of characters in the
+        # output buffer, and the temporary file it spills to, while
+        # output_spill_threshold is in effect.
+        self._spill_path = None  # type: typing.Optional[typing.Text]
+        self._output_size = None  # type: typing.Optional[int]
+        self._spill_file = None  # type: typing.Optional[StreamedOutputFile]
+        # Maps the path of each file written, relative to the target folder,
+        # to the SHA-256 digest of its contents.
+        self.output_files = {}  # type: typing.Dict[typing.Text, typing.Text]
+        self.unchanged_file_count = 0
+        # The number of processes that run_work_units() may use.
+        self.jobs = 1
+        # While a work unit runs in a worker process, the path and contents of
+        # each file it writes, which are written by the parent process.
+        self._collected_files = None  # type: typing.Optional[typing.List[typing.Tuple[typing.Text, bytes]]]  # noqa: E501 # pylint: disable=line-too-long
 
         self.args = None  # type: typing.Optional[argparse.Namespace]
 
@@ -159,28 +311,160 @@ class Generator(object):
         Sets up generator so that all emits are directed towards the new file
         created at :param:`relative_path`.
 
-        Clears the output buffer on enter and exit.
+        Clears the output buffer on enter and exit. If the buffer grows past
+        :attr:`output_spill_threshold`, it's written out as it grows.
+        """
+        full_path = self._prepare_output_file(relative_path)
+        self.logger.info('Generating %s', full_path)
+        start, start_lineno = time.time(), self.lineno
+        self.output = []
+        if self.output_spill_threshold is not None and self._collected_files is None:
+            # Work units in worker processes hand their files back whole.
+            self._spill_path = full_path
+            self._output_size = 0
+        try:
+            yield
+            if self._spill_file is None:
+                data = ''.join(self.output).encode('utf-8')
+                self._write_output_file(relative_path, data)
+                size = len(data)
+            else:
+                self._spill_output()
+                digest = self._spill_file.digest()
+                self._record_output_file(relative_path, digest, self._spill_file.commit())
+                size = self._spill_file.size
+        finally:
+            if self._spill_file is not None:
+                self._spill_file.discard()
+            self._spill_file = None
+            self._spill_path = None
+            self._output_size = None
+        self.output = []
+        profiling.record_file(self.__class__.__name__, full_path, time.time() - start, size,
+                              self.lineno - start_lineno)
+
+    def copy_to_relative_path(self, src_path, relative_path):
+        # type: (typing.Text, typing.Text) -> None
+        """
+        Copies a file, such as a resource that generated code depends on, to
+        :param:`relative_path` in the target folder.
+        """
+        self._prepare_output_file(relative_path)
+        with open(src_path, 'rb') as f:
+            self._write_output_file(relative_path, f.read())
+
+    def run_work_units(self, units):
+        # type: (typing.List[typing.Callable[[], None]]) -> None
         """
+        Runs independent units of work, such as writing the files of each
+        namespace, in up to :attr:`jobs` processes.
+
+        Each unit is a callable without arguments that writes files with
+        output_to_relative_path() or copy_to_relative_path(). Units may run in
+        worker processes, so any other changes they make to the generator or
+        the API are lost. Their files are written by this process, in the
+        order of the units.
+
+        Workers inherit the units by forking, so units run one at a time in
+        this process unless the start method of multiprocessing is "fork".
+        They also do on macOS, where forking a process that uses system
+        frameworks or threads isn't safe.
+        """
+        global _work_units  # pylint: disable=global-statement
+        jobs = min(self.jobs, len(units))
+        if (jobs <= 1 or not _can_fork_workers() or
+                multiprocessing.current_process().daemon):
+            # Daemonic processes, such as those that run generators with
+            # --jobs, can't start workers.
+            for unit in units:
+                unit()
+            return
+        _work_units = (self, units)
+        try:
+            pool = multiprocessing.Pool(jobs)
+            try:
+                results = pool.map(_run_work_unit_in_worker, range(len(units)), 1)
+            finally:
+                pool.terminate()
+                pool.join()
+        finally:
+            _work_units = None
+        for files, records, error in results:
+            if error is not None:
+                raise RuntimeError('A work unit raised an exception in a worker '
+                                   'process:\n%s' % error)
+            for relative_path, data in files:
+                self._write_output_file(relative_path, data)
+            profiling.merge_records(records)
+
+    def _collect_output_files(self, unit):
+        # type: (typing.Callable[[], None]) -> typing.List[typing.Tuple[typing.Text, bytes]]
+        self._collected_files = []
+        try:
+            unit()
+            return self._collected_files
+        finally:
+            self._collected_files = None
+
+    def _prepare_output_file(self, relative_path):
+        # type: (typing.Text) -> typing.Text
         full_path = os.path.join(self.target_folder_path, relative_path)
         directory = os.path.dirname(full_path)
         if not os.path.exists(directory):
             self.logger.info('Creating %s', directory)
-            os.makedirs(directory)
-
-        self.logger.info('Generating %s', full_path)
-        self.output = []
-        yield
-        with open(full_path, 'wb') as f:
-            f.write(''.join(self.output).encode('utf-8'))
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                # Work units in other processes may create it at the same
+                # time.
+                if e.errno != errno.EEXIST:
+                    raise
+        return full_path
+
+    def _write_output_file(self, relative_path, data):
+        # type: (typing.Text, bytes) -> None
+        if self._collected_files is not None:
+            self._collected_files.append((relative_path, data))
+            return
+        full_path = os.path.join(self.target_folder_path, relative_path)
+        self._record_output_file(relative_path, hashlib.sha256(data).hexdigest(),
+                                 write_if_changed(full_path, data))
+
+    def _record_output_file(self, relative_path, digest, written):
+        # type: (typing.Text, typing.Text, bool) -> None
+        manifest_path = os.path.normpath(relative_path).replace(os.sep, '/')
+        self.output_files[manifest_path] = digest
+        if not written:
+            self.unchanged_file_count += 1
+
+    def _spill_output(self):
+        # type: () -> None
+        if self._spill_file is None:
+            assert self._spill_path is not None
+            self._spill_file = StreamedOutputFile(self._spill_path)
+        self._spill_file.write(''.join(self.output).encode('utf-8'))
         self.output = []
+        self._output_size = 0
 
     def output_buffer_to_string(self):
         # type: () -> typing.Text
-        """Returns the contents of the output buffer as a string."""
+        """
+        Returns the contents of the output buffer as a string.
+
+        Raises AssertionError once the output of the current file has spilled
+        over :attr:`output_spill_threshold`, since the buffer then only holds
+        the part of it that hasn't been written out yet.
+        """
+        if self._spill_file is not None:
+            raise AssertionError(
+                'The output buffer has spilled to a file, so it only holds part '
+                'of the output.')
         return ''.join(self.output)
 
     def clear_output_buffer(self):
         self.output = []
+        if self._output_size is not None:
+            self._output_size = 0
 
     @contextmanager
     def indent(self, dent=None):
@@ -208,10 +492,13 @@ class Generator(object):
         either spaces or tabs, depending on the value of the class variable
         tabs_for_indents.
         """
-        if self.tabs_for_indents:
-            return '\t' * self.cur_indent
-        else:
-            return ' ' * self.cur_indent
+        indents = _tab_indents if self.tabs_for_indents else _space_indents
+        try:
+            return indents[self.cur_indent]
+        except KeyError:
+            indent = ('\t' if self.tabs_for_indents else ' ') * self.cur_indent
+            indents[self.cur_indent] = indent
+            return indent
 
     def emit_raw(self, s):
         # type: (typing.Text) -> None
@@ -229,6 +516,11 @@ class Generator(object):
     def _append_output(self, s):
         # type: (typing.Text) -> None
         self.output.append(s)
+        if self._output_size is not None:
+            self._output_size += len(s)
+            assert self.output_spill_threshold is not None
+            if self._output_size > self.output_spill_threshold:
+                self._spill_output()
 
     def emit(self, s=''):
         # type: (typing.Text) -> None
@@ -240,10 +532,12 @@ class Generator(object):
         assert isinstance(s, six.text_type), 's must be a unicode string'
         assert '\n' not in s, \
             'String to emit cannot contain newline strings.'
+        # Unlike emit_raw(), there's exactly one newline to count.
         if s:
-            self.emit_raw('%s%s\n' % (self.make_indent(), s))
+            self._append_output(self.make_indent() + s + '\n')
         else:
-            self.emit_raw('\n')
+            self._append_output('\n')
+        self.lineno += 1
 
     def emit_wrapped_text(
             self,
@@ -282,13 +576,13 @@ class Generator(object):
         indent = self.make_indent()
         prefix = indent + prefix
 
-        self.emit_raw(textwrap.fill(s,
-                                    initial_indent=prefix + initial_prefix,
-                                    subsequent_indent=prefix + subsequent_prefix,
-                                    width=width,
-                                    break_long_words=break_long_words,
-                                    break_on_hyphens=break_on_hyphens,
-                                    ) + '\n')
+        self.emit_raw(_fill(s,
+                            prefix + initial_prefix,
+                            prefix + subsequent_prefix,
+                            width,
+                            break_long_words,
+                            break_on_hyphens,
+                            ) + '\n')
 
     @classmethod
     def process_doc(cls, doc, handler):
@@ -307,20 +601,27 @@ class Generator(object):
         """
         assert isinstance(doc, six.text_type), \
             'Expected string (unicode in PY2), got %r.' % type(doc)
-        cur_index = 0
+        if '`' not in doc:
+            # There are no references.
+            return doc
+        refs = _doc_ref_cache.get(doc)
+        if refs is None:
+            # The parts of the doc that are not part of any reference, each
+            # with the tag and value of the reference that follows it.
+            refs = []
+            cur_index = 0
+            for match in doc_ref_re.finditer(doc):
+                start, end = match.span()
+                refs.append((doc[cur_index:start], match.group('tag'), match.group('val')))
+                cur_index = end
+            refs.append((doc[cur_index:], None, None))
+            _doc_ref_cache.put(doc, refs)
         parts = []
-        for match in doc_ref_re.finditer(doc):
-            # Append the part of the doc that is not part of any reference.
-            start, end = match.span()
-            parts.append(doc[cur_index:start])
-            cur_index = end
-
-            # Call the handler with the next tag and value.
-            tag = match.group('tag')
-            val = match.group('val')
-            sub = handler(tag, val)
-            parts.append(sub)
-        parts.append(doc[cur_index:])
+        for text, tag, val in refs:
+            parts.append(text)
+            if tag is not None:
+                # Call the handler with the next tag and value.
+                parts.append(handler(tag, val))
         return ''.join(parts)
 
 
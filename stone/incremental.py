@@ -0,0 +1,249 @@
+"""
+Incremental builds, which only regenerate the namespaces that changed since
+the last build into the same output folder.
+
+The state of a build is saved in the output folder. It records a digest of
+everything other than specs that affects the output, such as the version of
+Stone, the generator and its arguments, and a fingerprint of each namespace.
+The fingerprint of a namespace covers the specs that declare it and those of
+every namespace it depends on, directly or indirectly, according to
+:func:`namespace_dependencies`.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import io
+import json
+import logging
+import os
+
+import six
+
+from .data_type import is_struct_type
+from .output import atomic_write
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+    from .api import Api  # noqa: F401 # pylint: disable=unused-import
+
+_logger = logging.getLogger('stone.incremental')
+
+STATE_FILENAME = '.stone-build.json'
+
+# Increment this whenever the contents of the state file change, so that
+# state written by other versions is ignored.
+STATE_FORMAT_VERSION = 1
+
+# The namespace that holds the route schema. It isn't part of Api.namespaces,
+# but every namespace with routes depends on it.
+_ROUTE_SCHEMA_NAMESPACE = 'stone_cfg'
+
+_source_fingerprint = None  # type: typing.Optional[typing.Text]
+
+
+def source_fingerprint():
+    """
+    Returns a digest of every file in the stone package, which includes the
+    built-in generators and the resources they copy to the output folder.
+    """
+    global _source_fingerprint  # pylint: disable=global-statement
+    if _source_fingerprint is None:
+        h = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for dir_path, dir_names, file_names in os.walk(package_dir):
+            dir_names[:] = sorted(d for d in dir_names if d != '__pycache__')
+            for file_name in sorted(file_names):
+                if os.path.splitext(file_name)[1] in ('.pyc', '.pyo'):
+                    continue
+                path = os.path.join(dir_path, file_name)
+                h.update(os.path.relpath(path, package_dir).encode('utf-8'))
+                with open(path, 'rb') as f:
+                    h.update(hashlib.sha256(f.read()).digest())
+        _source_fingerprint = h.hexdigest()
+    return _source_fingerprint
+
+
+def spec_digest(text):
+    # type: (typing.Text) -> typing.Text
+    """
+    Returns the digest of the text of a spec.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def options_digest(generator, generator_args, options):
+    """
+    Returns a digest of everything other than specs that affects the output
+    of a generator.
+
+    Args:
+        generator (str): The name of a built-in generator or the path to a
+            generator module.
+        generator_args (List[str]): The arguments passed to the generator.
+        options: Any other options that affect the output, such as route
+            filters, as a value that can be serialized as JSON.
+    """
+    if os.path.isfile(generator):
+        with open(generator, 'rb') as f:
+            generator_digest = hashlib.sha256(f.read()).hexdigest()
+    else:
+        generator_digest = None
+    data = json.dumps([source_fingerprint(), generator, generator_digest,
+                       generator_args, options], sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def namespace_dependencies(api):
+    # type: (Api) -> typing.Dict[typing.Text, typing.Set[typing.Text]]
+    """
+    Returns the names of the namespaces that each namespace directly depends
+    on. A namespace depends on the namespaces it imports, and on those that
+    declare subtypes of its structs, since generators may emit code for a
+    struct's subtypes along with it.
+    """
+    dependencies = {}
+    for namespace in api.namespaces.values():
+        names = {n.name for n in namespace.get_imported_namespaces()}
+        for data_type in namespace.data_types:
+            if is_struct_type(data_type):
+                names.update(subtype.namespace.name for subtype in data_type.subtypes)
+        names.discard(namespace.name)
+        dependencies[namespace.name] = names
+    return dependencies
+
+
+def namespace_fingerprints(api, spec_paths_by_namespace, spec_digests):
+    """
+    Returns the fingerprint of each namespace, which changes whenever a spec
+    of the namespace or of a namespace that it depends on changes.
+
+    Args:
+        api (stone.api.Api): The API, before any generator has run.
+        spec_paths_by_namespace (Dict[str, List[str]]): The paths of the specs
+            that declare each namespace, as recorded by
+            :class:`stone.lang.tower.TowerOfStone`.
+        spec_digests (Dict[str, str]): The :func:`spec_digest` of each spec by
+            path.
+
+    Returns:
+        Dict[str, str]
+    """
+    def own_digest(name):
+        paths = spec_paths_by_namespace.get(name, [])
+        return ','.join(sorted(spec_digests[path] for path in paths))
+
+    dependencies = namespace_dependencies(api)
+    route_schema_digest = own_digest(_ROUTE_SCHEMA_NAMESPACE)
+    fingerprints = {}
+    for name in dependencies:
+        # Dependencies may be circular, so the fingerprint covers the set of
+        # namespaces that can be reached rather than nesting fingerprints.
+        reached = {name}
+        stack = [name]
+        while stack:
+            for dependency in dependencies[stack.pop()]:
+                if dependency not in reached:
+                    reached.add(dependency)
+                    stack.append(dependency)
+        h = hashlib.sha256(route_schema_digest.encode('ascii'))
+        for dependency in sorted(reached):
+            # The names of the data types and aliases are included, since
+            # routes in other namespaces decide which are kept when
+            # unreachable ones are pruned.
+            namespace = api.namespaces[dependency]
+            names = [dt.name for dt in namespace.data_types + namespace.aliases]
+            h.update(('\n%s:%s:%s' % (dependency, own_digest(dependency), ','.join(names)))
+                     .encode('utf-8'))
+        fingerprints[name] = h.hexdigest()
+    return fingerprints
+
+
+class BuildState(object):
+    """
+    The state of the last build of a generator into an output folder. The
+    state of every generator that builds into a folder is kept in one file.
+    """
+
+    def __init__(self, output, generator):
+        # type: (typing.Text, typing.Text) -> None
+        self.path = os.path.join(output, STATE_FILENAME)
+        self.generator = generator
+        self.options = None  # type: typing.Optional[typing.Text]
+        self.specs = {}  # type: typing.Dict[typing.Text, typing.Text]
+        self.namespaces = {}  # type: typing.Dict[typing.Text, typing.Text]
+
+    @classmethod
+    def load(cls, output, generator):
+        """
+        Returns the state of the last build of a generator into an output
+        folder. If there's no usable state, the state is empty, and every
+        namespace is considered changed.
+        """
+        state = cls(output, generator)
+        entry = state._read_all().get(generator)
+        if entry:
+            state.options = entry['options']
+            state.specs = entry['specs']
+            state.namespaces = entry['namespaces']
+        return state
+
+    def is_up_to_date(self, options, spec_digests):
+        """
+        Returns whether neither the options nor any spec changed since the
+        last build, in which case the output needs no changes.
+        """
+        return self.options == options and self.specs == spec_digests
+
+    def changed_namespaces(self, options, fingerprints):
+        """
+        Returns the names of the namespaces that must be regenerated, or None
+        if everything must be.
+
+        If no namespace changed, but some were removed, the result is empty,
+        and generators that aren't namespace-scoped must still run. Otherwise,
+        the output needs no changes.
+        """
+        if self.options != options:
+            return None
+        return {name for name, fingerprint in fingerprints.items()
+                if self.namespaces.get(name) != fingerprint}
+
+    def update(self, options, spec_digests, fingerprints):
+        self.options = options
+        self.specs = spec_digests
+        self.namespaces = fingerprints
+
+    def save(self):
+        """
+        Saves the state, keeping that of other generators in the same file.
+        Failures are logged and otherwise ignored, since the next build will
+        then regenerate everything.
+        """
+        states = self._read_all()
+        states[self.generator] = {
+            'options': self.options,
+            'specs': self.specs,
+            'namespaces': self.namespaces,
+        }
+        data = json.dumps({'version': STATE_FORMAT_VERSION, 'generators': states},
+                          indent=1, separators=(',', ': '), sort_keys=True)
+        try:
+            atomic_write(self.path, six.text_type(data).encode('utf-8'))
+        except (IOError, OSError) as e:
+            _logger.warning('Could not save build state to %s: %s', self.path, e)
+
+    def _read_all(self):
+        try:
+            with io.open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except IOError:
+            return {}
+        except ValueError as e:
+            _logger.warning('Ignoring invalid build state %s: %s', self.path, e)
+            return {}
+        if not isinstance(data, dict) or data.get('version') != STATE_FORMAT_VERSION:
+            return {}
+        return data['generators']
@@ -0,0 +1,203 @@
+"""
+Snapshots of a fully resolved :class:`stone.api.Api`.
+
+Parsing and validating specs is the slowest part of running a generator. A
+snapshot written by :func:`write_api` can be loaded by :func:`read_api` in a
+fraction of that time, so that several generators can share a single run of
+the front end.
+
+A snapshot is a header line followed by pickles of the Api. The header holds
+a magic string, :data:`IR_FORMAT_VERSION`, the major version of Python that
+wrote it, and the pickle protocol used, which is the highest one that Python
+supports. Only snapshots with the same format version and Python major
+version, and a protocol that this Python supports, can be read.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import gc
+import sys
+
+import six
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+    from stone.api import Api  # noqa: F401 # pylint: disable=unused-import
+
+pickle = six.moves.cPickle
+
+_MAGIC = b'STONE-IR'
+
+# Increment this whenever a change to the classes in stone.api or
+# stone.data_type would make older snapshots load incorrectly.
+IR_FORMAT_VERSION = 3
+
+class InvalidIR(Exception):
+    """Raised when a snapshot cannot be read."""
+
+def write_api(api, f):
+    # type: (Api, typing.BinaryIO) -> None
+    """
+    Writes a snapshot of an Api to a binary file object.
+    """
+    header = '%s %d %d %d\n' % (_MAGIC.decode('ascii'), IR_FORMAT_VERSION,
+                                sys.version_info[0], pickle.HIGHEST_PROTOCOL)
+    f.write(header.encode('ascii'))
+    _GraphWriter(f).write(api)
+
+def read_api(f):
+    # type: (typing.BinaryIO) -> Api
+    """
+    Reads a snapshot written by :func:`write_api` from a binary file object.
+
+    Raises:
+        InvalidIR: The file isn't a snapshot, or it was written by an
+            incompatible version of Stone or Python.
+    """
+    header = f.readline(64).split()
+    # Older format versions have fewer fields, so the format version is
+    # checked before the number of fields.
+    if len(header) < 3 or header[0] != _MAGIC:
+        raise InvalidIR('Not a Stone IR snapshot.')
+    try:
+        format_version = int(header[1])
+    except ValueError:
+        raise InvalidIR('Not a Stone IR snapshot.')
+    if format_version != IR_FORMAT_VERSION:
+        raise InvalidIR(
+            'Snapshot has format version %d, but this version of Stone reads '
+            'version %d. Write the snapshot again.'
+            % (format_version, IR_FORMAT_VERSION))
+    try:
+        python_version, protocol = [int(field) for field in header[2:]]
+    except ValueError:
+        raise InvalidIR('Not a Stone IR snapshot.')
+    if python_version != sys.version_info[0]:
+        raise InvalidIR(
+            'Snapshot was written by Python %d, but this is Python %d.'
+            % (python_version, sys.version_info[0]))
+    if protocol > pickle.HIGHEST_PROTOCOL:
+        raise InvalidIR(
+            'Snapshot was written with pickle protocol %d, but this version of '
+            'Python reads up to protocol %d. Write the snapshot again with this '
+            'version of Python.' % (protocol, pickle.HIGHEST_PROTOCOL))
+    try:
+        return _GraphReader(f).read()
+    except Exception as e:  # pylint: disable=broad-except
+        # Unpickling a truncated or otherwise corrupted file can raise
+        # almost any exception.
+        raise InvalidIR('Snapshot is corrupted: %s' % e)
+
+# An Api is a graph of objects with long chains of references between data
+# types, and pickling it in one go recurses once per link, which overflows
+# the stack for large specs. Instead, every object of a Stone class is
+# replaced by a reference, and its state is pickled as a separate record.
+# References are numbered in the order they're first pickled, and records are
+# written in the same order, so the reader can tell which record belongs to
+# which object without storing the numbers. Records are written in batches,
+# one for each step of a breadth-first walk of the graph. The first reference to an object
+# also carries its class, so that the reader can create the object before its
+# record is read.
+
+class _GraphWriter(object):
+
+    def __init__(self, f):
+        self._pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+        self._pickler.persistent_id = self._persistent_id
+        self._ids = {}  # type: typing.Dict[int, int]
+        self._states = []  # type: typing.List[typing.Any]
+        # Maps a class to whether its objects are written as records.
+        self._is_node_class = {}  # type: typing.Dict[type, bool]
+
+    def write(self, root):
+        with _gc_disabled():
+            self._pickler.dump(root)
+            # Objects first referenced by one batch of records are written in
+            # the next batch.
+            done = 0
+            while done < len(self._states):
+                batch = self._states[done:]
+                done = len(self._states)
+                self._pickler.dump(batch)
+
+    def _persistent_id(self, obj):
+        cls = type(obj)
+        is_node = self._is_node_class.get(cls)
+        if is_node is None:
+            is_node = self._is_node_class[cls] = _is_node_class(cls)
+        if not is_node:
+            return None
+        obj_id = id(obj)
+        ref = self._ids.get(obj_id)
+        if ref is not None:
+            return ref
+        ref = self._ids[obj_id] = len(self._states)
+        self._states.append(obj.__reduce_ex__(2)[2])
+        return ref, cls
+
+class _GraphReader(object):
+
+    def __init__(self, f):
+        self._unpickler = pickle.Unpickler(f)
+        self._unpickler.persistent_load = self._persistent_load
+        self._objects = []  # type: typing.List[typing.Any]
+
+    def read(self):
+        with _gc_disabled():
+            root = self._unpickler.load()
+            done = 0
+            while done < len(self._objects):
+                batch = self._unpickler.load()
+                for obj, state in zip(self._objects[done:], batch):
+                    _set_state(obj, state)
+                done += len(batch)
+        return root
+
+    def _persistent_load(self, ref):
+        if isinstance(ref, tuple):
+            ref, cls = ref
+            assert ref == len(self._objects), 'References out of order.'
+            self._objects.append(cls.__new__(cls))
+        return self._objects[ref]
+
+def _is_node_class(cls):
+    """
+    Returns whether objects of a class are written as records. Only Stone
+    classes that are pickled in the default way qualify.
+    """
+    if not getattr(cls, '__module__', '').startswith('stone.'):
+        return False
+    return (cls.__reduce_ex__ is object.__reduce_ex__ and
+            cls.__reduce__ is object.__reduce__ and
+            not hasattr(cls, '__getnewargs__'))
+
+class _gc_disabled(object):  # pylint: disable=invalid-name
+    """
+    Pauses the cyclic garbage collector, which otherwise runs over and over as
+    an Api's many objects are created, and makes up most of the time taken.
+    """
+
+    def __enter__(self):
+        self.was_enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc_info):
+        if self.was_enabled:
+            gc.enable()
+
+def _set_state(obj, state):
+    # This is what pickle does with the state returned by __reduce_ex__().
+    setstate = getattr(obj, '__setstate__', None)
+    if setstate is not None:
+        setstate(state)
+        return
+    slot_state = None
+    if isinstance(state, tuple) and len(state) == 2:
+        state, slot_state = state
+    if state:
+        obj.__dict__.update(state)
+    if slot_state:
+        for k, v in slot_state.items():
+            setattr(obj, k, v)
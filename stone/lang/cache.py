@@ -0,0 +1,176 @@
+"""
+Caches of parser output, so that specs that haven't changed aren't parsed
+again.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import errno
+import gc
+import hashlib
+import io
+import logging
+import os
+import sys
+
+import six
+
+from ..output import atomic_write
+from . import lexer, parser
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+_logger = logging.getLogger('stone.lang.cache')
+
+pickle = six.moves.cPickle
+
+_parser_fingerprint = None  # type: typing.Optional[bytes]
+
+def parser_fingerprint():
+    """
+    Returns a digest of the lexer and parser sources and the Python version.
+    Any change to them may change the parser output, so it's part of every
+    cache key.
+    """
+    global _parser_fingerprint  # pylint: disable=global-statement
+    if _parser_fingerprint is None:
+        h = hashlib.sha256()
+        h.update(('%d.%d' % sys.version_info[:2]).encode('ascii'))
+        for module in (lexer, parser):
+            source_path = os.path.splitext(module.__file__)[0] + '.py'
+            try:
+                with open(source_path, 'rb') as f:
+                    h.update(f.read())
+            except IOError:
+                # Only bytecode is installed, which changes along with the
+                # source.
+                with open(module.__file__, 'rb') as f:
+                    h.update(f.read())
+        _parser_fingerprint = h.digest()
+    return _parser_fingerprint
+
+def cache_key(path, text):
+    """
+    Returns the key of the parser output of a spec. The path is part of the
+    key because the parser records it in every element for error reporting.
+    """
+    h = hashlib.sha256(parser_fingerprint())
+    for part in (path or '', text):
+        data = part.encode('utf-8')
+        # Prefix each part with its length so that parts can't run together.
+        h.update(('%d:' % len(data)).encode('ascii'))
+        h.update(data)
+    return h.hexdigest()
+
+class DiskAstCache(object):
+    """
+    Stores the parser output of each spec as a pickle in a directory.
+
+    Entries are keyed by the path and contents of the spec, and by the
+    parser_fingerprint(). Entries that are unreadable, corrupted, or were
+    written for a different key are treated as misses and removed.
+    """
+
+    def __init__(self, directory):
+        # type: (typing.Text) -> None
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, text):
+        """
+        Returns the cached parser output of a spec, or None.
+        """
+        key = cache_key(path, text)
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as f:
+                stored_key, res = _load_without_gc(f)
+            if stored_key != key:
+                raise ValueError('Entry was written for a different key.')
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                _logger.warning('Could not read %s: %s', entry_path, e)
+            self.misses += 1
+            return None
+        except Exception as e:  # pylint: disable=broad-except
+            # Unpickling a truncated or otherwise corrupted file can raise
+            # almost any exception.
+            _logger.warning('Removing invalid cache entry %s: %s', entry_path, e)
+            self._remove(entry_path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return res
+
+    def put(self, path, text, res):
+        """
+        Stores the parser output of a spec. Failures are logged and otherwise
+        ignored, since the cache is only an optimization.
+        """
+        key = cache_key(path, text)
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # Concurrent readers never see a partially written entry.
+            atomic_write(self._entry_path(key),
+                         pickle.dumps((key, res), pickle.HIGHEST_PROTOCOL))
+        except (IOError, OSError, pickle.PicklingError) as e:
+            _logger.warning('Could not write to AST cache %s: %s', self.directory, e)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key + '.ast')
+
+    def _remove(self, entry_path):
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
+
+class MemoryAstCache(object):
+    """
+    Keeps the parser output of the last version of each spec in memory, for
+    processes that parse the same specs over and over.
+
+    The tower modifies the parser output, so it's stored pickled, and a new
+    copy is returned by each get().
+    """
+
+    def __init__(self):
+        # type: () -> None
+        # Maps the path of a spec to its key and pickled parser output.
+        self._entries = {}  # type: typing.Dict[typing.Text, typing.Tuple[str, bytes]]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, text):
+        """
+        Returns the cached parser output of a spec, or None.
+        """
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != cache_key(path, text):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _load_without_gc(io.BytesIO(entry[1]))
+
+    def put(self, path, text, res):
+        """
+        Stores the parser output of a spec, replacing that of any other
+        version of the spec.
+        """
+        self._entries[path] = (
+            cache_key(path, text), pickle.dumps(res, pickle.HIGHEST_PROTOCOL))
+
+def _load_without_gc(f):
+    # The cyclic garbage collector runs over and over as the many objects of
+    # the parser output are created, and makes up most of the time taken.
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.load(f)
+    finally:
+        if was_enabled:
+            gc.enable()
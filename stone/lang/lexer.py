@@ -17,9 +17,23 @@ class MultiToken(object):
         self.type = tokens[0].type
         self.tokens = tokens
 
+class _StoneNullType(object):
+    """The type of StoneNull. Pickling preserves the identity of the
+    singleton so that parsed specs can be sent between processes."""
+
+    def __repr__(self):
+        return 'StoneNull'
+
+    def __reduce__(self):
+        return str('StoneNull')
+
 # Represents a null value. We want to differentiate between the Python "None"
 # and null in several places.
-StoneNull = object()
+StoneNull = _StoneNullType()
+
+# Compiling the master regex from the t_ rules is much slower than lexing a
+# typical spec, so it's done once per lexer class and cloned for each input.
+_lexer_templates = {}  # type: typing.Dict[type, typing.Any]
 
 class StoneLexer(object):
     """
@@ -41,7 +55,16 @@ class StoneLexer(object):
 
         :param str file_data: Contents of the file to lex.
         """
-        self.lex = lex.lex(module=self, **kwargs)
+        if kwargs:
+            self.lex = lex.lex(module=self, **kwargs)
+        else:
+            template = _lexer_templates.get(type(self))
+            if template is None:
+                template = _lexer_templates[type(self)] = lex.lex(module=self)
+            # Cloning rebinds the rules of each state to this instance, but
+            # not those of the current state until it's re-entered.
+            self.lex = template.clone(self)
+            self.lex.begin(str('INITIAL'))
         self.tokens_queue = []
         self.cur_indent = 0
         # Hack to avoid tokenization bugs caused by files that do not end in a
@@ -22,6 +22,21 @@ class _Element(object):
         self.lineno = lineno
         self.lexpos = lexpos
 
+class StoneLocation(object):
+    """
+    Stands in for an element once the rest of it is no longer needed, so that
+    errors can still point at where it was declared.
+    """
+
+    __slots__ = ('path', 'lineno')
+
+    def __init__(self, path, lineno):
+        self.path = path
+        self.lineno = lineno
+
+    def __repr__(self):
+        return 'StoneLocation({!r}, {!r})'.format(self.path, self.lineno)
+
 class StoneNamespace(_Element):
 
     def __init__(self, path, lineno, lexpos, name, doc):
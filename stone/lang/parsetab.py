@@ -0,0 +1,138 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'specATTRS BOOLEAN BY COMMA DEDENT DEPRECATED DOT EQ EXTENDS FLOAT ID IMPORT INDENT INTEGER KEYWORD LBRACKET LPAR NEWLINE NULL PATH Q RBRACKET ROUTE RPAR STRING STRUCT UNION UNION_CLOSEDspec : NL\n                | emptyspec : namespace\n                | import\n                | definitionspec : spec namespace\n                | spec import\n                | spec definitionspec : spec NLdefinition : alias\n                      | struct\n                      | union\n                      | routenamespace : KEYWORD ID NL\n                     | KEYWORD ID NL INDENT docsection DEDENTimport : IMPORT ID NLalias : KEYWORD ID EQ type_ref NL\n                 | KEYWORD ID EQ type_ref NL INDENT docsection DEDENTNL : NEWLINENL : NL NEWLINEprimitive : BOOLEAN\n                     | FLOAT\n                     | INTEGER\n                     | NULL\n                     | STRINGpos_arg : primitive\n                   | type_refpos_args_list : pos_argpos_args_list : pos_args_list COMMA pos_argkw_arg : ID EQ primitive\n                  | ID EQ type_refkw_args : kw_argkw_args : kw_args COMMA kw_argargs : LPAR pos_args_list COMMA kw_args RPAR\n                | LPAR pos_args_list RPAR\n                | LPAR kw_args RPAR\n                | LPAR RPAR\n                | emptynullable : Q\n                    | emptytype_ref : ID args nullabletype_ref : ID DOT ID args nullableenumerated_subtypes : uniont NL INDENT subtypes_list DEDENT\n                               | emptystruct : STRUCT ID inheritance NL                      INDENT docsection enumerated_subtypes field_list examples DEDENTanony_def : STRUCT empty inheritance NL                 INDENT docsection enumerated_subtypes field_list examples DEDENTinheritance : EXTENDS type_ref\n                       | emptysubtypes_list : subtype_field\n                         | emptysubtypes_list : subtypes_list subtype_fieldsubtype_field : ID type_ref NLfield_list : field\n                      | emptyfield_list : field_list fielddeprecation : DEPRECATED\n                       | emptydefault_option : EQ primitive\n                          | EQ tag_ref\n                          | emptyfield : ID type_ref default_option deprecation NL                     INDENT docsection anony_def_option DEDENT\n                 | ID type_ref default_option deprecation NLanony_def_option : anony_def\n                            | emptytag_ref : IDunion : uniont ID inheritance NL                         INDENT docsection field_list examples DEDENTanony_def : uniont empty inheritance NL                         INDENT docsection field_list examples DEDENTuniont : UNION\n                  | UNION_CLOSEDfield : ID NL\n                 | ID NL INDENT docstring NL DEDENTroute : ROUTE route_name route_io route_deprecation NL                         INDENT docsection attrssection DEDENT\n                 | ROUTE route_name route_io route_deprecation NLroute_name : ID route_pathroute_path : PATH\n                      | emptyroute_io : LPAR type_ref COMMA type_ref RPAR\n                    | LPAR type_ref COMMA type_ref COMMA type_ref RPARroute_deprecation : DEPRECATED\n                             | DEPRECATED BY route_name\n                             | emptyattrssection : ATTRS NL INDENT attr_fields DEDENT\n                        | emptyattr_fields : attr_fieldattr_fields : attr_fields attr_fieldattr_field : ID EQ primitive NL\n                      | ID EQ tag_ref NLdocsection : docstring NL\n                      | emptydocstring : STRINGexamples : example\n                    | emptyexamples : examples exampleexample : KEYWORD ID NL INDENT docsection example_fields DEDENT\n                   | KEYWORD ID NLexample_fields : example_fieldexample_fields : example_fields example_fieldexample_field : ID EQ primitive NL\n                         | ID EQ ex_list NLexample_field : ID EQ ID NLex_list : LBRACKET ex_list_items RBRACKET\n                   | LBRACKET empty RBRACKETex_list_item : primitiveex_list_item : IDex_list_item : ex_listex_list_items : ex_list_itemex_list_items : ex_list_items COMMA ex_list_itemempty :'
+    
+_lr_action_items = {'NEWLINE':([0,1,2,3,4,5,6,7,10,11,12,13,17,18,19,20,21,22,23,24,25,26,27,29,30,32,33,35,36,37,39,40,41,43,44,45,46,47,48,49,50,53,55,56,59,60,63,66,67,68,69,70,71,74,80,81,82,83,84,89,91,93,94,99,101,107,108,115,117,118,119,126,129,132,134,136,138,139,140,141,142,147,148,149,150,151,152,153,154,158,159,160,165,176,177,181,182,186,187,189,190,191,192,193,195,196,197,198,199,206,207,208,210,],[7,7,23,-2,-3,-4,-5,-19,-10,-11,-12,-13,-68,-69,-6,-7,-8,23,-20,7,7,-108,-108,-108,23,23,7,-48,7,-108,-74,-75,-76,-108,7,23,-47,23,7,-79,-81,7,-90,-108,-38,23,23,-15,23,-41,-39,-40,-108,-37,-21,-22,-23,-24,-25,-80,-108,-35,-36,7,7,-77,-42,-18,23,-108,23,7,-34,-108,-60,-66,7,-72,23,-78,-45,7,-56,-57,-58,-59,-65,7,23,7,23,23,23,7,7,-108,-108,23,23,-108,-108,7,7,7,7,7,23,23,23,23,23,-101,-102,]),'KEYWORD':([0,1,2,3,4,5,6,7,10,11,12,13,19,20,21,22,23,30,32,54,60,61,62,63,66,67,86,87,98,100,102,103,104,115,116,119,120,121,122,123,130,136,137,139,142,154,156,159,167,184,188,211,212,214,215,216,217,218,219,220,],[8,8,-1,-2,-3,-4,-5,-19,-10,-11,-12,-13,-6,-7,-8,-9,-20,-14,-16,-89,-17,-108,-108,-73,-15,-88,-108,-108,-108,-44,124,-53,-54,-18,124,-70,124,-55,-91,-92,124,-66,-93,-72,-45,-95,-43,-62,-71,-94,-61,-108,-108,-108,-108,-108,124,124,124,124,]),'IMPORT':([0,1,2,3,4,5,6,7,10,11,12,13,19,20,21,22,23,30,32,60,63,66,115,136,139,142,],[9,9,-1,-2,-3,-4,-5,-19,-10,-11,-12,-13,-6,-7,-8,-9,-20,-14,-16,-17,-73,-15,-18,-66,-72,-45,]),'STRUCT':([0,1,2,3,4,5,6,7,10,11,12,13,19,20,21,22,23,30,32,54,60,63,66,67,115,136,139,142,166,172,],[14,14,-1,-2,-3,-4,-5,-19,-10,-11,-12,-13,-6,-7,-8,-9,-20,-14,-16,-89,-17,-73,-15,-88,-18,-66,-72,-45,-108,181,]),'ROUTE':([0,1,2,3,4,5,6,7,10,11,12,13,19,20,21,22,23,30,32,60,63,66,115,136,139,142,],[16,16,-1,-2,-3,-4,-5,-19,-10,-11,-12,-13,-6,-7,-8,-9,-20,-14,-16,-17,-73,-15,-18,-66,-72,-45,]),'UNION':([0,1,2,3,4,5,6,7,10,11,12,13,19,20,21,22,23,30,32,54,60,61,63,66,67,86,115,136,139,142,166,172,211,214,],[17,17,-1,-2,-3,-4,-5,-19,-10,-11,-12,-13,-6,-7,-8,-9,-20,-14,-16,-89,-17,-108,-73,-15,-88,17,-18,-66,-72,-45,-108,17,-108,17,]),'UNION_CLOSED':([0,1,2,3,4,5,6,7,10,11,12,13,19,20,21,22,23,30,32,54,60,61,63,66,67,86,115,136,139,142,166,172,211,214,],[18,18,-1,-2,-3,-4,-5,-19,-10,-11,-12,-13,-6,-7,-8,-9,-20,-14,-16,-89,-17,-108,-73,-15,-88,18,-18,-66,-72,-45,-108,18,-108,18,]),'$end':([0,1,2,3,4,5,6,7,10,11,12,13,19,20,21,22,23,30,32,60,63,66,115,136,139,142,],[-108,0,-1,-2,-3,-4,-5,-19,-10,-11,-12,-13,-6,-7,-8,-9,-20,-14,-16,-17,-73,-15,-18,-66,-72,-45,]),'INDENT':([7,23,30,45,47,60,63,117,119,140,154,159,206,207,],[-19,-20,42,61,62,85,88,131,135,155,161,166,211,212,]),'DEDENT':([7,23,42,52,54,61,62,67,85,86,87,88,97,98,100,102,103,104,105,116,119,120,121,122,123,125,127,130,131,137,143,144,145,154,156,157,159,160,162,163,165,166,167,169,170,172,174,175,178,179,180,184,185,186,187,188,197,198,199,211,212,214,215,216,217,218,219,220,221,222,],[-19,-20,-108,66,-89,-108,-108,-88,-108,-108,-108,-108,115,-108,-44,-108,-53,-54,-108,-108,-70,136,-55,-91,-92,139,-83,142,-108,-93,156,-49,-50,-95,-43,-51,-62,167,169,-84,-52,-108,-71,-82,-85,-108,184,-96,188,-63,-64,-94,-97,-86,-87,-61,-100,-98,-99,-108,-108,-108,-108,-108,-108,-108,221,222,-67,-46,]),'ID':([7,8,9,14,15,16,17,18,23,31,34,38,54,57,58,61,62,64,65,67,86,87,92,95,96,98,100,101,102,103,104,106,116,119,121,124,131,133,143,144,145,146,155,156,157,159,161,162,163,165,167,168,170,171,174,175,183,185,186,187,188,194,197,198,199,209,211,212,214,215,216,217,218,],[-19,24,25,26,27,29,-68,-69,-20,43,43,43,-89,71,79,-108,-108,29,43,-88,-108,101,79,112,43,101,-44,43,101,-53,-54,43,101,-70,-55,138,146,152,146,-49,-50,43,164,-43,-51,-62,-108,164,-84,-52,-71,173,-85,152,173,-96,191,-97,-86,-87,-61,204,-100,-98,-99,204,-108,-108,-108,101,101,101,101,]),'ATTRS':([7,23,54,67,88,105,],[-19,-20,-89,-88,-108,126,]),'EXTENDS':([17,18,26,27,181,182,189,190,],[-68,-69,34,34,-108,-108,34,34,]),'EQ':([24,43,56,59,68,69,70,71,74,79,91,93,94,108,112,118,129,164,173,],[31,-108,-108,-38,-41,-39,-40,-108,-37,96,-108,-35,-36,-42,96,133,-34,171,183,]),'LPAR':([28,29,39,40,41,43,71,79,],[38,-108,-74,-75,-76,58,58,58,]),'PATH':([29,],[40,]),'DEPRECATED':([37,43,56,59,68,69,70,71,74,80,81,82,83,84,91,93,94,107,108,118,129,132,134,141,150,151,152,],[49,-108,-108,-38,-41,-39,-40,-108,-37,-21,-22,-23,-24,-25,-108,-35,-36,-77,-42,-108,-34,148,-60,-78,-58,-59,-65,]),'STRING':([42,58,61,62,85,88,92,96,133,135,161,166,171,183,194,209,211,212,],[55,84,55,55,55,55,84,84,84,55,55,55,84,84,84,84,55,55,]),'DOT':([43,79,],[57,57,]),'Q':([43,56,59,71,74,79,91,93,94,129,],[-108,69,-38,-108,-37,-108,69,-35,-36,-34,]),'COMMA':([43,51,56,59,68,69,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,90,91,93,94,108,109,110,111,113,114,129,200,202,203,204,205,208,210,213,],[-108,65,-108,-38,-41,-39,-40,-108,92,95,-37,-28,-32,-26,-27,-108,-21,-22,-23,-24,-25,106,-108,-35,-36,-42,95,-29,-33,-30,-31,-34,209,-106,-103,-104,-105,-101,-102,-107,]),'RPAR':([43,56,58,59,68,69,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,90,91,93,94,108,109,110,111,113,114,128,129,],[-108,-108,74,-38,-41,-39,-40,-108,93,94,-37,-28,-32,-26,-27,-108,-21,-22,-23,-24,-25,107,-108,-35,-36,-42,129,-29,-33,-30,-31,141,-34,]),'BY':([49,],[64,]),'BOOLEAN':([58,92,96,133,171,183,194,209,],[80,80,80,80,80,80,80,80,]),'FLOAT':([58,92,96,133,171,183,194,209,],[81,81,81,81,81,81,81,81,]),'INTEGER':([58,92,96,133,171,183,194,209,],[82,82,82,82,82,82,82,82,]),'NULL':([58,92,96,133,171,183,194,209,],[83,83,83,83,83,83,83,83,]),'RBRACKET':([80,81,82,83,84,194,200,201,202,203,204,205,208,210,213,],[-21,-22,-23,-24,-25,-108,208,210,-106,-103,-104,-105,-101,-102,-107,]),'LBRACKET':([183,194,209,],[194,194,194,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'spec':([0,],[1,]),'NL':([0,1,24,25,33,36,44,48,53,99,101,126,138,147,153,158,176,177,191,192,193,195,196,],[2,22,30,32,45,47,60,63,67,117,119,140,154,159,160,165,186,187,197,198,199,206,207,]),'empty':([0,26,27,29,37,42,43,56,61,62,71,79,85,86,87,88,91,98,102,105,116,118,131,132,161,166,172,181,182,189,190,194,211,212,214,215,216,217,218,],[3,35,35,41,50,54,59,70,54,54,59,59,54,100,104,54,70,104,123,127,123,134,145,149,54,54,180,189,190,35,35,201,54,54,100,104,104,123,123,]),'namespace':([0,1,],[4,19,]),'import':([0,1,],[5,20,]),'definition':([0,1,],[6,21,]),'alias':([0,1,],[10,10,]),'struct':([0,1,],[11,11,]),'union':([0,1,],[12,12,]),'route':([0,1,],[13,13,]),'uniont':([0,1,86,172,214,],[15,15,99,182,99,]),'route_name':([16,64,],[28,89,]),'inheritance':([26,27,189,190,],[33,36,195,196,]),'route_io':([28,],[37,]),'route_path':([29,],[39,]),'type_ref':([31,34,38,58,65,92,96,101,106,146,],[44,46,51,78,90,78,114,118,128,158,]),'route_deprecation':([37,],[48,]),'docsection':([42,61,62,85,88,161,166,211,212,],[52,86,87,97,105,168,172,214,215,]),'docstring':([42,61,62,85,88,135,161,166,211,212,],[53,53,53,53,53,153,53,53,53,53,]),'args':([43,71,79,],[56,91,56,]),'nullable':([56,91,],[68,108,]),'pos_args_list':([58,],[72,]),'kw_args':([58,92,],[73,109,]),'pos_arg':([58,92,],[75,110,]),'kw_arg':([58,92,95,],[76,76,111,]),'primitive':([58,92,96,133,171,183,194,209,],[77,77,113,150,176,192,203,203,]),'enumerated_subtypes':([86,214,],[98,216,]),'field_list':([87,98,215,216,],[102,116,217,218,]),'field':([87,98,102,116,215,216,217,218,],[103,103,121,121,103,103,121,121,]),'examples':([102,116,217,218,],[120,130,219,220,]),'example':([102,116,120,130,217,218,219,220,],[122,122,137,137,122,122,137,137,]),'attrssection':([105,],[125,]),'default_option':([118,],[132,]),'subtypes_list':([131,],[143,]),'subtype_field':([131,143,],[144,157,]),'deprecation':([132,],[147,]),'tag_ref':([133,171,],[151,177,]),'attr_fields':([155,],[162,]),'attr_field':([155,162,],[163,170,]),'example_fields':([168,],[174,]),'example_field':([168,174,],[175,185,]),'anony_def_option':([172,],[178,]),'anony_def':([172,],[179,]),'ex_list':([183,194,209,],[193,205,205,]),'ex_list_items':([194,],[200,]),'ex_list_item':([194,209,],[202,213,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> spec","S'",1,None,None,None),
+  ('spec -> NL','spec',1,'p_spec_init','parser.py',398),
+  ('spec -> empty','spec',1,'p_spec_init','parser.py',399),
+  ('spec -> namespace','spec',1,'p_spec_init_decl','parser.py',403),
+  ('spec -> import','spec',1,'p_spec_init_decl','parser.py',404),
+  ('spec -> definition','spec',1,'p_spec_init_decl','parser.py',405),
+  ('spec -> spec namespace','spec',2,'p_spec_iter','parser.py',409),
+  ('spec -> spec import','spec',2,'p_spec_iter','parser.py',410),
+  ('spec -> spec definition','spec',2,'p_spec_iter','parser.py',411),
+  ('spec -> spec NL','spec',2,'p_spec_ignore_newline','parser.py',418),
+  ('definition -> alias','definition',1,'p_definition','parser.py',422),
+  ('definition -> struct','definition',1,'p_definition','parser.py',423),
+  ('definition -> union','definition',1,'p_definition','parser.py',424),
+  ('definition -> route','definition',1,'p_definition','parser.py',425),
+  ('namespace -> KEYWORD ID NL','namespace',3,'p_namespace','parser.py',429),
+  ('namespace -> KEYWORD ID NL INDENT docsection DEDENT','namespace',6,'p_namespace','parser.py',430),
+  ('import -> IMPORT ID NL','import',3,'p_import','parser.py',441),
+  ('alias -> KEYWORD ID EQ type_ref NL','alias',5,'p_alias','parser.py',445),
+  ('alias -> KEYWORD ID EQ type_ref NL INDENT docsection DEDENT','alias',8,'p_alias','parser.py',446),
+  ('NL -> NEWLINE','NL',1,'p_nl','parser.py',455),
+  ('NL -> NL NEWLINE','NL',2,'p_nl_combine','parser.py',461),
+  ('primitive -> BOOLEAN','primitive',1,'p_primitive','parser.py',468),
+  ('primitive -> FLOAT','primitive',1,'p_primitive','parser.py',469),
+  ('primitive -> INTEGER','primitive',1,'p_primitive','parser.py',470),
+  ('primitive -> NULL','primitive',1,'p_primitive','parser.py',471),
+  ('primitive -> STRING','primitive',1,'p_primitive','parser.py',472),
+  ('pos_arg -> primitive','pos_arg',1,'p_pos_arg','parser.py',495),
+  ('pos_arg -> type_ref','pos_arg',1,'p_pos_arg','parser.py',496),
+  ('pos_args_list -> pos_arg','pos_args_list',1,'p_pos_args_list_create','parser.py',500),
+  ('pos_args_list -> pos_args_list COMMA pos_arg','pos_args_list',3,'p_pos_args_list_extend','parser.py',504),
+  ('kw_arg -> ID EQ primitive','kw_arg',3,'p_kw_arg','parser.py',509),
+  ('kw_arg -> ID EQ type_ref','kw_arg',3,'p_kw_arg','parser.py',510),
+  ('kw_args -> kw_arg','kw_args',1,'p_kw_args','parser.py',514),
+  ('kw_args -> kw_args COMMA kw_arg','kw_args',3,'p_kw_args_update','parser.py',518),
+  ('args -> LPAR pos_args_list COMMA kw_args RPAR','args',5,'p_args','parser.py',527),
+  ('args -> LPAR pos_args_list RPAR','args',3,'p_args','parser.py',528),
+  ('args -> LPAR kw_args RPAR','args',3,'p_args','parser.py',529),
+  ('args -> LPAR RPAR','args',2,'p_args','parser.py',530),
+  ('args -> empty','args',1,'p_args','parser.py',531),
+  ('nullable -> Q','nullable',1,'p_field_nullable','parser.py',543),
+  ('nullable -> empty','nullable',1,'p_field_nullable','parser.py',544),
+  ('type_ref -> ID args nullable','type_ref',3,'p_type_ref','parser.py',548),
+  ('type_ref -> ID DOT ID args nullable','type_ref',5,'p_foreign_type_ref','parser.py',561),
+  ('enumerated_subtypes -> uniont NL INDENT subtypes_list DEDENT','enumerated_subtypes',5,'p_enumerated_subtypes','parser.py',599),
+  ('enumerated_subtypes -> empty','enumerated_subtypes',1,'p_enumerated_subtypes','parser.py',600),
+  ('struct -> STRUCT ID inheritance NL INDENT docsection enumerated_subtypes field_list examples DEDENT','struct',10,'p_struct','parser.py',605),
+  ('anony_def -> STRUCT empty inheritance NL INDENT docsection enumerated_subtypes field_list examples DEDENT','anony_def',10,'p_anony_struct','parser.py',610),
+  ('inheritance -> EXTENDS type_ref','inheritance',2,'p_inheritance','parser.py',627),
+  ('inheritance -> empty','inheritance',1,'p_inheritance','parser.py',628),
+  ('subtypes_list -> subtype_field','subtypes_list',1,'p_enumerated_subtypes_list_create','parser.py',637),
+  ('subtypes_list -> empty','subtypes_list',1,'p_enumerated_subtypes_list_create','parser.py',638),
+  ('subtypes_list -> subtypes_list subtype_field','subtypes_list',2,'p_enumerated_subtypes_list_extend','parser.py',643),
+  ('subtype_field -> ID type_ref NL','subtype_field',3,'p_enumerated_subtype_field','parser.py',648),
+  ('field_list -> field','field_list',1,'p_field_list_create','parser.py',662),
+  ('field_list -> empty','field_list',1,'p_field_list_create','parser.py',663),
+  ('field_list -> field_list field','field_list',2,'p_field_list_extend','parser.py',670),
+  ('deprecation -> DEPRECATED','deprecation',1,'p_field_deprecation','parser.py',675),
+  ('deprecation -> empty','deprecation',1,'p_field_deprecation','parser.py',676),
+  ('default_option -> EQ primitive','default_option',2,'p_default_option','parser.py',680),
+  ('default_option -> EQ tag_ref','default_option',2,'p_default_option','parser.py',681),
+  ('default_option -> empty','default_option',1,'p_default_option','parser.py',682),
+  ('field -> ID type_ref default_option deprecation NL INDENT docsection anony_def_option DEDENT','field',9,'p_field','parser.py',690),
+  ('field -> ID type_ref default_option deprecation NL','field',5,'p_field','parser.py',691),
+  ('anony_def_option -> anony_def','anony_def_option',1,'p_anony_def_option','parser.py',709),
+  ('anony_def_option -> empty','anony_def_option',1,'p_anony_def_option','parser.py',710),
+  ('tag_ref -> ID','tag_ref',1,'p_tag_ref','parser.py',714),
+  ('union -> uniont ID inheritance NL INDENT docsection field_list examples DEDENT','union',9,'p_union','parser.py',732),
+  ('anony_def -> uniont empty inheritance NL INDENT docsection field_list examples DEDENT','anony_def',9,'p_anony_union','parser.py',737),
+  ('uniont -> UNION','uniont',1,'p_uniont','parser.py',754),
+  ('uniont -> UNION_CLOSED','uniont',1,'p_uniont','parser.py',755),
+  ('field -> ID NL','field',2,'p_field_void','parser.py',759),
+  ('field -> ID NL INDENT docstring NL DEDENT','field',6,'p_field_void','parser.py',760),
+  ('route -> ROUTE route_name route_io route_deprecation NL INDENT docsection attrssection DEDENT','route',9,'p_route','parser.py',779),
+  ('route -> ROUTE route_name route_io route_deprecation NL','route',5,'p_route','parser.py',780),
+  ('route_name -> ID route_path','route_name',2,'p_route_name','parser.py',795),
+  ('route_path -> PATH','route_path',1,'p_route_path_suffix','parser.py',802),
+  ('route_path -> empty','route_path',1,'p_route_path_suffix','parser.py',803),
+  ('route_io -> LPAR type_ref COMMA type_ref RPAR','route_io',5,'p_route_io','parser.py',807),
+  ('route_io -> LPAR type_ref COMMA type_ref COMMA type_ref RPAR','route_io',7,'p_route_io','parser.py',808),
+  ('route_deprecation -> DEPRECATED','route_deprecation',1,'p_route_deprecation','parser.py',815),
+  ('route_deprecation -> DEPRECATED BY route_name','route_deprecation',3,'p_route_deprecation','parser.py',816),
+  ('route_deprecation -> empty','route_deprecation',1,'p_route_deprecation','parser.py',817),
+  ('attrssection -> ATTRS NL INDENT attr_fields DEDENT','attrssection',5,'p_attrs_section','parser.py',824),
+  ('attrssection -> empty','attrssection',1,'p_attrs_section','parser.py',825),
+  ('attr_fields -> attr_field','attr_fields',1,'p_attr_fields_create','parser.py',830),
+  ('attr_fields -> attr_fields attr_field','attr_fields',2,'p_attr_fields_add','parser.py',834),
+  ('attr_field -> ID EQ primitive NL','attr_field',4,'p_attr_field','parser.py',839),
+  ('attr_field -> ID EQ tag_ref NL','attr_field',4,'p_attr_field','parser.py',840),
+  ('docsection -> docstring NL','docsection',2,'p_docsection','parser.py',865),
+  ('docsection -> empty','docsection',1,'p_docsection','parser.py',866),
+  ('docstring -> STRING','docstring',1,'p_docstring_string','parser.py',871),
+  ('examples -> example','examples',1,'p_examples_create','parser.py',888),
+  ('examples -> empty','examples',1,'p_examples_create','parser.py',889),
+  ('examples -> examples example','examples',2,'p_examples_add','parser.py',895),
+  ('example -> KEYWORD ID NL INDENT docsection example_fields DEDENT','example',7,'p_example','parser.py',907),
+  ('example -> KEYWORD ID NL','example',3,'p_example','parser.py',908),
+  ('example_fields -> example_field','example_fields',1,'p_example_fields_create','parser.py',926),
+  ('example_fields -> example_fields example_field','example_fields',2,'p_example_fields_add','parser.py',930),
+  ('example_field -> ID EQ primitive NL','example_field',4,'p_example_field','parser.py',935),
+  ('example_field -> ID EQ ex_list NL','example_field',4,'p_example_field','parser.py',936),
+  ('example_field -> ID EQ ID NL','example_field',4,'p_example_field_ref','parser.py',945),
+  ('ex_list -> LBRACKET ex_list_items RBRACKET','ex_list',3,'p_ex_list','parser.py',953),
+  ('ex_list -> LBRACKET empty RBRACKET','ex_list',3,'p_ex_list','parser.py',954),
+  ('ex_list_item -> primitive','ex_list_item',1,'p_ex_list_item_primitive','parser.py',961),
+  ('ex_list_item -> ID','ex_list_item',1,'p_ex_list_item_id','parser.py',968),
+  ('ex_list_item -> ex_list','ex_list_item',1,'p_ex_list_item_list','parser.py',972),
+  ('ex_list_items -> ex_list_item','ex_list_items',1,'p_ex_list_items_create','parser.py',976),
+  ('ex_list_items -> ex_list_items COMMA ex_list_item','ex_list_items',3,'p_ex_list_items_extend','parser.py',980),
+  ('empty -> <empty>','empty',0,'p_empty','parser.py',989),
+]
@@ -3,6 +3,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import copy
 import inspect
 import logging
+import multiprocessing
 
 _MYPY = False
 if _MYPY:
@@ -45,13 +46,16 @@ from ..data_type import (
     UnionField,
     UserDefined,
     Void,
+    cache_fields,
     unwrap_aliases,
 )
 
+from .. import profiling
 from .exception import InvalidSpec
 from .parser import (
     StoneAlias,
     StoneImport,
+    StoneLocation,
     StoneNamespace,
     StoneParser,
     StoneRouteDef,
@@ -73,6 +77,61 @@ doc_ref_re = re.compile(r':(?P<tag>[A-z]+):`(?P<val>.*?)`')
 doc_ref_val_re = re.compile(
     r'^(null|true|false|-?\d+(\.\d*)?(e-?\d+)?|"[^\\"]*")$')
 
+# The parser of a worker process of parse_specs_in_parallel(). It's created
+# on first use so that it's never sent between processes.
+_worker_parser = None  # type: typing.Optional[StoneParser]
+
+def _parse_spec_in_worker(spec):
+    """
+    Parses a single spec in a worker process.
+
+    Args:
+        spec (Tuple[str, str]): The path and text of the spec.
+
+    Returns:
+        Tuple[Optional[List[stone.lang.parser._Element]], List[Tuple[str, int, str]],
+            Optional[Exception]]: The parser output, the parser errors, and the
+            exception raised by the parser, if any.
+    """
+    global _worker_parser  # pylint: disable=global-statement
+    if _worker_parser is None:
+        _worker_parser = StoneParser()
+    path, text = spec
+    try:
+        res = _worker_parser.parse(text, path)
+    except Exception as e:  # pylint: disable=broad-except
+        # The parser may be left in an inconsistent state.
+        _worker_parser = None
+        return None, [], e
+    errors = _worker_parser.get_errors()
+    # Errors accumulate across calls to parse(), but each spec must be
+    # reported on its own.
+    del _worker_parser.errors[:]
+    del _worker_parser.lexer.errors[:]
+    return res, errors, None
+
+def parse_specs_in_parallel(specs, jobs):
+    """
+    Parses specs in a pool of worker processes.
+
+    Args:
+        specs (List[Tuple[str, str]]): The path and text of each spec.
+        jobs (int): The number of worker processes.
+
+    Returns:
+        List: The output of _parse_spec_in_worker() for each spec, in the
+            same order as specs.
+    """
+    pool = multiprocessing.Pool(jobs)
+    try:
+        # Larger chunks mean fewer round trips to the workers, but a worse
+        # balance of work between them.
+        chunksize = max(1, len(specs) // (jobs * 4))
+        return pool.map(_parse_spec_in_worker, specs, chunksize)
+    finally:
+        pool.terminate()
+        pool.join()
+
 class Environment(dict):
     # The default environment won't have a name set since it applies to all
     # namespaces. But, every time it's copied to represent the environment
@@ -100,17 +159,31 @@ class TowerOfStone(object):
         **{data_type.__name__: data_type for data_type in data_types})
 
     # FIXME: Version should not have a default.
-    def __init__(self, specs, version='0.1b1', debug=False):
+    def __init__(self, specs, version='0.1b1', debug=False, jobs=1, cache=None,
+                 compact=False):
         """Creates a new tower of stone.
 
         :type specs: List[Tuple[path: str, text: str]]
         :param specs: `path` is never accessed and is only used to report the
             location of a bad spec to the user. `spec` is the text contents of
             a spec (.stone) file.
+        :param int jobs: The number of processes to parse specs with. Specs
+            are parsed in the current process if this is 1 or if debug is set.
+        :param cache: A cache of parser output with get(path, text) and
+            put(path, text, output) methods, such as
+            :class:`stone.lang.cache.DiskAstCache`.
+        :param bool compact: Once parsing is done, release the parser output
+            that data types, fields, aliases, routes, and examples keep, other
+            than their locations. This makes the API much smaller, such as for
+            sending it to other processes, but its parser output can't be
+            inspected.
         """
 
         self._specs = specs
         self._debug = debug
+        self._jobs = jobs
+        self._cache = cache
+        self._compact = compact
         self._logger = logging.getLogger('stone.idl')
 
         self.api = Api(version=version)
@@ -123,40 +196,131 @@ class TowerOfStone(object):
 
         self._item_by_canonical_name = {}
 
+        # Map of namespace name (str) -> paths of the specs that declare it
+        self.spec_paths_by_namespace = {}  # type: typing.Dict[str, typing.List[str]]
+
     def parse(self):
         """Parses the text of each spec and returns an API description. Returns
         None if an error was encountered during parsing."""
         raw_api = []
-        for path, text in self._specs:
-            self._logger.info('Parsing spec %s', path)
-            res = self.parse_spec(text, path)
-            if self.parser.got_errors_parsing():
-                # TODO(kelkabany): Show more than one error at a time.
-                msg, lineno, path = self.parser.get_errors()[0]
-                raise InvalidSpec(msg, lineno, path)
-            elif res:
-                namespace_token = self._extract_namespace_token(res)
-                namespace = self.api.ensure_namespace(namespace_token.name)
-                base_name = self._get_base_name(namespace.name, namespace.name)
-                self._item_by_canonical_name[base_name] = namespace_token
-                if namespace_token.doc is not None:
-                    namespace.add_doc(namespace_token.doc)
-                raw_api.append((namespace, res))
-                self._add_data_types_and_routes_to_api(namespace, res)
-            else:
-                self._logger.info('Empty spec: %s', path)
+        with profiling.phase('parse specs'):
+            for path, res, errors in self._parse_specs():
+                if errors:
+                    # TODO(kelkabany): Show more than one error at a time.
+                    msg, lineno, path = errors[0]
+                    raise InvalidSpec(msg, lineno, path)
+                elif res:
+                    namespace_token = self._extract_namespace_token(res)
+                    namespace = self.api.ensure_namespace(namespace_token.name)
+                    self.spec_paths_by_namespace.setdefault(namespace.name, []).append(path)
+                    base_name = self._get_base_name(namespace.name, namespace.name)
+                    self._item_by_canonical_name[base_name] = namespace_token
+                    if namespace_token.doc is not None:
+                        namespace.add_doc(namespace_token.doc)
+                    raw_api.append((namespace, res))
+                    self._add_data_types_and_routes_to_api(namespace, res)
+                else:
+                    self._logger.info('Empty spec: %s', path)
+
+        with profiling.phase('add imports'):
+            self._add_imports_to_env(raw_api)
+        with profiling.phase('populate type attributes'):
+            self._populate_type_attributes()
+        with profiling.phase('populate field defaults'):
+            self._populate_field_defaults()
+        # The fields of every type are final, so the lists of them can be
+        # cached for the checks that follow, and for generators.
+        cache_fields(data_type for namespace in self.api.namespaces.values()
+                     for data_type in namespace.data_types)
+        with profiling.phase('populate enumerated subtypes'):
+            self._populate_enumerated_subtypes()
+        with profiling.phase('populate route attributes'):
+            self._populate_route_attributes()
+        with profiling.phase('populate examples'):
+            self._populate_examples()
+        with profiling.phase('validate doc refs'):
+            self._validate_doc_refs()
+
+        with profiling.phase('normalize'):
+            self.api.normalize()
+
+        if self._compact:
+            with profiling.phase('release parser output'):
+                self._release_parser_output()
 
-        self._add_imports_to_env(raw_api)
-        self._populate_type_attributes()
-        self._populate_field_defaults()
-        self._populate_enumerated_subtypes()
-        self._populate_route_attributes()
-        self._populate_examples()
-        self._validate_doc_refs()
+        return self.api
 
-        self.api.normalize()
+    def _release_parser_output(self):
+        """Replaces the parser output kept by the API with the locations of
+        its elements, which is all that's needed to report errors once the API
+        is resolved."""
+        def location(token):
+            if token is None:
+                return None
+            return StoneLocation(token.path, token.lineno)
 
-        return self.api
+        data_types = []
+        for namespace in self.api.namespaces.values():
+            data_types.extend(namespace.data_types)
+            for alias in namespace.aliases:
+                alias._token = location(alias._token)
+            for route in namespace.routes:
+                route._token = location(route._token)
+        if self.api.route_schema is not None:
+            data_types.append(self.api.route_schema)
+        for data_type in data_types:
+            data_type._token = location(data_type._token)
+            for field in data_type.fields:
+                field._token = location(field._token)
+            for label, raw_example in data_type._raw_examples.items():
+                data_type._raw_examples[label] = location(raw_example)
+            for example in data_type._examples.values():
+                example._token = location(example._token)
+
+        # The tower itself is no longer needed either.
+        self._env_by_namespace = {}
+        self._item_by_canonical_name = {}
+
+    def _parse_specs(self):
+        """Yields the path, parser output, and parser errors of each spec, in
+        the order the specs were given.
+
+        Specs are parsed lazily in the current process, so parsing stops at
+        the first spec that the caller rejects. In parallel, every spec is
+        parsed up front, but the results are yielded in the same order so that
+        the first error reported is the same.
+
+        If there's a cache, specs found in it aren't parsed, and the output of
+        specs that parsed without errors is added to it."""
+        if self._cache is not None:
+            cached = [self._cache.get(path, text) for path, text in self._specs]
+        else:
+            cached = [None] * len(self._specs)
+        misses = [spec for spec, res in zip(self._specs, cached) if res is None]
+
+        if self._jobs > 1 and len(misses) > 1 and not self._debug:
+            self._logger.info('Parsing %d specs with %d processes',
+                              len(misses), self._jobs)
+            results = iter(parse_specs_in_parallel(misses, self._jobs))
+        else:
+            results = None
+
+        for (path, text), res in zip(self._specs, cached):
+            if res is not None:
+                self._logger.info('Loaded spec %s from cache', path)
+                yield path, res, []
+                continue
+            if results is not None:
+                res, errors, exc = next(results)
+                if exc is not None:
+                    raise exc
+            else:
+                self._logger.info('Parsing spec %s', path)
+                res = self.parse_spec(text, path)
+                errors = self.parser.get_errors()
+            if self._cache is not None and not errors:
+                self._cache.put(path, text, res)
+            yield path, res, errors
 
     def parse_spec(self, spec, path=None):
         """Parses a single Stone file."""
@@ -226,7 +390,7 @@ class TowerOfStone(object):
     def _check_canonical_name_available(self, item, namespace_name):
         base_name = self._get_base_name(item.name, namespace_name)
 
-        if base_name not in self._item_by_canonical_name.keys():
+        if base_name not in self._item_by_canonical_name:
             self._item_by_canonical_name[base_name] = item
         else:
             stored_item = self._item_by_canonical_name[base_name]
@@ -933,16 +1097,14 @@ class TowerOfStone(object):
                             'Bad doc reference to field %s of route %s.' %
                             (quote(field_name), quote(type_name)),
                             *loc)
-                    elif not any(field.name == field_name
-                                 for field in env[type_name].all_fields):
+                    elif field_name not in env[type_name].field_by_name:
                         raise InvalidSpec(
                             'Bad doc reference to unknown field %s.' % quote(val),
                             *loc)
                 else:
                     # Referring to a field that's a member of this type
                     assert type_context is not None
-                    if not any(field.name == val
-                               for field in type_context.all_fields):
+                    if val not in type_context.field_by_name:
                         raise InvalidSpec(
                             'Bad doc reference to unknown field %s.' %
                             quote(val),
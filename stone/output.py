@@ -0,0 +1,250 @@
+"""
+Writing generated files, so that files whose contents didn't change are left
+alone, and keeping track of which files each generator wrote.
+
+Tools that build the generated code, such as compilers and bytecode caches,
+use modification times to decide what to rebuild, so rewriting identical
+files makes them rebuild everything.
+
+With ``--manifest``, a manifest in the output folder records the files that
+each generator wrote on the last build, with a SHA-256 digest of each. Files
+that a generator no longer writes are reported as stale, so that they can be
+deleted.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+
+import six
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+_logger = logging.getLogger('stone.output')
+
+MANIFEST_FILENAME = '.stone-manifest.json'
+
+# Increment this whenever the contents of the manifest change, so that
+# manifests written by other versions are ignored.
+MANIFEST_FORMAT_VERSION = 1
+
+
+def write_if_changed(path, data):
+    # type: (typing.Text, bytes) -> bool
+    """
+    Writes data to a file unless the file already holds exactly that data.
+
+    Returns:
+        bool: Whether the file was written.
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except (IOError, OSError):
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+class StreamedOutputFile(object):
+    """
+    A file that's written in pieces to a temporary file in the same folder,
+    which replaces it unless it already has the same contents, so that large
+    files don't have to be held in memory.
+    """
+
+    def __init__(self, path):
+        # type: (typing.Text) -> None
+        self.path = path
+        fd, self.tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+        self._file = io.open(fd, 'wb')
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        # type: (bytes) -> None
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def digest(self):
+        # type: () -> typing.Text
+        """Returns the SHA-256 digest of the data written so far."""
+        return self._hash.hexdigest()
+
+    def commit(self):
+        # type: () -> bool
+        """
+        Replaces the file with the data written, unless the file already
+        holds exactly that data.
+
+        Returns:
+            bool: Whether the file was written.
+        """
+        self._file.close()
+        if _same_contents(self.path, self.tmp_path):
+            os.remove(self.tmp_path)
+            return False
+        _chmod_like(self.tmp_path, self.path)
+        _replace(self.tmp_path, self.path)
+        return True
+
+    def discard(self):
+        # type: () -> None
+        """Removes the temporary file, if it wasn't committed."""
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def atomic_write(path, data):
+    # type: (typing.Text, bytes) -> None
+    """
+    Replaces the contents of a file, so that readers see either the old
+    contents or all of the new ones, by writing them to a temporary file in
+    the same folder and renaming it over the file. The file keeps its
+    permissions, or gets those it would have if written with open().
+
+    Raises:
+        IOError, OSError: The file couldn't be written.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        _chmod_like(tmp_path, path)
+        _replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _replace(src, dst):
+    # type: (typing.Text, typing.Text) -> None
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)  # pylint: disable=no-member,useless-suppression
+    else:
+        # On Python 2, rename() only replaces existing files on POSIX.
+        os.rename(src, dst)
+
+
+def _chmod_like(tmp_path, path):
+    # type: (typing.Text, typing.Text) -> None
+    """
+    Gives a temporary file the permissions of the file that it will replace,
+    or that it would have if written with open(), since mkstemp() creates
+    files that only the owner can access.
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(tmp_path, mode)
+
+
+def _same_contents(path1, path2):
+    # type: (typing.Text, typing.Text) -> bool
+    try:
+        if os.path.getsize(path1) != os.path.getsize(path2):
+            return False
+        with open(path1, 'rb') as f1, open(path2, 'rb') as f2:
+            while True:
+                chunk = f1.read(1 << 16)
+                if chunk != f2.read(1 << 16):
+                    return False
+                if not chunk:
+                    return True
+    except (IOError, OSError):
+        return False
+
+
+class OutputManifest(object):
+    """
+    The files that each generator wrote to an output folder, by generator
+    class name. Each generator has a map of the relative paths of the files
+    it wrote to their digests, and a list of the stale files that it wrote on
+    an earlier build but not since.
+    """
+
+    def __init__(self, output):
+        # type: (typing.Text) -> None
+        self.output = output
+        self.path = os.path.join(output, MANIFEST_FILENAME)
+        self.generators = {}  # type: typing.Dict[typing.Text, typing.Dict[typing.Text, typing.Any]]
+
+    @classmethod
+    def load(cls, output):
+        """
+        Returns the manifest of an output folder, which is empty if there's
+        no usable manifest.
+        """
+        manifest = cls(output)
+        try:
+            with io.open(manifest.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except IOError:
+            return manifest
+        except ValueError as e:
+            _logger.warning('Ignoring invalid manifest %s: %s', manifest.path, e)
+            return manifest
+        if isinstance(data, dict) and data.get('version') == MANIFEST_FORMAT_VERSION:
+            manifest.generators = data['generators']
+        return manifest
+
+    def update(self, generator_name, files, complete=True):
+        """
+        Records the files that a generator wrote.
+
+        Args:
+            generator_name (str): The name of the generator class.
+            files (Dict[str, str]): The digest of each file written, by path
+                relative to the output folder, with "/" as the separator.
+            complete (bool): Whether the generator wrote all of its files.
+                If not, such as when only some namespaces were regenerated,
+                the files that it didn't write are kept, and none are stale.
+
+        Returns:
+            List[str]: The stale files, which the generator wrote on an
+            earlier build but not on this one, and which still exist.
+        """
+        previous = self.generators.get(generator_name, {})
+        previous_files = previous.get('files', {})
+        if complete:
+            entries = dict(files)
+            candidates = set(previous_files) | set(previous.get('stale', []))
+            stale = sorted(
+                path for path in candidates
+                if path not in files and os.path.exists(os.path.join(self.output, path)))
+        else:
+            entries = dict(previous_files)
+            entries.update(files)
+            stale = [path for path in previous.get('stale', []) if path not in files]
+        self.generators[generator_name] = {'files': entries, 'stale': stale}
+        return stale
+
+    def save(self):
+        """
+        Saves the manifest. Failures are logged and otherwise ignored, since
+        the manifest is only used to report stale files.
+        """
+        data = json.dumps({'version': MANIFEST_FORMAT_VERSION, 'generators': self.generators},
+                          indent=1, separators=(',', ': '), sort_keys=True)
+        try:
+            atomic_write(self.path, six.text_type(data).encode('utf-8'))
+        except (IOError, OSError) as e:
+            _logger.warning('Could not save manifest to %s: %s', self.path, e)
@@ -0,0 +1,212 @@
+"""
+Timing of the phases of a build, such as parsing specs and running each
+generator, and of each file that generators write, for ``stone --profile``.
+
+Code marks phases with :func:`phase` and files with :func:`record_file`,
+which do nothing unless a :class:`Profile` was activated with
+:func:`activate`. Worker processes that are forked while a profile is active
+record into their own copy of it, so they send back what they recorded, as
+returned by :func:`records_since`, to be merged with :func:`merge_records`.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import cProfile
+from contextlib import contextmanager
+import io
+import json
+import marshal
+import pstats
+import time
+
+import six
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Increment this whenever the contents of the JSON report change.
+PROFILE_FORMAT_VERSION = 1
+
+# The profile that phases and files are recorded in, if any.
+_active = None  # type: typing.Optional[Profile]
+
+
+class Profile(object):
+    """
+    The phases of a build, in the order they ran, and the files written.
+
+    If cprofile is set, each phase also runs under :mod:`cProfile`, which
+    makes it slower, so that the statistics of the slowest phase can be
+    written with :meth:`dump_slowest_phase`.
+    """
+
+    def __init__(self, cprofile=False):
+        # type: (bool) -> None
+        self.cprofile = cprofile
+        self.start = time.time()
+        self.end = None  # type: typing.Optional[float]
+        # Each phase has a name and a number of seconds.
+        self.phases = []  # type: typing.List[typing.Dict[typing.Text, typing.Any]]
+        # The cProfile statistics of each phase, by index in phases.
+        self.phase_stats = {}  # type: typing.Dict[int, typing.Any]
+        # Each file has the generator that wrote it, a path, the number of
+        # seconds spent generating and writing it, and its size in bytes and
+        # lines.
+        self.files = []  # type: typing.List[typing.Dict[typing.Text, typing.Any]]
+        self._cprofiling = False
+
+    @property
+    def total_seconds(self):
+        # type: () -> float
+        return (self.end or time.time()) - self.start
+
+    def to_json(self):
+        # type: () -> typing.Dict[typing.Text, typing.Any]
+        """Returns the profile as an object that can be serialized as JSON."""
+        return {
+            'version': PROFILE_FORMAT_VERSION,
+            'total_seconds': self.total_seconds,
+            'phases': self.phases,
+            'files': self.files,
+        }
+
+    def write_json(self, path):
+        # type: (typing.Text) -> None
+        data = json.dumps(self.to_json(), indent=1, separators=(',', ': '), sort_keys=True)
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(six.text_type(data) + '\n')
+
+    def format_report(self, max_files=10):
+        # type: (int) -> typing.Text
+        """
+        Returns a table of the time spent in each phase, and the files that
+        took longest to generate.
+        """
+        width = max([len(p['name']) for p in self.phases] + [len('Total')])
+        lines = ['%-*s  %8s' % (width, 'Phase', 'Seconds')]
+        for p in self.phases:
+            lines.append('%-*s  %8.3f' % (width, p['name'], p['seconds']))
+        lines.append('%-*s  %8.3f' % (width, 'Total', self.total_seconds))
+        if self.files:
+            lines.append('')
+            lines.append('%8s  %10s  %8s  %s' % ('Seconds', 'Bytes', 'Lines', 'File'))
+            slowest = sorted(self.files, key=lambda f: -f['seconds'])[:max_files]
+            for f in slowest:
+                lines.append('%8.3f  %10d  %8d  %s' % (
+                    f['seconds'], f['bytes'], f['lines'], f['path']))
+            if len(self.files) > max_files:
+                lines.append('(%d of %d files)' % (max_files, len(self.files)))
+        return '\n'.join(lines) + '\n'
+
+    def dump_slowest_phase(self, path):
+        # type: (typing.Text) -> typing.Optional[typing.Text]
+        """
+        Writes the cProfile statistics of the slowest phase that has them to
+        a file that :class:`pstats.Stats` can read.
+
+        Returns:
+            Optional[str]: The name of the phase, or None if no phase has
+            statistics.
+        """
+        if not self.phase_stats:
+            return None
+        index = max(self.phase_stats, key=lambda i: self.phases[i]['seconds'])
+        with open(path, 'wb') as f:
+            marshal.dump(self.phase_stats[index], f)
+        return self.phases[index]['name']
+
+
+def activate(profile):
+    # type: (typing.Optional[Profile]) -> typing.Optional[Profile]
+    """
+    Makes phases and files be recorded in a profile, or not recorded if
+    None. Returns the profile that was active before.
+    """
+    global _active  # pylint: disable=global-statement
+    previous = _active
+    _active = profile
+    return previous
+
+
+def active():
+    # type: () -> typing.Optional[Profile]
+    """Returns the active profile, if any."""
+    return _active
+
+
+@contextmanager
+def phase(name):
+    # type: (typing.Text) -> typing.Iterator[None]
+    """
+    Records the time spent in the body of the context manager as a phase of
+    the active profile, if any. A phase that fails isn't recorded.
+    """
+    profile = _active
+    if profile is None:
+        yield
+        return
+    profiler = None
+    if profile.cprofile and not profile._cprofiling:
+        # Only one profiler can run at a time, so phases within phases
+        # are only timed.
+        profiler = cProfile.Profile()
+        profile._cprofiling = True
+        profiler.enable()
+    start = time.time()
+    try:
+        yield
+    finally:
+        seconds = time.time() - start
+        if profiler is not None:
+            profiler.disable()
+            profile._cprofiling = False
+    if profiler is not None:
+        profile.phase_stats[len(profile.phases)] = pstats.Stats(profiler).stats
+    profile.phases.append({'name': name, 'seconds': seconds})
+
+
+def record_file(generator, path, seconds, size, lines):
+    # type: (typing.Text, typing.Text, float, int, int) -> None
+    """Records a file written by a generator in the active profile, if any."""
+    if _active is not None:
+        _active.files.append({
+            'generator': generator,
+            'path': six.text_type(path),
+            'seconds': seconds,
+            'bytes': size,
+            'lines': lines,
+        })
+
+
+def mark():
+    # type: () -> typing.Tuple[int, int]
+    """Returns the current position in the active profile."""
+    if _active is None:
+        return 0, 0
+    return len(_active.phases), len(_active.files)
+
+
+def records_since(position):
+    # type: (typing.Tuple[int, int]) -> typing.Any
+    """
+    Returns what was recorded in the active profile since the position
+    returned by :func:`mark`, or None if there's no active profile.
+    """
+    if _active is None:
+        return None
+    phases, files = position
+    stats = {i - phases: s for i, s in _active.phase_stats.items() if i >= phases}
+    return _active.phases[phases:], stats, _active.files[files:]
+
+
+def merge_records(records):
+    # type: (typing.Any) -> None
+    """Adds records returned by :func:`records_since` to the active profile."""
+    if _active is None or records is None:
+        return
+    phases, stats, files = records
+    for i, s in stats.items():
+        _active.phase_stats[len(_active.phases) + i] = s
+    _active.phases.extend(phases)
+    _active.files.extend(files)
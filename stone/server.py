@@ -0,0 +1,288 @@
+"""
+A compile server, which runs builds for clients such as build systems in a
+single long-lived process, so that each build doesn't pay for starting
+Python and importing the modules that generators use, and unchanged specs
+aren't parsed again. Generator modules themselves are run again for each
+build, so that no state is carried over from one build to the next.
+
+Start it with ``stone serve --socket PATH``. Clients connect to the Unix
+socket, send a request, and receive a response, each a single line of JSON.
+A request holds the arguments of a ``stone`` command and the folder to run it
+in::
+
+    {"args": ["python_types", "out", "calc.stone"], "cwd": "/src/api"}
+
+The response holds the exit status, output, and diagnostics of the build::
+
+    {"status": 0, "stdout": "", "stderr": "", "seconds": 0.12}
+
+A request of ``{"shutdown": true}`` stops the server. Builds run one at a
+time. :func:`send_request` is a client, and ``python -m stone.server`` runs
+it from the command line.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import errno
+import json
+import logging
+import os
+import socket
+import sys
+import time
+import traceback
+
+import six
+
+from .cli import build, parse_args
+from .incremental import source_fingerprint
+from .lang.cache import DiskAstCache, MemoryAstCache, parser_fingerprint
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Hack to get around some of Python 2's standard library modules that
+# accept ascii-encodable unicode literals in lieu of strs, but where
+# actually passing such literals results in errors with mypy --py2. See
+# <https://github.com/python/typeshed/issues/756> and
+# <https://github.com/python/mypy/issues/2536>.
+import importlib
+argparse = importlib.import_module(str('argparse'))  # type: typing.Any
+
+_serve_parser = argparse.ArgumentParser(
+    prog='stone serve',
+    description=('Run builds for clients that connect to a Unix socket. See '
+                 'the stone.server module for the protocol.'))
+_serve_parser.add_argument(
+    '--socket',
+    required=True,
+    type=six.text_type,
+    help='The path of the Unix socket to listen on.',
+)
+_serve_parser.add_argument(
+    '--cache-dir',
+    type=six.text_type,
+    help=('A folder in which to cache parsed specs. By default, they are '
+          'cached in memory. Requests with --cache-dir use their own folder.'),
+)
+
+_client_parser = argparse.ArgumentParser(
+    prog='python -m stone.server',
+    usage='%(prog)s --socket SOCKET [stone arguments]',
+    description=('Run a build on a server started with "stone serve", and exit '
+                 'with its status. Any other arguments are those of the stone '
+                 'command to run.'))
+_client_parser.add_argument(
+    '--socket',
+    required=True,
+    type=six.text_type,
+    help='The path of the Unix socket the server listens on.',
+)
+
+
+class ServerError(Exception):
+    """Raised by a client when the server can't be reached or misbehaves."""
+
+
+def serve(socket_path, cache):
+    """
+    Serves requests on a Unix socket until a shutdown request is received.
+
+    Args:
+        socket_path (str): The path of the socket. A stale socket left by a
+            server that is no longer running is replaced.
+        cache: A cache of parser output shared by all builds, such as a
+            :class:`stone.lang.cache.MemoryAstCache`.
+    """
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=no-member
+    try:
+        _bind(listener, socket_path)
+        listener.listen(16)
+        print('Serving on %s.' % socket_path)
+        sys.stdout.flush()
+        while True:
+            conn, _ = listener.accept()
+            # Stays empty if the client goes away before it sends a request.
+            request = {}
+            try:
+                f = conn.makefile('rwb')
+                try:
+                    line = f.readline()
+                    try:
+                        request = json.loads(line.decode('utf-8'))
+                        if not isinstance(request, dict):
+                            raise ValueError('Expected an object.')
+                    except ValueError as e:
+                        response = {'status': 2, 'stdout': '',
+                                    'stderr': 'error: Invalid request: %s\n' % e}
+                        request = {}
+                    else:
+                        response = _handle_request(request, cache)
+                    f.write(json.dumps(response).encode('utf-8') + b'\n')
+                    f.flush()
+                finally:
+                    f.close()
+            except socket.error as e:
+                # The client went away.
+                logging.warning('Could not respond to request: %s', e)
+            finally:
+                conn.close()
+            if request.get('shutdown'):
+                break
+    finally:
+        listener.close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+
+
+def _bind(listener, socket_path):
+    try:
+        listener.bind(socket_path)
+    except socket.error as e:
+        if e.errno != errno.EADDRINUSE:
+            raise
+        # Replace the socket unless a server is still listening on it.
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=no-member
+        try:
+            probe.connect(socket_path)
+        except socket.error:
+            os.remove(socket_path)
+            listener.bind(socket_path)
+        else:
+            raise
+        finally:
+            probe.close()
+
+
+def _handle_request(request, cache):
+    """
+    Runs the build described by a request, and returns the response.
+    """
+    if request.get('shutdown'):
+        return {'status': 0, 'stdout': '', 'stderr': ''}
+    stdout, stderr = six.StringIO(), six.StringIO()
+    handler = logging.StreamHandler(stderr)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root_logger = logging.getLogger()
+    saved = (sys.stdout, sys.stderr, os.getcwd(), root_logger.level)
+    start = time.time()
+    sys.stdout, sys.stderr = stdout, stderr
+    root_logger.addHandler(handler)
+    try:
+        args = request.get('args')
+        if not isinstance(args, list):
+            print('error: Expected a list of arguments.', file=sys.stderr)
+            sys.exit(2)
+        if request.get('cwd'):
+            os.chdir(request['cwd'])
+        build_args, targets, logging_level, debug, jobs = parse_args(args)
+        root_logger.setLevel(logging_level)
+        if build_args.watch:
+            print('error: Do not use --watch with a server.', file=sys.stderr)
+            sys.exit(1)
+        if not build_args.from_ir and (not build_args.spec or '-' in build_args.spec):
+            print('error: Specify specification files, since a server has no '
+                  'stdin.', file=sys.stderr)
+            sys.exit(1)
+        if build_args.cache_dir:
+            build_cache = DiskAstCache(build_args.cache_dir)
+        else:
+            build_cache = cache
+        build(build_args, targets, debug, jobs, build_cache)
+        status = 0
+    except SystemExit as e:
+        if e.code is None:
+            status = 0
+        else:
+            status = e.code if isinstance(e.code, int) else 1
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc()
+        status = 1
+    finally:
+        root_logger.removeHandler(handler)
+        sys.stdout, sys.stderr = saved[0], saved[1]
+        os.chdir(saved[2])
+        root_logger.setLevel(saved[3])
+    return {
+        'status': status,
+        'stdout': _text(stdout.getvalue()),
+        'stderr': _text(stderr.getvalue()),
+        'seconds': time.time() - start,
+    }
+
+
+def _text(s):
+    if isinstance(s, bytes):
+        return s.decode('utf-8', 'replace')
+    return s
+
+
+def send_request(socket_path, request):
+    """
+    Sends a request to a server and returns its response.
+
+    Raises:
+        ServerError: The server couldn't be reached or didn't respond.
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=no-member
+    try:
+        try:
+            conn.connect(socket_path)
+            f = conn.makefile('rwb')
+            try:
+                f.write(json.dumps(request).encode('utf-8') + b'\n')
+                f.flush()
+                line = f.readline()
+            finally:
+                f.close()
+        except socket.error as e:
+            raise ServerError('Could not reach server at %s: %s' % (socket_path, e))
+        if not line:
+            raise ServerError('Server at %s closed the connection.' % socket_path)
+        return json.loads(line.decode('utf-8'))
+    finally:
+        conn.close()
+
+
+def serve_main(argv):
+    """The entry point for "stone serve"."""
+    args = _serve_parser.parse_args(argv)
+    if not hasattr(socket, 'AF_UNIX'):
+        print('error: Unix sockets are not supported on this platform.',
+              file=sys.stderr)
+        sys.exit(1)
+    # Builds run in the folder of each request, so modules imported later,
+    # such as generators, must not be found relative to the current folder,
+    # and the fingerprints of source files are taken now.
+    sys.path[:] = [os.path.abspath(path) for path in sys.path]
+    for module in list(sys.modules.values()):
+        package_path = getattr(module, '__path__', None)
+        if isinstance(package_path, list):
+            package_path[:] = [os.path.abspath(path) for path in package_path]
+    parser_fingerprint()
+    source_fingerprint()
+    cache = DiskAstCache(args.cache_dir) if args.cache_dir else MemoryAstCache()
+    try:
+        serve(args.socket, cache)
+    except KeyboardInterrupt:
+        pass
+
+
+def client_main():
+    """The entry point for "python -m stone.server"."""
+    args, stone_args = _client_parser.parse_known_args()
+    try:
+        response = send_request(args.socket, {'args': stone_args, 'cwd': os.getcwd()})
+    except ServerError as e:
+        print('error: %s' % e, file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    sys.exit(response['status'])
+
+
+if __name__ == '__main__':
+    client_main()
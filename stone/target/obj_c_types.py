@@ -1,8 +1,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import functools
 import json
 import os
-import shutil
 
 from stone.data_type import (
     is_list_type,
@@ -91,34 +91,25 @@ class ObjCTypesGenerator(ObjCBaseGenerator):
         routes in the Stone spec.
         """
         rsrc_folder = os.path.join(os.path.dirname(__file__), 'obj_c_rsrc')
-        rsrc_output_folder = os.path.join(self.target_folder_path, 'Resources')
-
-        if not os.path.exists(rsrc_output_folder):
-            os.makedirs(rsrc_output_folder)
 
         self.logger.info('Copying DBStoneValidators.{h,m} to output folder')
-        shutil.copy(
-            os.path.join(rsrc_folder, 'DBStoneValidators.h'),
-            rsrc_output_folder)
-        shutil.copy(
-            os.path.join(rsrc_folder, 'DBStoneValidators.m'),
-            rsrc_output_folder)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'DBStoneValidators.h'),
+                                   'Resources/DBStoneValidators.h')
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'DBStoneValidators.m'),
+                                   'Resources/DBStoneValidators.m')
         self.logger.info('Copying DBStoneSerializers.{h,m} to output folder')
-        shutil.copy(
-            os.path.join(rsrc_folder, 'DBStoneSerializers.h'),
-            rsrc_output_folder)
-        shutil.copy(
-            os.path.join(rsrc_folder, 'DBStoneSerializers.m'),
-            rsrc_output_folder)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'DBStoneSerializers.h'),
+                                   'Resources/DBStoneSerializers.h')
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'DBStoneSerializers.m'),
+                                   'Resources/DBStoneSerializers.m')
         self.logger.info('Copying DBStoneBase.{h,m} to output folder')
-        shutil.copy(
-            os.path.join(rsrc_folder, 'DBStoneBase.h'), rsrc_output_folder)
-        shutil.copy(
-            os.path.join(rsrc_folder, 'DBStoneBase.m'), rsrc_output_folder)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'DBStoneBase.h'),
+                                   'Resources/DBStoneBase.h')
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'DBStoneBase.m'),
+                                   'Resources/DBStoneBase.m')
         self.logger.info('Copying DBSerializableProtocol.h to output folder')
-        shutil.copy(
-            os.path.join(rsrc_folder, 'DBSerializableProtocol.h'),
-            rsrc_output_folder)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'DBSerializableProtocol.h'),
+                                   'Resources/DBSerializableProtocol.h')
 
         jazzy_cfg = ''
         if self.args.documentation:
@@ -161,24 +152,13 @@ class ObjCTypesGenerator(ObjCBaseGenerator):
                 self.obj_name_to_namespace[data_type.name] = fmt_class_prefix(
                     data_type)
 
-        for namespace in api.namespaces.values():
-            ns_name = fmt_public_name(namespace.name)
-            self._generate_namespace_types(namespace, jazzy_cfg)
-
-            if namespace.routes:
-                if self.args.documentation:
-                    for auth_type in self.namespace_to_has_route_auth_list[
-                            namespace]:
-                        jazzy_cfg['custom_categories'][self.jazzy_category_map[
-                            'Routes']]['children'].append(
-                                fmt_routes_class(ns_name, auth_type))
-                    jazzy_cfg['custom_categories'][self.jazzy_category_map[
-                        'RouteObjects']]['children'].append(
-                            fmt_route_obj_class(ns_name))
-                self._generate_route_objects_m(api.route_schema, namespace)
-                self._generate_route_objects_h(api.route_schema, namespace)
+        self.run_work_units([
+            functools.partial(self._generate_namespace_files, api, namespace)
+            for namespace in api.namespaces.values()])
 
         if self.args.documentation:
+            for namespace in api.namespaces.values():
+                self._add_namespace_jazzy_children(namespace, jazzy_cfg)
             with self.output_to_relative_path('../../../../.jazzy.json'):
                 self.emit_raw(json.dumps(jazzy_cfg, indent=2) + '\n')
 
@@ -210,7 +190,34 @@ class ObjCTypesGenerator(ObjCBaseGenerator):
 
             self._generate_imports_m(namespace_imports)
 
-    def _generate_namespace_types(self, namespace, jazzy_cfg):
+    def _generate_namespace_files(self, api, namespace):
+        self._generate_namespace_types(namespace)
+        if namespace.routes:
+            self._generate_route_objects_m(api.route_schema, namespace)
+            self._generate_route_objects_h(api.route_schema, namespace)
+
+    def _add_namespace_jazzy_children(self, namespace, jazzy_cfg):
+        """Adds the classes of the given namespace to the categories of the
+        jazzy documentation."""
+        ns_name = fmt_public_name(namespace.name)
+        categories = jazzy_cfg['custom_categories']
+        for data_type in namespace.linearize_data_types():
+            class_name = fmt_class_prefix(data_type)
+            categories[self.jazzy_category_map[ns_name]]['children'].append(class_name)
+            categories[self.jazzy_category_map['Serializers']]['children'].append(
+                '{}Serializer'.format(class_name))
+            if is_union_type(data_type):
+                categories[self.jazzy_category_map['Tags']]['children'].append(
+                    '{}Tag'.format(class_name))
+
+        if namespace.routes:
+            for auth_type in self.namespace_to_has_route_auth_list[namespace]:
+                categories[self.jazzy_category_map['Routes']]['children'].append(
+                    fmt_routes_class(ns_name, auth_type))
+            categories[self.jazzy_category_map['RouteObjects']]['children'].append(
+                fmt_route_obj_class(ns_name))
+
+    def _generate_namespace_types(self, namespace):
         """Creates Obj C argument, error, serializer and deserializer types
         for the given namespace."""
         ns_name = fmt_public_name(namespace.name)
@@ -220,13 +227,6 @@ class ObjCTypesGenerator(ObjCBaseGenerator):
         for data_type in namespace.linearize_data_types():
             class_name = fmt_class_prefix(data_type)
 
-            if self.args.documentation:
-                jazzy_cfg['custom_categories'][self.jazzy_category_map[
-                    ns_name]]['children'].append(class_name)
-                jazzy_cfg['custom_categories'][
-                    self.jazzy_category_map['Serializers']]['children'].append(
-                        '{}Serializer'.format(class_name))
-
             if is_struct_type(data_type):
                 # struct header
                 file_path = os.path.join(output_path_headers,
@@ -235,11 +235,6 @@ class ObjCTypesGenerator(ObjCBaseGenerator):
                     self.emit_raw(base_file_comment)
                     self._generate_struct_class_h(data_type)
             elif is_union_type(data_type):
-
-                if self.args.documentation:
-                    jazzy_cfg['custom_categories'][
-                        self.jazzy_category_map['Tags']]['children'].append(
-                            '{}Tag'.format(fmt_class_prefix(data_type)))
                 # union header
                 file_path = os.path.join(output_path_headers,
                                          class_name + '.h')
@@ -1,5 +1,6 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
 import re
 
 from stone.data_type import (
@@ -56,9 +57,9 @@ _cmdline_parser = argparse.ArgumentParser(
     prog='python-client-generator',
     description=(
         'Generates a Python class with a method for each route. Extend the '
-        'generated class and implement the abstract request() method. This '
-        'class assumes that the python_types generator was used with the same '
-        'output directory.'),
+        'generated class and implement the abstract request() method, or mix '
+        'in stone_transport.HttpTransport. This class assumes that the '
+        'python_types generator was used with the same output directory.'),
 )
 _cmdline_parser.add_argument(
     '-m',
@@ -94,7 +95,21 @@ class PythonClientGenerator(CodeGenerator):
 
         The module will contain a base class that will have a method for
         each route across all namespaces.
+
+        stone_transport.py, which implements the abstract request() method
+        over HTTP, is copied into the output folder.
         """
+        rsrc_folder = os.path.join(os.path.dirname(__file__), 'python_rsrc')
+        self.logger.info('Copying stone_transport.py to output folder')
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'stone_transport.py'),
+                                   'stone_transport.py')
+        self.logger.info('Copying stone_cache.py to output folder')
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'stone_cache.py'),
+                                   'stone_cache.py')
+        has_cacheable_routes = any(
+            self._is_cacheable(route)
+            for namespace in api.namespaces.values()
+            for route in namespace.routes)
         with self.output_to_relative_path('%s.py' % self.args.module_name):
             self.emit_raw(base)
             # Import "warnings" if any of the routes are deprecated.
@@ -109,6 +124,8 @@ class PythonClientGenerator(CodeGenerator):
                     break
             self.emit()
             self._generate_imports(api.namespaces.values())
+            if has_cacheable_routes:
+                self.emit('from . import stone_cache')
             self.emit()
             self.emit()  # PEP-8 expects two-blank lines before class def
             self.emit('class %s(object):' % self.args.class_name)
@@ -121,8 +138,46 @@ class PythonClientGenerator(CodeGenerator):
                 with self.indent():
                     self.emit('pass')
                 self.emit()
+                if has_cacheable_routes:
+                    self._generate_route_cache_property()
                 self._generate_route_methods(api.namespaces.values())
 
+    def _generate_route_cache_property(self):
+        """Generates a lazily created, per-instance cache for the results of
+        routes with the cacheable attribute."""
+        self.emit('# Maximum number of results kept for cacheable routes.')
+        self.emit('route_cache_maxsize = 1024')
+        self.emit()
+        self.emit('@property')
+        self.emit('def route_cache(self):')
+        with self.indent():
+            self.emit('"""')
+            self.emit_wrapped_text(
+                'The :class:`stone_cache.RouteCache` of routes with the '
+                'cacheable attribute. Use it to invalidate results or to read '
+                'hit and miss counts.')
+            self.emit('"""')
+            self.emit("cache = self.__dict__.get('_route_cache')")
+            self.emit('if cache is None:')
+            with self.indent():
+                self.emit('# setdefault() is atomic, so concurrent first calls '
+                          'share a cache.')
+                self.emit('cache = self.__dict__.setdefault(')
+                with self.indent():
+                    self.emit("'_route_cache', "
+                              "stone_cache.RouteCache(self.route_cache_maxsize))")
+            self.emit('return cache')
+        self.emit()
+
+    def _is_cacheable(self, route):
+        """Whether the results of a route should be cached. This is set with
+        the cacheable route attribute, which only applies to rpc-style routes."""
+        if not route.attrs.get('cacheable'):
+            return False
+        assert route.attrs.get('style') not in ('upload', 'download'), \
+            'Route %s: only rpc-style routes can be cacheable.' % route.name
+        return True
+
     def _generate_imports(self, namespaces):
         # Only import namespaces that have user-defined types defined.
         ns_names_to_import = [ns.name for ns in namespaces if ns.data_types]
@@ -239,7 +294,17 @@ class PythonClientGenerator(CodeGenerator):
                 args.append('f')
             else:
                 args.append('None')
-            self.generate_multiline_list(args, 'r = self.request', compact=False)
+            if self._is_cacheable(route):
+                ttl = route.attrs.get('cache_ttl')
+                self.generate_multiline_list(
+                    ['{}.{}'.format(namespace.name, fmt_var(route.name)),
+                     'arg',
+                     'None' if ttl is None else repr(ttl),
+                     'lambda: self.request({})'.format(', '.join(args))],
+                    'r = self.route_cache.call',
+                    compact=False)
+            else:
+                self.generate_multiline_list(args, 'r = self.request', compact=False)
 
             if download_to_file:
                 self.emit('self._save_body_to_file(download_path, r[1])')
@@ -0,0 +1,91 @@
+"""
+An ASGI application for the dispatchers of stone_server.py.
+
+This module uses ``async`` syntax, so it requires Python 3.5 or later. The
+python_server generator only copies it into the output folder when it runs
+on Python 3, and :attr:`stone_server.Dispatcher.asgi_app` imports it when
+it's first used.
+
+This module should be dropped into a project that requires the use of Stone. In
+the future, this could be imported from a pre-installed Python package, rather
+than being added to a project.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+try:
+    from . import stone_server as bs
+except (ImportError, SystemError, ValueError):
+    # Catch errors raised when importing a relative module when not in a package.
+    # This makes testing this file directly (outside of a package) easier.
+    import stone_server as bs  # type: ignore
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+
+def make_asgi_app(dispatcher):
+    # type: (bs.Dispatcher) -> typing.Callable[..., typing.Any]
+    """
+    Returns an ASGI 3 application that serves the routes of a dispatcher.
+
+    The application is a coroutine function, which is how servers such as
+    uvicorn and hypercorn tell it apart from an ASGI 2 application. It
+    completes the startup and shutdown of the lifespan protocol, and responds
+    with the 500 status code when a handler raises an exception other than
+    :class:`stone_server.RouteError`, which it then raises again for the
+    server to log.
+    """
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            raise ValueError('Unsupported ASGI scope type %r.' % scope['type'])
+
+        error = None
+        if scope['method'] != 'POST':
+            response = bs._text_response(405, 'Only POST is supported.')
+        else:
+            chunks = []
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                chunks.append(message.get('body', b''))
+                more_body = message.get('more_body', False)
+            headers = {}
+            for name, value in scope.get('headers', []):
+                name = name.decode('latin-1').lower()
+                if name == bs._ARG_HEADER_LOWER:
+                    headers[name] = value.decode('latin-1')
+            try:
+                response = dispatcher.dispatch(scope['path'], b''.join(chunks), headers)
+            except Exception as e:  # pylint: disable=broad-except
+                error = e
+                response = bs._text_response(500, 'Internal server error.')
+
+        headers = [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                   for k, v in response.headers]
+        headers.append((b'content-length', str(len(response.body)).encode('ascii')))
+        await send({
+            'type': 'http.response.start',
+            'status': response.status,
+            'headers': headers,
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': response.body,
+        })
+        if error is not None:
+            raise error
+
+    return app
@@ -0,0 +1,189 @@
+"""
+A client-side cache for the results of routes.
+
+The python_client generator wraps the methods of routes that have a true
+``cacheable`` attribute in :meth:`RouteCache.call`. The optional
+``cache_ttl`` attribute sets the number of seconds that a result stays
+fresh. Only successful results are cached; errors are never cached.
+
+Cached results are shared between callers, so they must not be mutated.
+
+This module should be dropped into a project that requires the use of Stone. In
+the future, this could be imported from a pre-installed Python package, rather
+than being added to a project.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import collections
+import json
+import threading
+import time
+
+try:
+    from . import stone_serializers as ss
+except (SystemError, ValueError):
+    # Catch errors raised when importing a relative module when not in a package.
+    # This makes testing this file directly (outside of a package) easier.
+    import stone_serializers as ss  # type: ignore
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+DEFAULT_MAXSIZE = 1024
+
+
+class _InFlight(object):
+    """
+    A call that is being made on behalf of every caller with the same key.
+    """
+
+    __slots__ = [
+        'done',
+        'finished',
+        'result',
+        'exception',
+        'invalidated',
+    ]
+
+    def __init__(self):
+        self.done = threading.Event()
+        # Whether the call returned or raised an Exception, rather than being
+        # interrupted, for example by KeyboardInterrupt.
+        self.finished = False
+        self.result = None
+        self.exception = None  # type: typing.Optional[Exception]
+        # Set by invalidate() so that the result, which may be stale, isn't
+        # cached.
+        self.invalidated = False
+
+
+class RouteCache(object):
+    """
+    A thread-safe LRU cache of route results with optional expiry.
+
+    Entries are keyed by the route and a canonical encoding of its argument,
+    so two arguments that serialize to the same JSON share an entry. When
+    several threads call a route with the same argument at once, only one of
+    them makes the request and the others wait for its result.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, clock=time.time):
+        # type: (int, typing.Callable[[], float]) -> None
+        """
+        Args:
+            maxsize (int): Maximum number of results to keep. The least
+                recently used result is evicted first.
+            clock (Callable[[], float]): Returns the current time in seconds.
+        """
+        assert maxsize > 0, 'maxsize must be positive.'
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # Number of calls that waited on an identical call already in flight.
+        self.coalesced = 0
+        self._clock = clock
+        # Maps key -> (expiry time or None, result), least recently used first.
+        self._entries = collections.OrderedDict()  # type: typing.Dict[typing.Any, typing.Any]
+        self._in_flight = {}  # type: typing.Dict[typing.Any, _InFlight]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def call(self, route, arg, ttl, func):
+        """
+        Returns the cached result for the route and argument, or calls
+        ``func`` and caches what it returns.
+
+        Args:
+            route (stone_base.Route): The route being called.
+            arg: The argument of the route.
+            ttl (Optional[float]): Seconds until the result expires. If None,
+                the result is only evicted to make room for others.
+            func (Callable[[], Any]): Makes the request.
+        """
+        key = self._key(route, arg)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, result = entry
+                if expires is None or expires > self._clock():
+                    # OrderedDict has no move_to_end() on Python 2.
+                    del self._entries[key]
+                    self._entries[key] = entry
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                in_flight = self._in_flight[key] = _InFlight()
+                self.misses += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            in_flight.done.wait()
+            if not in_flight.finished:
+                # The call was interrupted in the thread that made it, so
+                # make it again.
+                return self.call(route, arg, ttl, func)
+            if in_flight.exception is not None:
+                raise in_flight.exception
+            return in_flight.result
+
+        try:
+            result = func()
+        except Exception as e:
+            in_flight.exception = e
+            in_flight.finished = True
+            raise
+        else:
+            in_flight.result = result
+            in_flight.finished = True
+            with self._lock:
+                if not in_flight.invalidated:
+                    expires = None if ttl is None else self._clock() + ttl
+                    self._entries[key] = (expires, result)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+
+    def invalidate(self, route=None, arg=None):
+        """
+        Removes cached results.
+
+        With no arguments, everything is removed. With only a route, all
+        results of that route are removed. With both, only the result for
+        that argument is removed.
+        """
+        with self._lock:
+            if route is None:
+                self._entries.clear()
+                in_flight = list(self._in_flight.values())
+            elif arg is None:
+                for key in [k for k in self._entries if k[0] is route]:
+                    del self._entries[key]
+                in_flight = [v for k, v in self._in_flight.items() if k[0] is route]
+            else:
+                key = self._key(route, arg)
+                self._entries.pop(key, None)
+                in_flight = [self._in_flight[key]] if key in self._in_flight else []
+            # Calls in flight must not cache their possibly stale results.
+            for call in in_flight:
+                call.invalidated = True
+
+    def _key(self, route, arg):
+        # Structs and unions are encoded as dicts, so sort their keys to get
+        # the same encoding for equal arguments on every Python version.
+        return route, json.dumps(
+            ss.json_compat_obj_encode(route.arg_type, arg),
+            sort_keys=True,
+            separators=(',', ':'))
@@ -0,0 +1,262 @@
+"""
+Helpers for serving Stone routes over HTTP.
+
+The python_server generator emits a subclass of :class:`Dispatcher` with a
+handler method for each route. This module implements the parts of the
+network protocol that are the same for every API: looking up the route for a
+request path, decoding arguments, and encoding results and errors. See
+docs/network_protocol.rst for the conventions followed here.
+
+This module should be dropped into a project that requires the use of Stone. In
+the future, this could be imported from a pre-installed Python package, rather
+than being added to a project.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import six
+
+try:
+    from . import stone_serializers as ss
+    from . import stone_validators as bv
+except (SystemError, ValueError):
+    # Catch errors raised when importing a relative module when not in a package.
+    # This makes testing this file directly (outside of a package) easier.
+    import stone_serializers as ss  # type: ignore
+    import stone_validators as bv  # type: ignore
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Upload-style routes send their binary payload in the request body, so the
+# JSON-serialized argument is carried in this header instead. Download-style
+# routes do the same for the JSON-serialized result in the response.
+ARG_HEADER = 'Stone-API-Arg'
+RESULT_HEADER = 'Stone-API-Result'
+
+_JSON_CONTENT_TYPE = 'application/json'
+_BINARY_CONTENT_TYPE = 'application/octet-stream'
+_TEXT_CONTENT_TYPE = 'text/plain; charset=utf-8'
+
+# WSGI and ASGI expose request headers under different names. Compute them
+# once rather than on every request.
+_ARG_HEADER_LOWER = ARG_HEADER.lower()
+_ARG_HEADER_WSGI = 'HTTP_' + ARG_HEADER.upper().replace('-', '_')
+
+
+class RouteError(Exception):
+    """
+    Raise this from a route handler to respond with an object of the route's
+    error data type. The response uses the 409 status code.
+    """
+
+    def __init__(self, error):
+        super(RouteError, self).__init__(error)
+        self.error = error
+
+
+class RouteEntry(object):
+    """
+    An entry of the routing table of a :class:`Dispatcher`.
+    """
+
+    __slots__ = [
+        'route',
+        'handler_name',
+        'style',
+    ]
+
+    def __init__(self, route, handler_name, style='rpc'):
+        # type: (typing.Any, typing.Text, typing.Text) -> None
+        """
+        Args:
+            route (stone_base.Route): The route generated by python_types. It
+                holds the validators for the argument, result, and error.
+            handler_name (str): Name of the dispatcher method that handles
+                the route.
+            style (str): One of 'rpc', 'upload', or 'download'.
+        """
+        assert style in ('rpc', 'upload', 'download'), \
+            'Unknown route style %r.' % style
+        self.route = route
+        self.handler_name = handler_name
+        self.style = style
+
+    def __repr__(self):
+        return 'RouteEntry({!r}, {!r}, {!r})'.format(
+            self.route.name,
+            self.handler_name,
+            self.style)
+
+
+class Response(object):
+    """
+    The outcome of dispatching a request.
+    """
+
+    __slots__ = [
+        'status',
+        'headers',
+        'body',
+    ]
+
+    def __init__(self, status, headers, body):
+        # type: (int, typing.List[typing.Tuple[str, str]], bytes) -> None
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def __repr__(self):
+        return 'Response({!r}, {!r}, {!r})'.format(
+            self.status, self.headers, self.body)
+
+
+def _text_response(status, message):
+    return Response(
+        status, [('Content-Type', _TEXT_CONTENT_TYPE)], message.encode('utf-8'))
+
+
+class Dispatcher(object):
+    """
+    Maps request paths of the form ``/<namespace>/<route>`` to handler methods.
+
+    Subclasses define ``_route_table``, a dict from request path to
+    :class:`RouteEntry`. The handler for each entry is bound once when the
+    dispatcher is constructed so that dispatching a request only requires a
+    single dict lookup.
+
+    Handlers of rpc-style routes take the decoded argument and return the
+    result. Handlers of upload-style routes also take the request body as
+    bytes. Handlers of download-style routes return a tuple of the result and
+    the response body as bytes. To respond with an error, raise
+    :class:`RouteError`.
+    """
+
+    _route_table = {}  # type: typing.Dict[typing.Text, RouteEntry]
+
+    # If strict, unknown struct fields and union tags in arguments are
+    # rejected. Turn this off to accept requests from clients that were
+    # generated from a newer spec.
+    strict = True
+
+    def __init__(self):
+        self._handlers = {
+            path: (entry, getattr(self, entry.handler_name))
+            for path, entry in self._route_table.items()
+        }
+        self._asgi_app = None
+
+    def dispatch(self, path, body, headers=None):
+        # type: (typing.Text, bytes, typing.Optional[typing.Mapping[typing.Text, typing.Text]]) -> Response # noqa: E501
+        """
+        Handles a request for a route.
+
+        Args:
+            path (str): The request path, for example "/users/get_account".
+            body (bytes): The request body.
+            headers (Optional[Mapping[str, str]]): Request headers keyed by
+                their lowercase names. Only needed for upload-style routes.
+
+        Returns:
+            Response
+        """
+        try:
+            entry, handler = self._handlers[path]
+        except KeyError:
+            return _text_response(404, 'Unknown route: %s' % path)
+        route = entry.route
+
+        if entry.style == 'upload':
+            serialized_arg = (headers or {}).get(_ARG_HEADER_LOWER)
+            if serialized_arg is None:
+                return _text_response(
+                    400, 'Missing %s header for upload-style route.' % ARG_HEADER)
+        else:
+            try:
+                serialized_arg = body.decode('utf-8') if body else 'null'
+            except UnicodeDecodeError as e:
+                return _text_response(400, 'Bad argument: %s' % e)
+
+        try:
+            arg = ss.json_decode(
+                route.arg_type, serialized_arg, strict=self.strict)
+        except bv.ValidationError as e:
+            return _text_response(400, 'Bad argument: %s' % e)
+
+        try:
+            if entry.style == 'upload':
+                result = handler(arg, body)
+            else:
+                result = handler(arg)
+        except RouteError as e:
+            return Response(
+                409,
+                [('Content-Type', _JSON_CONTENT_TYPE)],
+                ss.json_encode(route.error_type, e.error).encode('utf-8'))
+
+        if entry.style == 'download':
+            result, result_body = result
+            return Response(
+                200,
+                [('Content-Type', _BINARY_CONTENT_TYPE),
+                 (RESULT_HEADER, ss.json_encode(route.result_type, result))],
+                result_body)
+        else:
+            return Response(
+                200,
+                [('Content-Type', _JSON_CONTENT_TYPE)],
+                ss.json_encode(route.result_type, result).encode('utf-8'))
+
+    def wsgi_app(self, environ, start_response):
+        """
+        A WSGI application that serves the routes of this dispatcher.
+        """
+        if environ['REQUEST_METHOD'] != 'POST':
+            response = _text_response(405, 'Only POST is supported.')
+        else:
+            try:
+                length = int(environ.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            body = environ['wsgi.input'].read(length) if length else b''
+            headers = {}
+            if _ARG_HEADER_WSGI in environ:
+                headers[_ARG_HEADER_LOWER] = environ[_ARG_HEADER_WSGI]
+            path = environ.get('PATH_INFO', '')
+            if six.PY3:
+                # PEP 3333 decodes the path as latin-1, but clients send utf-8.
+                path = path.encode('latin-1').decode('utf-8')
+            response = self.dispatch(path, body, headers)
+
+        headers = [(str(k), str(v)) for k, v in response.headers]
+        headers.append((str('Content-Length'), str(len(response.body))))
+        start_response(
+            str('%d %s' % (response.status, _reason(response.status))), headers)
+        return [response.body]
+
+    @property
+    def asgi_app(self):
+        """
+        An ASGI 3 application that serves the routes of this dispatcher. It
+        also completes the lifespan protocol, and responds with the 500
+        status code when a handler raises an unexpected exception.
+
+        The application is made by stone_asgi.py, which the python_server
+        generator copies into the output folder when it runs on Python 3,
+        since it uses ``async`` syntax.
+        """
+        if self._asgi_app is None:
+            if six.PY2:
+                raise NotImplementedError('ASGI requires Python 3.5 or later.')
+            try:
+                from . import stone_asgi
+            except (ImportError, SystemError, ValueError):
+                # Catch errors raised when importing a relative module when not in a package.
+                import stone_asgi  # type: ignore
+            self._asgi_app = stone_asgi.make_asgi_app(self)
+        return self._asgi_app
+
+
+def _reason(status):
+    return six.moves.http_client.responses.get(status, 'Unknown')
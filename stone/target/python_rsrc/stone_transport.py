@@ -0,0 +1,289 @@
+"""
+A reference HTTP transport for clients generated by python_client.
+
+The python_client generator emits a class whose route methods all call an
+abstract ``request()`` method. :class:`HttpTransport` implements it over
+HTTP/1.1 with a pool of keep-alive connections, following the conventions in
+docs/network_protocol.rst::
+
+    class Client(stone_transport.HttpTransport, generated_module.Client):
+        pass
+
+    client = Client('api.example.com')
+
+This module should be dropped into a project that requires the use of Stone. In
+the future, this could be imported from a pre-installed Python package, rather
+than being added to a project.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import errno
+import socket
+import threading
+
+import six
+
+try:
+    from . import stone_serializers as ss
+except (SystemError, ValueError):
+    # Catch errors raised when importing a relative module when not in a package.
+    # This makes testing this file directly (outside of a package) easier.
+    import stone_serializers as ss  # type: ignore
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+http_client = six.moves.http_client
+
+# Upload-style routes send their binary payload in the request body, so the
+# JSON-serialized argument is carried in this header instead. Download-style
+# routes do the same for the JSON-serialized result in the response.
+ARG_HEADER = 'Stone-API-Arg'
+RESULT_HEADER = 'Stone-API-Result'
+
+DEFAULT_TIMEOUT = 30
+
+_JSON_CONTENT_TYPE = 'application/json'
+_BINARY_CONTENT_TYPE = 'application/octet-stream'
+
+# Errors that mean a connection is unusable.
+_CONNECTION_ERRORS = (socket.error, http_client.HTTPException)
+
+# The errors of sending a request over a connection that the server already
+# closed.
+_CLOSED_CONNECTION_ERRNOS = (errno.EPIPE, errno.ECONNRESET, errno.ECONNABORTED)
+
+
+def _is_empty_status_line(e):
+    """
+    Returns whether a BadStatusLine means that the connection was closed
+    before any of the response was received.
+    """
+    if six.PY2:
+        return e.line.startswith('No status line received')
+    return isinstance(e, http_client.RemoteDisconnected)
+
+
+class ApiError(Exception):
+    """
+    Raised when the server responds with an object of the route's error data
+    type (status code 409).
+    """
+
+    def __init__(self, error):
+        super(ApiError, self).__init__(error)
+        self.error = error
+
+
+class HttpError(Exception):
+    """
+    Raised when the server responds with a status code other than 200 or 409.
+    """
+
+    def __init__(self, status, body):
+        # type: (int, bytes) -> None
+        super(HttpError, self).__init__(status, body)
+        self.status = status
+        self.body = body
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of keep-alive connections to a single host.
+
+    Connections are created on demand, so there is no limit on how many can
+    be in use at once. At most ``maxsize`` idle connections are kept for
+    reuse; the rest are closed when they are returned to the pool.
+    """
+
+    def __init__(self, host, port=None, scheme='https', maxsize=8,
+                 timeout=DEFAULT_TIMEOUT, ssl_context=None):
+        # type: (typing.Text, typing.Optional[int], typing.Text, int, float, typing.Any) -> None
+        assert scheme in ('http', 'https'), 'Unknown scheme %r.' % scheme
+        self.host = host
+        self.port = port
+        self.scheme = scheme
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self._idle = []  # type: typing.List[typing.Any]
+        self._lock = threading.Lock()
+
+    def new_connection(self):
+        """
+        Returns a connection that is not from the pool.
+        """
+        if self.scheme == 'https':
+            kwargs = {}
+            if self.ssl_context is not None:
+                kwargs['context'] = self.ssl_context
+            return http_client.HTTPSConnection(
+                str(self.host), self.port, timeout=self.timeout, **kwargs)
+        else:
+            return http_client.HTTPConnection(
+                str(self.host), self.port, timeout=self.timeout)
+
+    def get(self):
+        """
+        Returns a tuple of a connection and whether it is being reused.
+        """
+        with self._lock:
+            if self._idle:
+                # Reuse the most recently returned connection, since it is the
+                # least likely to have been closed by the server.
+                return self._idle.pop(), True
+        return self.new_connection(), False
+
+    def put(self, conn):
+        """
+        Returns a connection to the pool once its response has been read.
+        """
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class HttpTransport(object):
+    """
+    Implements ``request()`` for a class generated by python_client.
+
+    Place this before the generated class in the list of bases. Requests are
+    sent to ``<scheme>://<host>:<port>/<namespace>/<route>``. The style of a
+    route is read from its ``style`` attribute, so run python_types with
+    ``-a style`` when the spec has upload or download-style routes.
+
+    Download-style routes return a tuple of the result and the response body
+    as bytes.
+    """
+
+    # If strict, unknown struct fields and union tags in responses are
+    # rejected. This is off by default so that the client keeps working when
+    # the server is generated from a newer spec.
+    strict = False
+
+    def __init__(self, host, port=None, scheme='https', headers=None,
+                 pool_size=8, timeout=DEFAULT_TIMEOUT, ssl_context=None):
+        """
+        Args:
+            host (str): Host name of the server.
+            port (Optional[int]): Defaults to the standard port of the scheme.
+            scheme (str): Either 'http' or 'https'.
+            headers (Optional[Mapping[str, str]]): Extra headers to send with
+                every request, for example ``Authorization``.
+            pool_size (int): Maximum number of idle connections to keep open.
+            timeout (float): Socket timeout in seconds.
+            ssl_context (Optional[ssl.SSLContext]): Used for https.
+        """
+        self._pool = ConnectionPool(
+            host, port, scheme, pool_size, timeout, ssl_context)
+        self._headers = {str(k): str(v) for k, v in (headers or {}).items()}
+
+    def request(self, route, namespace, arg, arg_binary=None):
+        """
+        Sends a request for a route and returns its decoded result.
+
+        Raises:
+            ApiError: The server responded with a route error.
+            HttpError: The server responded with any other failure.
+        """
+        style = route.attrs.get('style')
+        serialized_arg = ss.json_encode(route.arg_type, arg)
+        headers = dict(self._headers)
+        if style == 'upload':
+            headers[str('Content-Type')] = str(_BINARY_CONTENT_TYPE)
+            headers[str(ARG_HEADER)] = str(serialized_arg)
+            body = arg_binary
+        else:
+            headers[str('Content-Type')] = str(_JSON_CONTENT_TYPE)
+            body = serialized_arg.encode('utf-8')
+
+        status, serialized_result, resp_body = self._send(
+            str('/{}/{}'.format(namespace, route.name)), body, headers)
+
+        if status == 409:
+            raise ApiError(ss.json_decode(
+                route.error_type, resp_body.decode('utf-8'), strict=self.strict))
+        elif status != 200:
+            raise HttpError(status, resp_body)
+
+        if style == 'download':
+            if serialized_result is None:
+                raise HttpError(status, resp_body)
+            result = ss.json_decode(
+                route.result_type, serialized_result, strict=self.strict)
+            return result, resp_body
+        else:
+            return ss.json_decode(
+                route.result_type, resp_body.decode('utf-8'), strict=self.strict)
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        self._pool.close()
+
+    def _send(self, path, body, headers):
+        conn, reused = self._pool.get()
+        if reused:
+            result = self._round_trip(conn, path, body, headers, retry=True)
+            if result is not None:
+                return result
+            # The server closed the connection while it was idle in the pool,
+            # without reading the request, so it's safe to send it again on a
+            # fresh connection.
+            conn = self._pool.new_connection()
+        return self._round_trip(conn, path, body, headers)
+
+    def _round_trip(self, conn, path, body, headers, retry=False):
+        """
+        Sends a request and reads its response.
+
+        Args:
+            retry (bool): Whether to return None, rather than raise an error,
+                when the server had closed the connection before the request
+                was sent. Any other error, such as a timeout, or a response
+                cut short, may come after the server ran the route, so it
+                can't be retried.
+        """
+        try:
+            try:
+                conn.request(str('POST'), path, body, headers)
+            except socket.error as e:
+                if retry and e.errno in _CLOSED_CONNECTION_ERRNOS:
+                    conn.close()
+                    return None
+                raise
+            try:
+                resp = conn.getresponse()
+            except http_client.BadStatusLine as e:
+                if retry and _is_empty_status_line(e):
+                    conn.close()
+                    return None
+                raise
+            resp_body = resp.read()
+        except _CONNECTION_ERRORS:
+            conn.close()
+            raise
+        serialized_result = resp.getheader(RESULT_HEADER)
+        if resp.will_close:
+            conn.close()
+        else:
+            self._pool.put(conn)
+        return resp.status, serialized_result, resp_body
+
+    def _save_body_to_file(self, download_path, body):
+        with open(download_path, 'wb') as f:
+            f.write(body)
@@ -0,0 +1,202 @@
+"""
+Code generator for the server side of a Python API.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import sys
+
+from stone.data_type import (
+    is_user_defined_type,
+    is_void_type,
+)
+from stone.generator import CodeGenerator
+from stone.target.python_helpers import (
+    fmt_func,
+    fmt_type,
+)
+
+_MYPY = False
+if _MYPY:
+    import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
+
+# Hack to get around some of Python 2's standard library modules that
+# accept ascii-encodable unicode literals in lieu of strs, but where
+# actually passing such literals results in errors with mypy --py2. See
+# <https://github.com/python/typeshed/issues/756> and
+# <https://github.com/python/mypy/issues/2536>.
+import importlib
+argparse = importlib.import_module(str('argparse'))  # type: typing.Any
+
+
+# This will be at the top of the generated file.
+base = """\
+# -*- coding: utf-8 -*-
+# Auto-generated by Stone, do not modify.
+# flake8: noqa
+# pylint: skip-file
+
+try:
+    from . import stone_server as bs
+except (SystemError, ValueError):
+    # Catch errors raised when importing a relative module when not in a package.
+    # This makes testing this file directly (outside of a package) easier.
+    import stone_server as bs
+
+"""
+
+_cmdline_parser = argparse.ArgumentParser(
+    prog='python-server-generator',
+    description=(
+        'Generates a Python class with a handler method for each route and a '
+        'routing table that maps request paths to handlers. Extend the '
+        'generated class and override the handler methods. This class '
+        'assumes that the python_types generator was used with the same '
+        'output directory.'),
+)
+_cmdline_parser.add_argument(
+    '-m',
+    '--module-name',
+    required=True,
+    type=str,
+    help=('The name of the Python module to generate. Please exclude the .py '
+          'file extension.'),
+)
+_cmdline_parser.add_argument(
+    '-c',
+    '--class-name',
+    required=True,
+    type=str,
+    help='The name of the Python class that contains each route handler.',
+)
+
+
+class PythonServerGenerator(CodeGenerator):
+
+    cmdline_parser = _cmdline_parser
+
+    def generate(self, api):
+        """Generates a module with a dispatcher for the routes of every
+        namespace.
+
+        The dispatcher is a subclass of stone_server.Dispatcher, which is
+        copied into the output folder, along with stone_asgi.py on Python 3.
+        """
+        rsrc_folder = os.path.join(os.path.dirname(__file__), 'python_rsrc')
+        self.logger.info('Copying stone_server.py to output folder')
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'stone_server.py'),
+                                   'stone_server.py')
+        if sys.version_info >= (3, 5):
+            # It uses async syntax, which Python 2 can't compile.
+            self.logger.info('Copying stone_asgi.py to output folder')
+            self.copy_to_relative_path(os.path.join(rsrc_folder, 'stone_asgi.py'),
+                                       'stone_asgi.py')
+
+        namespaces = [ns for ns in api.namespaces.values() if ns.routes]
+        with self.output_to_relative_path('%s.py' % self.args.module_name):
+            self.emit_raw(base)
+            self._generate_imports(namespaces)
+            self.emit()
+            self.emit('class %s(bs.Dispatcher):' % self.args.class_name)
+            with self.indent():
+                self.emit('"""')
+                self.emit_wrapped_text(
+                    'Override the method of each route that the server '
+                    'implements. Routes that are not overridden raise '
+                    'NotImplementedError. Serve requests with dispatch(), '
+                    'wsgi_app(), or asgi_app on Python 3.')
+                self.emit('"""')
+                self.emit()
+                self._generate_route_table(namespaces)
+                self._generate_route_handlers(namespaces)
+
+    def _generate_imports(self, namespaces):
+        if not namespaces:
+            return
+        self.emit('try:')
+        with self.indent():
+            self.emit('from . import (')
+            with self.indent():
+                for ns in namespaces:
+                    self.emit(ns.name + ',')
+            self.emit(')')
+        self.emit('except (SystemError, ValueError):')
+        with self.indent():
+            for ns in namespaces:
+                self.emit('import %s' % ns.name)
+        self.emit()
+
+    def _generate_route_table(self, namespaces):
+        """The routing table maps request paths to prebuilt entries so that
+        dispatching a request is a single dict lookup."""
+        with self.block('_route_table =', delim=('{', '}')):
+            for namespace in namespaces:
+                for route in namespace.routes:
+                    self.generate_multiline_list(
+                        ["{}.{}".format(namespace.name, fmt_func(route.name)),
+                         "'{}'".format(self._handler_name(namespace, route)),
+                         "'{}'".format(self._route_style(route))],
+                        before="'/{}/{}': bs.RouteEntry".format(
+                            namespace.name, route.name),
+                        after=',')
+        self.emit()
+
+    def _generate_route_handlers(self, namespaces):
+        for namespace in namespaces:
+            self.emit('# ------------------------------------------')
+            self.emit('# Routes in {} namespace'.format(namespace.name))
+            self.emit()
+            for route in namespace.routes:
+                self._generate_route_handler(namespace, route)
+
+    def _generate_route_handler(self, namespace, route):
+        style = self._route_style(route)
+        args = ['self', 'arg']
+        if style == 'upload':
+            args.append('f')
+        self.generate_multiline_list(
+            args, 'def {}'.format(self._handler_name(namespace, route)), ':')
+        with self.indent():
+            self.emit('"""')
+            if route.doc:
+                self.emit_wrapped_text(route.doc)
+                self.emit()
+            self.emit(':param arg: {}'.format(
+                self._format_type_in_doc(route.arg_data_type)))
+            if style == 'upload':
+                self.emit(':param bytes f: Contents of the upload.')
+            if style == 'download':
+                self.emit(':rtype: ({}, bytes)'.format(
+                    self._format_type_in_doc(route.result_data_type)))
+            else:
+                self.emit(':rtype: {}'.format(
+                    self._format_type_in_doc(route.result_data_type)))
+            if not is_void_type(route.error_data_type):
+                self.emit_wrapped_text(
+                    ':raises: :class:`stone_server.RouteError` with a value of '
+                    'type {}'.format(self._format_type_in_doc(
+                        route.error_data_type)),
+                    subsequent_prefix='    ')
+            self.emit('"""')
+            self.emit('raise NotImplementedError')
+        self.emit()
+
+    def _handler_name(self, namespace, route):
+        return '{}_{}'.format(fmt_func(namespace.name), fmt_func(route.name))
+
+    def _route_style(self, route):
+        style = route.attrs.get('style')
+        if style in ('upload', 'download'):
+            return style
+        else:
+            return 'rpc'
+
+    def _format_type_in_doc(self, data_type):
+        if is_void_type(data_type):
+            return 'None'
+        elif is_user_defined_type(data_type):
+            return ':class:`{}.{}`'.format(
+                data_type.namespace.name, fmt_type(data_type))
+        else:
+            return fmt_type(data_type)
@@ -1,5 +1,6 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import functools
 import textwrap
 from contextlib import contextmanager
 
@@ -85,6 +86,7 @@ class PythonTypeStubsGenerator(CodeGenerator):
     # Instance var of the current namespace being generated
     cur_namespace = None
     preserve_aliases = True
+    namespace_scoped = True
     import_tracker = ImportTracker()
 
     def __init__(self, *args, **kwargs):
@@ -100,9 +102,14 @@ class PythonTypeStubsGenerator(CodeGenerator):
         Each namespace will have Python classes to represent data types and
         routes in the Stone spec.
         """
-        for namespace in api.namespaces.values():
-            with self.output_to_relative_path('{}.pyi'.format(namespace.name)):
-                self._generate_base_namespace_module(namespace)
+        self.run_work_units([
+            functools.partial(self._generate_namespace_module_file, namespace)
+            for namespace in api.namespaces.values()])
+
+    def _generate_namespace_module_file(self, namespace):
+        # type: (ApiNamespace) -> None
+        with self.output_to_relative_path('{}.pyi'.format(namespace.name)):
+            self._generate_base_namespace_module(namespace)
 
     def _generate_base_namespace_module(self, namespace):
         # type: (ApiNamespace) -> None
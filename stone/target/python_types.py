@@ -4,9 +4,9 @@ Code generator for Python.
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import functools
 import os
 import re
-import shutil
 
 _MYPY = False
 if _MYPY:
@@ -75,6 +75,7 @@ class PythonTypesGenerator(CodeGenerator):
     cur_namespace = None  # type: typing.Optional[ApiNamespace]
 
     preserve_aliases = True
+    namespace_scoped = True
 
     def generate(self, api):
         """
@@ -85,17 +86,21 @@ class PythonTypesGenerator(CodeGenerator):
         """
         rsrc_folder = os.path.join(os.path.dirname(__file__), 'python_rsrc')
         self.logger.info('Copying stone_validators.py to output folder')
-        shutil.copy(os.path.join(rsrc_folder, 'stone_validators.py'),
-                    self.target_folder_path)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'stone_validators.py'),
+                                   'stone_validators.py')
         self.logger.info('Copying stone_serializers.py to output folder')
-        shutil.copy(os.path.join(rsrc_folder, 'stone_serializers.py'),
-                    self.target_folder_path)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'stone_serializers.py'),
+                                   'stone_serializers.py')
         self.logger.info('Copying stone_base.py to output folder')
-        shutil.copy(os.path.join(rsrc_folder, 'stone_base.py'),
-                    self.target_folder_path)
-        for namespace in api.namespaces.values():
-            with self.output_to_relative_path('{}.py'.format(namespace.name)):
-                self._generate_base_namespace_module(api, namespace)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'stone_base.py'),
+                                   'stone_base.py')
+        self.run_work_units([
+            functools.partial(self._generate_namespace_module_file, api, namespace)
+            for namespace in api.namespaces.values()])
+
+    def _generate_namespace_module_file(self, api, namespace):
+        with self.output_to_relative_path('{}.py'.format(namespace.name)):
+            self._generate_base_namespace_module(api, namespace)
 
     def _generate_base_namespace_module(self, api, namespace):
         """Creates a module for the namespace. All data types and routes are
@@ -1,8 +1,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import functools
 import json
 import os
-import shutil
 
 from contextlib import contextmanager
 
@@ -121,23 +121,25 @@ class SwiftTypesGenerator(SwiftBaseGenerator):
     def generate(self, api):
         rsrc_folder = os.path.join(os.path.dirname(__file__), 'swift_rsrc')
         self.logger.info('Copying StoneValidators.swift to output folder')
-        shutil.copy(os.path.join(rsrc_folder, 'StoneValidators.swift'),
-                    self.target_folder_path)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'StoneValidators.swift'),
+                                   'StoneValidators.swift')
         self.logger.info('Copying StoneSerializers.swift to output folder')
-        shutil.copy(os.path.join(rsrc_folder, 'StoneSerializers.swift'),
-                    self.target_folder_path)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'StoneSerializers.swift'),
+                                   'StoneSerializers.swift')
         self.logger.info('Copying StoneBase.swift to output folder')
-        shutil.copy(os.path.join(rsrc_folder, 'StoneBase.swift'),
-                    self.target_folder_path)
+        self.copy_to_relative_path(os.path.join(rsrc_folder, 'StoneBase.swift'),
+                                   'StoneBase.swift')
 
         jazzy_cfg_path = os.path.join(rsrc_folder, 'jazzy.json')
         with open(jazzy_cfg_path) as jazzy_file:
             jazzy_cfg = json.load(jazzy_file)
 
+        self.run_work_units([
+            functools.partial(self._generate_namespace_module_file, api, namespace)
+            for namespace in api.namespaces.values()])
+
         for namespace in api.namespaces.values():
             ns_class = fmt_class(namespace.name)
-            with self.output_to_relative_path('{}.swift'.format(ns_class)):
-                self._generate_base_namespace_module(api, namespace)
             jazzy_cfg['custom_categories'][1]['children'].append(ns_class)
 
             if namespace.routes:
@@ -146,6 +148,10 @@ class SwiftTypesGenerator(SwiftBaseGenerator):
         with self.output_to_relative_path('../../../.jazzy.json'):
             self.emit_raw(json.dumps(jazzy_cfg, indent=2) + '\n')
 
+    def _generate_namespace_module_file(self, api, namespace):
+        with self.output_to_relative_path('{}.swift'.format(fmt_class(namespace.name))):
+            self._generate_base_namespace_module(api, namespace)
+
     def _generate_base_namespace_module(self, api, namespace):
         self.emit_raw(base)
 
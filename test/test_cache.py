@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import shutil
+import tempfile
+import textwrap
+import unittest
+
+import mock
+
+from stone.lang import cache
+from stone.lang.cache import DiskAstCache, MemoryAstCache
+from stone.lang.exception import InvalidSpec
+from stone.lang.parser import StoneParser
+from stone.lang.tower import TowerOfStone
+
+ns1_text = textwrap.dedent("""\
+    namespace ns1
+
+    import ns2
+
+    struct S
+        "Doc."
+        f ns2.U
+        g String = "x"
+    """)
+
+ns2_text = textwrap.dedent("""\
+    namespace ns2
+
+    union U
+        a
+        b Dims
+            struct
+                w UInt64
+                h UInt64
+    """)
+
+
+class TestDiskAstCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.cache = DiskAstCache(os.path.join(self.cache_dir, 'ast'))
+
+    def _entries(self):
+        return os.listdir(self.cache.directory)
+
+    def test_get_and_put(self):
+        self.assertIsNone(self.cache.get('ns1.stone', ns1_text))
+        res = StoneParser().parse(ns1_text, 'ns1.stone')
+        self.cache.put('ns1.stone', ns1_text, res)
+        self.assertEqual(repr(self.cache.get('ns1.stone', ns1_text)), repr(res))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        # The path and text are both part of the key.
+        self.assertIsNone(self.cache.get('other.stone', ns1_text))
+        self.assertIsNone(self.cache.get('ns1.stone', ns1_text + '\n'))
+        # So is the parser.
+        with mock.patch.object(cache, '_parser_fingerprint', b'new parser'):
+            self.assertIsNone(self.cache.get('ns1.stone', ns1_text))
+
+    def test_invalid_entries(self):
+        self.cache.put('ns1.stone', ns1_text, ['parsed'])
+        entry_path = os.path.join(self.cache.directory, self._entries()[0])
+        with open(entry_path, 'rb') as f:
+            data = f.read()
+
+        with open(entry_path, 'wb') as f:
+            f.write(data[:len(data) // 2])
+        self.assertIsNone(self.cache.get('ns1.stone', ns1_text))
+        self.assertEqual(self._entries(), [])
+
+        # An entry stored under the wrong name is rejected.
+        self.cache.put('ns2.stone', ns2_text, ['parsed'])
+        os.rename(os.path.join(self.cache.directory, self._entries()[0]), entry_path)
+        self.assertIsNone(self.cache.get('ns1.stone', ns1_text))
+        self.assertEqual(self._entries(), [])
+
+    def test_unwritable_directory(self):
+        path = os.path.join(self.cache_dir, 'file')
+        open(path, 'w').close()
+        # Failing to write is not an error.
+        DiskAstCache(path).put('ns1.stone', ns1_text, ['parsed'])
+
+    def test_tower(self):
+        specs = [('ns1.stone', ns1_text), ('ns2.stone', ns2_text)]
+        api = TowerOfStone(specs, cache=self.cache).parse()
+        self.assertEqual(len(self._entries()), 2)
+
+        with mock.patch.object(StoneParser, 'parse',
+                               side_effect=AssertionError('not cached')):
+            cached_api = TowerOfStone(specs, cache=self.cache).parse()
+        for name in ('ns1', 'ns2'):
+            self.assertEqual(
+                repr(cached_api.namespaces[name].data_types),
+                repr(api.namespaces[name].data_types))
+        s = cached_api.namespaces['ns1'].data_type_by_name['S']
+        self.assertEqual(s.doc, 'Doc.')
+        self.assertEqual(s.all_fields[1].default, 'x')
+
+        # Specs with errors aren't cached, and the error doesn't change.
+        bad_specs = [('ns1.stone', ns1_text + 'struct $\n')]
+        for _ in range(2):
+            with self.assertRaises(InvalidSpec) as cm:
+                TowerOfStone(bad_specs, cache=self.cache).parse()
+            self.assertEqual(cm.exception.path, 'ns1.stone')
+        self.assertEqual(len(self._entries()), 2)
+
+    def test_tower_parallel(self):
+        specs = [('ns1.stone', ns1_text), ('ns2.stone', ns2_text)]
+        TowerOfStone(specs[1:], cache=self.cache).parse()
+        # Only the spec that isn't cached is parsed.
+        api = TowerOfStone(specs, jobs=2, cache=self.cache).parse()
+        self.assertEqual(sorted(api.namespaces), ['ns1', 'ns2'])
+        self.assertEqual(len(self._entries()), 2)
+
+
+class TestMemoryAstCache(unittest.TestCase):
+
+    def test_get_and_put(self):
+        ast_cache = MemoryAstCache()
+        self.assertIsNone(ast_cache.get('ns1.stone', ns1_text))
+        res = StoneParser().parse(ns1_text, 'ns1.stone')
+        ast_cache.put('ns1.stone', ns1_text, res)
+        # Every get() returns a new copy, since the tower modifies it.
+        cached = ast_cache.get('ns1.stone', ns1_text)
+        self.assertEqual(repr(cached), repr(res))
+        cached.pop(0)
+        self.assertEqual(repr(ast_cache.get('ns1.stone', ns1_text)), repr(res))
+        self.assertEqual((ast_cache.hits, ast_cache.misses), (2, 1))
+
+        # Only the last version of a spec is kept.
+        new_text = ns1_text + 'struct T\n    f UInt64\n'
+        ast_cache.put('ns1.stone', new_text, StoneParser().parse(new_text, 'ns1.stone'))
+        self.assertIsNone(ast_cache.get('ns1.stone', ns1_text))
+        self.assertIsNotNone(ast_cache.get('ns1.stone', new_text))
+
+    def test_tower(self):
+        ast_cache = MemoryAstCache()
+        specs = [('ns1.stone', ns1_text), ('ns2.stone', ns2_text)]
+        TowerOfStone(specs, cache=ast_cache).parse()
+        with mock.patch.object(StoneParser, 'parse',
+                               side_effect=AssertionError('not cached')):
+            for _ in range(2):
+                api = TowerOfStone(specs, cache=ast_cache).parse()
+                self.assertEqual(sorted(api.namespaces), ['ns1', 'ns2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,10 +2,84 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import json
+import os
+import pstats
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
 import unittest
 
+import mock
+import six
+
+from stone import cli
 from stone.cli_helpers import parse_route_attr_filter
 
+# Writes the names of the data types it sees, then removes them all from the
+# API, which other generators must not notice.
+_greedy_generator = textwrap.dedent("""\
+    from stone.generator import CodeGenerator
+
+    class GreedyGenerator(CodeGenerator):
+
+        def generate(self, api):
+            with self.output_to_relative_path('types.txt'):
+                for namespace in api.namespaces.values():
+                    for data_type in namespace.data_types:
+                        self.emit(data_type.name)
+                    namespace.data_types = []
+                    namespace.data_type_by_name = {}
+    """)
+
+_failing_generator = textwrap.dedent("""\
+    from stone.generator import CodeGenerator
+
+    class FailingGenerator(CodeGenerator):
+
+        def generate(self, api):
+            raise ValueError('Out of ideas.')
+    """)
+
+
+# Keeps the names of the namespaces it saw in a class attribute, as the obj_c
+# generators do, which must not carry over to the next build.
+_stateful_generator = textwrap.dedent("""\
+    from stone.generator import CodeGenerator
+
+    class StatefulGenerator(CodeGenerator):
+
+        names = []
+
+        def generate(self, api):
+            self.names.extend(api.namespaces)
+            with self.output_to_relative_path('names.txt'):
+                self.emit(' '.join(self.names))
+    """)
+
+
+# The modules that "stone --help" must not import, since they take much longer
+# to import than the rest of the CLI.
+_lazy_modules = ('ply', 'stone.compiler', 'stone.data_type', 'stone.lang.tower', 'stone.target')
+
+# The most modules of stone that "import stone.cli" may import: stone and
+# stone.cli, and a little room. Importing the parser and the data types as well
+# would make that 13. Modules of the standard library aren't counted, since
+# how many of them are imported depends on the version of Python.
+_max_cli_modules = 4
+
+# Prints the names of the modules that importing stone.cli adds, as JSON.
+# Python 2 has entries of None for relative imports that weren't found.
+_list_cli_modules = textwrap.dedent("""\
+    import json, sys
+    before = set(name for name, module in sys.modules.items() if module is not None)
+    import stone.cli
+    print(json.dumps(sorted(name for name, module in sys.modules.items()
+                            if module is not None and name not in before)))
+    """)
+
 
 class MockRoute():
     """Used to test filtering on a route's attrs."""
@@ -127,6 +201,224 @@ class TestCLI(unittest.TestCase):
         self.assertFalse(expr.eval(MockRoute({'a': 1})))
         self.assertFalse(expr.eval(MockRoute({'a': 1, 'b': 3})))
 
+    def test_multiple_targets(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        spec_path = os.path.join(tmp_dir, 'ns.stone')
+        with open(spec_path, 'w') as f:
+            f.write('namespace ns\n\nstruct S\n    f String\n\nunion U\n    a\n')
+        generators = {}
+        for name, text in (('greedy', _greedy_generator),
+                           ('failing', _failing_generator)):
+            generators[name] = os.path.join(tmp_dir, name + '.stoneg.py')
+            with open(generators[name], 'w') as f:
+                f.write(text)
+
+        def run_stone(args):
+            p = subprocess.Popen([sys.executable, '-m', 'stone.cli'] + args,
+                                 stderr=subprocess.PIPE)
+            _, stderr = p.communicate()
+            return p.wait(), stderr.decode('utf-8')
+
+        for jobs in ('1', '3'):
+            out = os.path.join(tmp_dir, 'out' + jobs)
+            status, stderr = run_stone([
+                '-j', jobs,
+                '-t', '%s:%s' % (generators['greedy'], os.path.join(out, 'greedy1')),
+                '-t', '%s:%s' % (generators['failing'], os.path.join(out, 'failing')),
+                '-t', '%s:%s' % (generators['greedy'], os.path.join(out, 'greedy2')),
+                '-t', 'js_types:%s:types.js' % os.path.join(out, 'js'),
+                '-t', 'js_types:%s' % os.path.join(out, 'no_args'),
+                spec_path,
+            ])
+            self.assertEqual(status, 1, stderr)
+            self.assertIn('%s: error: FailingGenerator raised an exception' %
+                          generators['failing'], stderr)
+            self.assertIn('Out of ideas.', stderr)
+            self.assertIn('js_types: error: Exited with status 2.', stderr)
+            # Every generator saw the whole API, and the failure didn't stop
+            # the generators after it.
+            for name in ('greedy1', 'greedy2'):
+                with open(os.path.join(out, name, 'types.txt')) as f:
+                    self.assertEqual(f.read().split(), ['S', 'U'])
+            self.assertTrue(os.path.exists(os.path.join(out, 'js', 'types.js')))
+
+        status, stderr = run_stone(['-t', 'python_types', spec_path])
+        self.assertEqual(status, 1)
+        self.assertIn('must be in the form generator:output[:args]', stderr)
+        status, stderr = run_stone(['-t', 'python_types:out', spec_path, '--', '-h'])
+        self.assertEqual(status, 1)
+        self.assertIn('Pass arguments to generators as part of each --target', stderr)
+        status, stderr = run_stone(['-t', 'missing:out', spec_path])
+        self.assertEqual(status, 1)
+        self.assertIn("Generator 'missing' cannot be found.", stderr)
+
+    def test_watch(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        spec_path = os.path.join(tmp_dir, 'ns.stone')
+        other_spec_path = os.path.join(tmp_dir, 'other.stone')
+        generator_path = os.path.join(tmp_dir, 'greedy.stoneg.py')
+        out = os.path.join(tmp_dir, 'out')
+        spec_text = 'namespace ns\n\nstruct S\n    f String\n'
+        mtime = [os.path.getmtime(tmp_dir)]
+
+        def write(path, text):
+            with open(path, 'w') as f:
+                f.write(text)
+            # Make sure the change is seen, however coarse the mtimes are.
+            mtime[0] += 10
+            os.utime(path, (mtime[0], mtime[0]))
+
+        def read_types():
+            with open(os.path.join(out, 'types.txt')) as f:
+                return f.read().split()
+
+        write(spec_path, spec_text)
+        write(other_spec_path, 'namespace other\n\nstruct O\n    f String\n')
+        write(generator_path, _greedy_generator)
+
+        def change_generator():
+            write(generator_path, _greedy_generator.replace('data_type.name', "u'x'"))
+            write(spec_path, spec_text)
+
+        # Each change is made while waiting for one, and is followed by a
+        # check while waiting for files to stop changing.
+        changes = [
+            lambda: write(spec_path, spec_text + '\nunion U\n    a\n'),
+            lambda: self.assertEqual(read_types(), ['S', 'O']),
+            lambda: write(spec_path, spec_text + '\nunion U\n    a Strin\n'),
+            lambda: self.assertEqual(read_types(), ['S', 'U', 'O']),
+            change_generator,
+            lambda: None,
+        ]
+
+        def sleep(_):
+            if not changes:
+                raise KeyboardInterrupt
+            changes.pop(0)()
+
+        args = cli._cmdline_parser.parse_args(
+            [generator_path, out, spec_path, other_spec_path, '--watch'])
+        targets = [(generator_path, out, [])]
+        with mock.patch('time.sleep', sleep), \
+                mock.patch('sys.stdout', six.StringIO()) as stdout, \
+                mock.patch('sys.stderr', six.StringIO()) as stderr:
+            cli._watch(args, targets, False, 1)
+
+        self.assertEqual(read_types(), ['x', 'x'])
+        self.assertIn("ns.stone:7: error: Symbol 'Strin' is undefined.", stderr.getvalue())
+        self.assertEqual(stdout.getvalue().count('Watching 3 files'), 4)
+        self.assertEqual(stdout.getvalue().count('Generated output'), 3)
+        # Only the spec that changed was parsed again.
+        self.assertEqual(stdout.getvalue().count('Parsed 2 specs'), 1)
+        self.assertEqual(stdout.getvalue().count('Parsed 1 specs'), 2)
+
+    def test_consecutive_builds(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        generator_path = os.path.join(tmp_dir, 'stateful.stoneg.py')
+        with open(generator_path, 'w') as f:
+            f.write(_stateful_generator)
+        specs = {
+            'a.stone': 'namespace a\n\nroute r(S, Void, Void)\n\nstruct S\n    f String\n',
+            'b.stone': 'namespace b\n\nroute q(T, Void, Void)\n\nstruct T\n    g Int64\n',
+        }
+        for name, text in specs.items():
+            with open(os.path.join(tmp_dir, name), 'w') as f:
+                f.write(text)
+
+        def stone_args(out, spec):
+            return ['-t', 'obj_c_types:%s:-d 1' % os.path.join(out, 'obj_c'),
+                    '-t', '%s:%s' % (generator_path, os.path.join(out, 'stateful')),
+                    os.path.join(tmp_dir, spec)]
+
+        def read_files(out):
+            files = {}
+            for folder, _, names in os.walk(out):
+                for name in names:
+                    path = os.path.join(folder, name)
+                    with open(path, 'rb') as f:
+                        files[os.path.relpath(path, out)] = f.read()
+            return files
+
+        # Two builds in this process, as with --watch or a compile server.
+        for spec, out in (('a.stone', 'first'), ('b.stone', 'warm')):
+            args, targets, _, debug, jobs = cli.parse_args(
+                stone_args(os.path.join(tmp_dir, out), spec))
+            cli.build(args, targets, debug, jobs, None)
+
+        cold = os.path.join(tmp_dir, 'cold')
+        p = subprocess.Popen([sys.executable, '-m', 'stone.cli'] + stone_args(cold, 'b.stone'),
+                             stderr=subprocess.PIPE)
+        _, stderr = p.communicate()
+        self.assertEqual(p.wait(), 0, stderr)
+
+        warm_files = read_files(os.path.join(tmp_dir, 'warm'))
+        self.assertEqual(warm_files[os.path.join('stateful', 'names.txt')], b'b\n')
+        self.assertEqual(warm_files, read_files(cold))
+
+    def test_profile(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        spec_path = os.path.join(tmp_dir, 'ns.stone')
+        with open(spec_path, 'w') as f:
+            f.write('namespace ns\n\nstruct S\n    f String\n')
+        generator_path = os.path.join(tmp_dir, 'greedy.stoneg.py')
+        with open(generator_path, 'w') as f:
+            f.write(_greedy_generator)
+        json_path = os.path.join(tmp_dir, 'profile.json')
+        stats_path = os.path.join(tmp_dir, 'profile.prof')
+
+        for target_args in ([generator_path, os.path.join(tmp_dir, 'out')],
+                            ['-t', '%s:%s' % (generator_path, os.path.join(tmp_dir, 'out1')),
+                             '-t', '%s:%s' % (generator_path, os.path.join(tmp_dir, 'out2'))]):
+            args, targets, _, _, _ = cli.parse_args(
+                target_args + [spec_path, '--profile', '--profile-json', json_path,
+                               '--profile-cprofile', stats_path])
+            with mock.patch('sys.stderr', six.StringIO()) as stderr:
+                cli.build(args, targets, False, 1, None)
+
+            with open(json_path) as f:
+                profile = json.load(f)
+            phases = [phase['name'] for phase in profile['phases']]
+            self.assertEqual(phases[0], 'parse specs')
+            self.assertIn('populate examples', phases)
+            self.assertEqual(phases.count('run GreedyGenerator'), len(targets))
+            self.assertEqual(len(profile['files']), len(targets))
+            for f, (_, output, _) in zip(profile['files'], targets):
+                self.assertEqual(f['path'], os.path.join(output, 'types.txt'))
+                self.assertEqual((f['bytes'], f['lines']), (2, 1))
+                self.assertEqual(f['generator'], 'GreedyGenerator')
+            self.assertIn('run GreedyGenerator', stderr.getvalue())
+            self.assertIn('Wrote cProfile statistics of the slowest phase', stderr.getvalue())
+            pstats.Stats(stats_path)
+
+    def test_lazy_imports(self):
+        # With -X importtime, Python 3.7 and later also report each module as
+        # it's imported.
+        importtime = sys.version_info >= (3, 7)
+        p = subprocess.Popen(
+            [sys.executable] + (['-X', 'importtime'] if importtime else []) +
+            ['-c', _list_cli_modules],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = p.communicate()
+        self.assertEqual(p.wait(), 0, stderr)
+        modules = json.loads(stdout.decode('utf-8'))
+        stone_modules = [name for name in modules if name.split('.')[0] == 'stone']
+        self.assertLessEqual(len(stone_modules), _max_cli_modules,
+                             'stone.cli imports %s' % ', '.join(stone_modules))
+        if importtime:
+            # Lines are "import time: self [us] | cumulative | imported package".
+            imported = [line.split('|')[-1].strip()
+                        for line in stderr.decode('utf-8').splitlines()]
+            self.assertIn('stone.cli', imported)
+            modules.extend(imported)
+        for name in modules:
+            for lazy_module in _lazy_modules:
+                self.assertFalse(name == lazy_module or name.startswith(lazy_module + '.'),
+                                 'stone.cli imports %s' % name)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import shutil
+import tempfile
+import textwrap
+import unittest
+
+from stone.bench.examples import _round_trip, main, round_trip_examples
+from stone.bench.runtime import generate_python_types
+from stone.lang.tower import TowerOfStone
+
+spec_text = textwrap.dedent("""\
+    namespace files
+
+    struct Metadata
+        union
+            file FileMetadata
+            folder FolderMetadata
+        name String
+        path_lower String?
+
+        example default
+            file = default
+
+        example folder
+            folder = default
+
+    struct FileMetadata extends Metadata
+        size UInt64
+        client_modified Timestamp("%Y-%m-%dT%H:%M:%SZ")
+        tags List(String)?
+
+        example default
+            name = "a.txt"
+            path_lower = "/a.txt"
+            size = 10
+            client_modified = "2017-01-02T03:04:05Z"
+
+    struct FolderMetadata extends Metadata
+
+        example default
+            name = "b"
+
+    struct Listing
+        entries List(Metadata)
+        cursor String
+
+        example default
+            entries = [default, folder]
+            cursor = "c"
+
+    union LookupError
+        not_found
+        malformed String
+
+        example malformed
+            malformed = "bad path"
+    """)
+
+
+class TestExamples(unittest.TestCase):
+
+    def test_round_trip_examples(self):
+        api = TowerOfStone([('files.stone', spec_text)]).parse()
+        results, failures = round_trip_examples(api, number=2, repeat=1)
+        self.assertEqual(failures, [])
+        self.assertEqual(list(results), [
+            'files.FileMetadata/decode',
+            'files.FileMetadata/encode',
+            'files.FolderMetadata/decode',
+            'files.FolderMetadata/encode',
+            'files.Listing/decode',
+            'files.Listing/encode',
+            'files.LookupError/decode',
+            'files.LookupError/encode',
+            'files.Metadata/decode',
+            'files.Metadata/encode',
+        ])
+        # The catch-all tag can't be encoded, so its example is skipped.
+        self.assertEqual(results['files.LookupError/decode']['examples'], 2)
+
+    def test_failure(self):
+        api = TowerOfStone([('files.stone', spec_text)]).parse()
+        folder = tempfile.mkdtemp()
+        try:
+            modules, serializers = generate_python_types(api, folder)
+        finally:
+            shutil.rmtree(folder)
+        validator = modules['files'].Listing_validator
+        self.assertIsNone(_round_trip(serializers, validator, {'entries': [], 'cursor': 'c'}))
+        self.assertIn("missing required field 'cursor'",
+                      _round_trip(serializers, validator, {'entries': []}))
+        # Errors other than validation errors are failures too.
+        self.assertIn('Error', _round_trip(serializers, None, {'cursor': 'c'}))
+
+    def test_main(self):
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'files.stone')
+            with open(path, 'wb') as f:
+                f.write(spec_text.encode('utf-8'))
+            self.assertEqual(main([path, '--number', '1', '--repeat', '1']), 0)
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,20 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import textwrap
+import types
 import unittest
 
+import mock
+
 from stone.api import (
+    Api,
     ApiNamespace,
     ApiRoute,
 )
@@ -15,7 +26,9 @@ from stone.data_type import (
     Struct,
     StructField,
 )
-from stone.generator import CodeGenerator
+from stone.compiler import Compiler
+from stone.generator import CodeGenerator, _fill, _LruCache
+from stone.output import MANIFEST_FILENAME
 
 _MYPY = False
 if _MYPY:
@@ -40,6 +53,30 @@ class _TesterCmdline(CodeGenerator):
     def generate(self, api):
         pass
 
+class _FileWriter(CodeGenerator):
+    """Writes the files in its class attribute."""
+
+    files = {}  # type: typing.Dict[typing.Text, typing.Text]
+    namespace_scoped = True
+
+    def generate(self, api):
+        for path, text in sorted(self.files.items()):
+            with self.output_to_relative_path(path):
+                self.emit_raw(text)
+
+class _ParallelFileWriter(_FileWriter):
+    """Writes the files in its class attribute, one per work unit."""
+
+    def generate(self, api):
+        self.run_work_units([functools.partial(self._write, path, text)
+                             for path, text in sorted(self.files.items())])
+
+    def _write(self, path, text):
+        if text is None:
+            raise ValueError('No text for %s' % path)
+        with self.output_to_relative_path(path):
+            self.emit_raw(text)
+
 class TestGenerator(unittest.TestCase):
     """
     Tests the interface exposed to Generators.
@@ -70,6 +107,52 @@ class TestGenerator(unittest.TestCase):
         self.assertEqual(t.filter_out_none_valued_keys({'a': None}), {})
         self.assertEqual(t.filter_out_none_valued_keys({'a': None, 'b': 3}), {'b': 3})
 
+    def test_process_doc(self):
+        def handler(tag, val):
+            return '<%s %s>' % (tag, val)
+
+        doc = 'See :field:`a` and :route:`b/c`, not `d`.'
+        for _ in range(2):
+            self.assertEqual(_Tester.process_doc(doc, handler),
+                             'See <field a> and <route b/c>, not `d`.')
+        # Cached references are passed to each handler.
+        self.assertEqual(_Tester.process_doc(doc, lambda tag, val: val),
+                         'See a and b/c, not `d`.')
+        self.assertEqual(_Tester.process_doc('No refs.', handler), 'No refs.')
+        self.assertEqual(_Tester.process_doc('', handler), '')
+
+    def test_fill(self):
+        texts = ['', ' ', 'a', 'word', 'a few words', 'trailing space ',
+                 ' leading space', 'two  spaces', 'tab\there', 'new\nline',
+                 'non-breaking\xa0', 'a' * 30, 'hyphen-ated words that go on']
+        for text in texts:
+            for width in (12, 20, 40):
+                for prefix in ('', '# ', ' ' * 8):
+                    for args in ((False, False), (True, True)):
+                        expected = textwrap.fill(
+                            text, initial_indent=prefix, subsequent_indent=prefix + '  ',
+                            width=width, break_long_words=args[0], break_on_hyphens=args[1])
+                        for _ in range(2):
+                            self.assertEqual(
+                                _fill(text, prefix, prefix + '  ', width, *args), expected,
+                                (text, width, prefix, args))
+
+    def test_lru_cache(self):
+        cache = _LruCache(6)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.put('c', 3)
+        # Using 'a' keeps it, while 'b' and 'c' are evicted.
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('d', 4)
+        cache.put('e', 5)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(cache.get('e'), 5)
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+
     def test_code_generator_basic_emitters(self):
         t = _Tester(None, [])
 
@@ -223,6 +306,132 @@ int sq(int x) <
         self.assertEqual(t.output_buffer_to_string(), expected)
         t.clear_output_buffer()
 
+    def test_output_files(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        module = types.ModuleType(str('writer'))
+        module._FileWriter = _FileWriter  # type: ignore
+
+        def build(files, clean_build=False, namespaces=None, manifest=True):
+            _FileWriter.files = files
+            c = Compiler(Api('0.1b1'), module, [], tmp_dir, clean_build=clean_build,
+                         namespaces=namespaces, manifest=manifest)
+            c.build()
+            return c.stale_files
+
+        def mtimes():
+            res = {}
+            for name in ('a.txt', os.path.join('sub', 'b.txt')):
+                path = os.path.join(tmp_dir, name)
+                if os.path.exists(path):
+                    res[name] = os.path.getmtime(path)
+                    # Make any rewrite visible regardless of timer resolution.
+                    os.utime(path, (1, 1))
+            return res
+
+        self.assertEqual(build({'a.txt': 'a\n', 'sub/b.txt': 'b\n'}), [])
+        mtimes()
+        self.assertEqual(build({'a.txt': 'a\n', 'sub/b.txt': 'b\n'}), [])
+        self.assertEqual(mtimes(), {'a.txt': 1, os.path.join('sub', 'b.txt'): 1})
+        self.assertEqual(build({'a.txt': 'a\n', 'sub/b.txt': 'c\n'}), [])
+        self.assertNotEqual(mtimes()[os.path.join('sub', 'b.txt')], 1)
+        with open(os.path.join(tmp_dir, 'sub', 'b.txt')) as f:
+            self.assertEqual(f.read(), 'c\n')
+
+        with open(os.path.join(tmp_dir, MANIFEST_FILENAME)) as f:
+            manifest = json.load(f)['generators']['_FileWriter']
+        self.assertEqual(sorted(manifest['files']), ['a.txt', 'sub/b.txt'])
+        # The manifest has the same permissions as the files generated.
+        self.assertEqual(os.stat(os.path.join(tmp_dir, MANIFEST_FILENAME)).st_mode & 0o777,
+                         os.stat(os.path.join(tmp_dir, 'a.txt')).st_mode & 0o777)
+
+        # Files that are no longer written are stale until they're deleted.
+        self.assertEqual(build({'a.txt': 'a\n'}), ['sub/b.txt'])
+        self.assertEqual(build({'a.txt': 'a\n'}), ['sub/b.txt'])
+        # Unless only some namespaces were regenerated.
+        self.assertEqual(build({}, namespaces=set()), ['sub/b.txt'])
+        os.remove(os.path.join(tmp_dir, 'sub', 'b.txt'))
+        self.assertEqual(build({'a.txt': 'a\n'}), [])
+        self.assertTrue(os.path.exists(os.path.join(tmp_dir, 'a.txt')))
+
+        self.assertEqual(build({'sub/b.txt': 'b\n'}), ['a.txt'])
+        self.assertEqual(build({'sub/b.txt': 'b\n'}, clean_build=True), [])
+        self.assertFalse(os.path.exists(os.path.join(tmp_dir, 'a.txt')))
+
+        # Without a manifest, none is written and no files are stale.
+        self.assertEqual(build({'a.txt': 'a\n'}, clean_build=True, manifest=False), [])
+        self.assertEqual(os.listdir(tmp_dir), ['a.txt'])
+        self.assertEqual(build({'sub/b.txt': 'b\n'}, manifest=False), [])
+        self.assertFalse(os.path.exists(os.path.join(tmp_dir, MANIFEST_FILENAME)))
+
+    def test_run_work_units(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        files = {'a.txt': 'a\n', 'sub/b.txt': 'b\n', 'sub/c.txt': 'c\n'}
+        _ParallelFileWriter.files = files
+        for jobs in (1, 2):
+            g = _ParallelFileWriter(os.path.join(tmp_dir, str(jobs)), [])
+            g.jobs = jobs
+            g.generate(None)
+            self.assertEqual(sorted(g.output_files), sorted(files))
+            for path, text in files.items():
+                with open(os.path.join(tmp_dir, str(jobs), path)) as f:
+                    self.assertEqual(f.read(), text)
+
+        # Errors in worker processes are raised with their traceback.
+        _ParallelFileWriter.files = {'a.txt': 'a\n', 'b.txt': None}
+        g = _ParallelFileWriter(os.path.join(tmp_dir, 'error'), [])
+        g.jobs = 2
+        with self.assertRaises(Exception) as cm:
+            g.generate(None)
+        self.assertIn('No text for b.txt', str(cm.exception))
+
+        # On macOS, units run in this process, so their changes are kept.
+        ran = []
+        g.jobs = 2
+        with mock.patch('sys.platform', 'darwin'):
+            g.run_work_units([functools.partial(ran.append, i) for i in range(2)])
+        self.assertEqual(ran, [0, 1])
+
+    def test_output_spill(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        lines = ['line %d' % i for i in range(100)]
+        expected = ''.join('    %s\n' % line for line in lines)
+
+        def write(threshold):
+            g = _Tester(tmp_dir, [])
+            g.output_spill_threshold = threshold
+            with g.output_to_relative_path('a.txt'):
+                with g.indent():
+                    for line in lines:
+                        g.emit(line)
+                # Spilled lines are no longer buffered.
+                self.assertLess(len(''.join(g.output)), 100)
+                with self.assertRaises(AssertionError):
+                    g.output_buffer_to_string()
+                self.assertEqual(g.lineno, 101)
+            return g
+
+        g = write(50)
+        with open(os.path.join(tmp_dir, 'a.txt')) as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(g.output_files,
+                         {'a.txt': hashlib.sha256(expected.encode('utf-8')).hexdigest()})
+        self.assertEqual(g.unchanged_file_count, 0)
+        self.assertEqual(os.listdir(tmp_dir), ['a.txt'])
+        self.assertEqual(write(50).unchanged_file_count, 1)
+        self.assertEqual(os.listdir(tmp_dir), ['a.txt'])
+
+        # Temporary files are removed if generation fails.
+        g = _Tester(tmp_dir, [])
+        g.output_spill_threshold = 5
+        with self.assertRaises(ValueError):
+            with g.output_to_relative_path('b.txt'):
+                g.emit('a long enough line')
+                raise ValueError()
+        self.assertEqual(os.listdir(tmp_dir), ['a.txt'])
+
     def test_generator_cmdline(self):
         t = _TesterCmdline(None, ['-v'])
         self.assertTrue(t.args.verbose)
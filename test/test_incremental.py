@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from stone.incremental import (
+    namespace_dependencies,
+    namespace_fingerprints,
+    spec_digest,
+)
+from stone.lang.tower import TowerOfStone
+
+ns1_text = textwrap.dedent("""\
+    namespace ns1
+
+    import ns2
+
+    struct S
+        f ns2.T
+    """)
+
+ns2_text = textwrap.dedent("""\
+    namespace ns2
+
+    struct T
+        g String
+    """)
+
+ns3_text = textwrap.dedent("""\
+    namespace ns3
+
+    import ns2
+
+    struct T3 extends ns2.T
+        h String
+    """)
+
+ns4_text = textwrap.dedent("""\
+    namespace ns4
+
+    struct U
+        i String
+    """)
+
+
+def _fingerprints(specs):
+    tower = TowerOfStone(specs)
+    api = tower.parse()
+    spec_digests = {path: spec_digest(text) for path, text in specs}
+    return namespace_fingerprints(api, tower.spec_paths_by_namespace, spec_digests)
+
+
+class TestIncremental(unittest.TestCase):
+
+    def test_namespace_dependencies(self):
+        api = TowerOfStone([('ns1.stone', ns1_text), ('ns2.stone', ns2_text),
+                            ('ns3.stone', ns3_text), ('ns4.stone', ns4_text)]).parse()
+        # ns2 depends on ns3, since ns3 declares a subtype of one of its structs.
+        self.assertEqual(namespace_dependencies(api), {
+            'ns1': {'ns2'},
+            'ns2': {'ns3'},
+            'ns3': {'ns2'},
+            'ns4': set(),
+        })
+
+    def test_namespace_fingerprints(self):
+        specs = [('ns1.stone', ns1_text), ('ns2.stone', ns2_text),
+                 ('ns3.stone', ns3_text), ('ns4.stone', ns4_text)]
+        fingerprints = _fingerprints(specs)
+
+        changed = _fingerprints(specs[:2] + [('ns3.stone', ns3_text + '    j String\n')] +
+                                specs[3:])
+        self.assertEqual(sorted(n for n in fingerprints if fingerprints[n] != changed[n]),
+                         ['ns1', 'ns2', 'ns3'])
+
+        # Changes to the route schema affect every namespace.
+        stone_cfg_text = 'namespace stone_cfg\n\nstruct Route\n    hide Boolean?\n'
+        changed = _fingerprints(specs + [('stone_cfg.stone', stone_cfg_text)])
+        self.assertTrue(all(fingerprints[n] != changed[n] for n in fingerprints))
+
+        # Only the contents of specs matter.
+        moved = _fingerprints([('other/' + path, text) for path, text in specs])
+        self.assertEqual(moved, fingerprints)
+
+    def test_cli(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        spec_paths = []
+        for name, text in (('ns1', ns1_text), ('ns2', ns2_text), ('ns4', ns4_text)):
+            spec_path = os.path.join(tmp_dir, name + '.stone')
+            with open(spec_path, 'w') as f:
+                f.write(text)
+            spec_paths.append(spec_path)
+        output = os.path.join(tmp_dir, 'output')
+
+        def run_stone(extra_args=()):
+            p = subprocess.Popen([sys.executable, '-m', 'stone.cli', '-v', 'python_types',
+                                  output] + spec_paths + ['--incremental'] + list(extra_args),
+                                 stderr=subprocess.PIPE)
+            _, stderr = p.communicate()
+            stderr = stderr.decode('utf-8')
+            self.assertEqual(p.wait(), 0, stderr)
+            return stderr
+
+        self.assertIn('Regenerating all namespaces', run_stone())
+        # The build state has the same permissions as the files generated.
+        self.assertEqual(os.stat(os.path.join(output, '.stone-build.json')).st_mode & 0o777,
+                         os.stat(os.path.join(output, 'ns1.py')).st_mode & 0o777)
+        stderr = run_stone()
+        self.assertIn('No spec changed since the last build.', stderr)
+        self.assertNotIn('Parsing spec', stderr)
+
+        with open(spec_paths[1], 'a') as f:
+            f.write('    h String\n')
+        stderr = run_stone()
+        self.assertIn('Namespaces changed since the last build with python_types: ns1, ns2', stderr)
+        self.assertIn('ns2.py', stderr)
+        self.assertNotIn('ns4.py', stderr)
+        with open(os.path.join(output, 'ns2.py')) as f:
+            self.assertIn("'h'", f.read())
+
+        # Different arguments, such as route filters, regenerate everything.
+        self.assertIn('Regenerating all namespaces', run_stone(['-f', 'hide=true']))
+
+
+if __name__ == '__main__':
+    unittest.main()
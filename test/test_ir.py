@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from stone import ir
+from stone.ir import InvalidIR, read_api, write_api
+from stone.lang.parser import StoneLocation
+from stone.lang.tower import TowerOfStone
+
+ns1_text = textwrap.dedent("""\
+    namespace ns1
+
+    import ns2
+
+    route get(GetArg, ns2.U, Void)
+        "Gets."
+        attrs
+            hide = true
+
+    struct GetArg
+        "Doc."
+        f ns2.U
+        g String = "x"
+
+        example default
+            f = a
+            g = "y"
+    """)
+
+ns2_text = textwrap.dedent("""\
+    namespace ns2
+
+    union U
+        a
+        b Dims
+            struct
+                w UInt64
+                h UInt64
+    """)
+
+stone_cfg_text = textwrap.dedent("""\
+    namespace stone_cfg
+
+    struct Route
+        hide Boolean?
+    """)
+
+
+def _round_trip(api):
+    f = io.BytesIO()
+    write_api(api, f)
+    f.seek(0)
+    return read_api(f)
+
+
+class TestIR(unittest.TestCase):
+
+    def test_round_trip(self):
+        api = TowerOfStone([('ns1.stone', ns1_text), ('ns2.stone', ns2_text),
+                            ('stone_cfg.stone', stone_cfg_text)]).parse()
+        loaded = _round_trip(api)
+
+        self.assertEqual(list(loaded.namespaces), list(api.namespaces))
+        self.assertEqual(loaded.version, api.version)
+        for name in api.namespaces:
+            self.assertEqual(repr(loaded.namespaces[name].data_types),
+                             repr(api.namespaces[name].data_types))
+        ns1 = loaded.namespaces['ns1']
+        ns2 = loaded.namespaces['ns2']
+        route = ns1.route_by_name['get']
+        self.assertEqual(route.doc, 'Gets.')
+        self.assertEqual(route.attrs, {'hide': True})
+        self.assertEqual([f.name for f in loaded.route_schema.fields], ['hide'])
+        # References between objects are kept.
+        arg = ns1.data_type_by_name['GetArg']
+        self.assertIs(route.arg_data_type, arg)
+        self.assertIs(route.result_data_type, ns2.data_type_by_name['U'])
+        self.assertIs(arg.all_fields[0].data_type, ns2.data_type_by_name['U'])
+        self.assertIs(arg.namespace, ns1)
+        self.assertEqual(ns1.get_imported_namespaces(), [ns2])
+        self.assertEqual(arg.get_examples()['default'].value,
+                         {'f': {'.tag': 'a'}, 'g': 'y'})
+
+    def test_compact(self):
+        specs = [('ns1.stone', ns1_text), ('ns2.stone', ns2_text),
+                 ('stone_cfg.stone', stone_cfg_text)]
+        api = TowerOfStone(specs).parse()
+        compact = TowerOfStone(specs, compact=True).parse()
+        for name in api.namespaces:
+            self.assertEqual(repr(compact.namespaces[name].data_types),
+                             repr(api.namespaces[name].data_types))
+
+        loaded = _round_trip(compact)
+        ns1 = loaded.namespaces['ns1']
+        arg = ns1.data_type_by_name['GetArg']
+        route = ns1.route_by_name['get']
+        # Only the locations of elements are kept.
+        self.assertIsInstance(arg._token, StoneLocation)
+        self.assertEqual((arg._token.path, arg._token.lineno), ('ns1.stone', 10))
+        self.assertEqual((arg.fields[1]._token.path, arg.fields[1]._token.lineno),
+                         ('ns1.stone', 13))
+        self.assertEqual((route._token.path, route._token.lineno), ('ns1.stone', 5))
+        self.assertIsInstance(loaded.route_schema._token, StoneLocation)
+        self.assertEqual(arg.get_examples()['default'].value,
+                         {'f': {'.tag': 'a'}, 'g': 'y'})
+        self.assertEqual(arg.get_examples()['default']._token.lineno, 15)
+
+    def test_long_reference_chain(self):
+        # Pickling this in one go would exceed the recursion limit.
+        n = 2000
+        lines = ['namespace chain']
+        for i in range(n - 1):
+            lines.extend(['struct S%d' % i, '    next S%d?' % (i + 1)])
+        lines.extend(['struct S%d' % (n - 1), '    value UInt64'])
+        api = TowerOfStone([('chain.stone', '\n'.join(lines) + '\n')]).parse()
+
+        data_type = _round_trip(api).namespaces['chain'].data_type_by_name['S0']
+        for _ in range(n - 1):
+            data_type = data_type.all_fields[0].data_type.data_type
+        self.assertEqual(data_type.name, 'S%d' % (n - 1))
+
+    def test_invalid_snapshots(self):
+        api = TowerOfStone([('ns2.stone', ns2_text)]).parse()
+        f = io.BytesIO()
+        write_api(api, f)
+        data = f.getvalue()
+
+        with self.assertRaises(InvalidIR) as cm:
+            read_api(io.BytesIO(b'namespace ns2\n'))
+        self.assertEqual(str(cm.exception), 'Not a Stone IR snapshot.')
+
+        with self.assertRaises(InvalidIR) as cm:
+            read_api(io.BytesIO(data[:len(data) // 2]))
+        self.assertIn('corrupted', str(cm.exception))
+
+        header, body = data.split(b'\n', 1)
+        magic, format_version, python_version, protocol = header.split()
+        newer = b' '.join([magic, str(ir.IR_FORMAT_VERSION + 1).encode('ascii'),
+                           python_version, protocol])
+        with self.assertRaises(InvalidIR) as cm:
+            read_api(io.BytesIO(newer + b'\n' + body))
+        self.assertIn('format version', str(cm.exception))
+
+        # Such as a snapshot written by Python 3.8, read by Python 3.7.
+        newer = b' '.join([magic, format_version, python_version,
+                           str(ir.pickle.HIGHEST_PROTOCOL + 1).encode('ascii')])
+        with self.assertRaises(InvalidIR) as cm:
+            read_api(io.BytesIO(newer + b'\n' + body))
+        self.assertIn('pickle protocol', str(cm.exception))
+
+    def test_cli(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        spec_paths = []
+        for name, text in (('ns1', ns1_text), ('ns2', ns2_text),
+                           ('stone_cfg', stone_cfg_text)):
+            spec_path = os.path.join(tmp_dir, name + '.stone')
+            with open(spec_path, 'w') as f:
+                f.write(text)
+            spec_paths.append(spec_path)
+        ir_path = os.path.join(tmp_dir, 'api.ir')
+        from_specs = os.path.join(tmp_dir, 'from_specs')
+        from_ir = os.path.join(tmp_dir, 'from_ir')
+
+        def run_stone(args):
+            p = subprocess.Popen([sys.executable, '-m', 'stone.cli'] + args,
+                                 stderr=subprocess.PIPE)
+            _, stderr = p.communicate()
+            return p.wait(), stderr.decode('utf-8')
+
+        status, stderr = run_stone(['python_types', from_specs] + spec_paths +
+                                   ['-a', 'hide', '--emit-ir', ir_path, '--compact-ir'])
+        self.assertEqual(status, 0, stderr)
+        status, stderr = run_stone(['python_types', from_ir, '--from-ir', ir_path,
+                                    '-a', 'hide'])
+        self.assertEqual(status, 0, stderr)
+
+        self.assertEqual(sorted(os.listdir(from_ir)), sorted(os.listdir(from_specs)))
+        for name in os.listdir(from_specs):
+            with open(os.path.join(from_specs, name)) as f1, \
+                    open(os.path.join(from_ir, name)) as f2:
+                self.assertEqual(f1.read(), f2.read(), name)
+
+        status, stderr = run_stone(['python_types', from_ir] + spec_paths +
+                                   ['--from-ir', ir_path])
+        self.assertEqual(status, 1)
+        self.assertIn('Do not specify specifications with --from-ir', stderr)
+        status, stderr = run_stone(['python_types', from_ir, '--from-ir', spec_paths[0]])
+        self.assertEqual(status, 1)
+        self.assertIn('Not a Stone IR snapshot', stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import importlib
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from six.moves import socketserver
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from stone.bench import transport as transport_bench
+
+stone_cfg_spec = """\
+namespace stone_cfg
+
+struct Route
+    style String?
+    cacheable Boolean?
+    cache_ttl Int32?
+"""
+
+calc_spec = """\
+namespace calc
+
+route eval(Expression, Result, EvalError)
+
+route upload(UploadArg, Result, Void)
+    attrs
+        style = "upload"
+
+route download(Void, Result, Void)
+    attrs
+        style = "download"
+
+route square(SquareArg, Result, Void)
+    attrs
+        cacheable = true
+        cache_ttl = 60
+
+struct Expression
+    left Int64
+    right Int64
+
+struct Result
+    answer Int64
+
+union EvalError
+    overflow
+
+struct UploadArg
+    name String
+
+struct SquareArg
+    n Int64
+"""
+
+
+def _run_stone(args):
+    p = subprocess.Popen(
+        [sys.executable, '-m', 'stone.cli'] + args,
+        stderr=subprocess.PIPE)
+    _, stderr = p.communicate()
+    if p.wait() != 0:
+        raise AssertionError('Could not execute stone tool: %s' %
+                             stderr.decode('utf-8'))
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """
+    Serves a dispatcher over HTTP/1.1 with keep-alive, which the handler of
+    wsgiref does not support.
+    """
+
+    protocol_version = str('HTTP/1.1')
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        # Headers and body are written separately, so avoid waiting on a
+        # delayed ack before sending the body.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.num_connections += 1
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        headers = {}
+        arg = self.headers.get('Stone-API-Arg')
+        if arg is not None:
+            headers['stone-api-arg'] = arg
+        response = self.server.dispatcher.dispatch(self.path, body, headers)
+        self.send_response(response.status)
+        for name, value in response.headers:
+            self.send_header(str(name), str(value))
+        self.send_header(str('Content-Length'), str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class _StandInServer(socketserver.ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+    num_connections = 0
+
+
+class TestGeneratedPythonClient(unittest.TestCase):
+    """
+    Tests a generated client that uses stone_transport against a local server
+    generated by python_server.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        pkg_dir = os.path.join(cls.tmp_dir, 'client_test_pkg')
+        os.mkdir(pkg_dir)
+        open(os.path.join(pkg_dir, '__init__.py'), 'w').close()
+        spec_paths = []
+        for name, text in (('stone_cfg', stone_cfg_spec), ('calc', calc_spec)):
+            spec_path = os.path.join(cls.tmp_dir, name + '.stone')
+            with open(spec_path, 'w') as f:
+                f.write(text)
+            spec_paths.append(spec_path)
+
+        attrs = ['-a', 'style', '-a', 'cacheable', '-a', 'cache_ttl']
+        _run_stone(['python_types', pkg_dir] + spec_paths + attrs)
+        _run_stone(['python_server', pkg_dir] + spec_paths + attrs +
+                   ['--', '-m', 'server', '-c', 'Server'])
+        _run_stone(['python_client', pkg_dir] + spec_paths + attrs +
+                   ['--', '-m', 'client', '-c', 'Client', '-t', 'client_test_pkg'])
+
+        sys.path.insert(0, cls.tmp_dir)
+        calc = importlib.import_module('client_test_pkg.calc')
+        server = importlib.import_module('client_test_pkg.server')
+        bs = importlib.import_module('client_test_pkg.stone_server')
+        client = importlib.import_module('client_test_pkg.client')
+        cls.transport = importlib.import_module('client_test_pkg.stone_transport')
+        cls.stone_cache = importlib.import_module('client_test_pkg.stone_cache')
+
+        class CalcServer(server.Server):
+
+            def calc_eval(self, arg):
+                answer = arg.left + arg.right
+                if answer > 2 ** 31:
+                    raise bs.RouteError(calc.EvalError.overflow)
+                return calc.Result(answer=answer)
+
+            def calc_upload(self, arg, f):
+                return calc.Result(answer=len(arg.name) + len(f))
+
+            def calc_download(self, arg):
+                return calc.Result(answer=3), b'\x00abc'
+
+            def calc_square(self, arg):
+                self.square_calls += 1
+                self.square_gate.wait()
+                return calc.Result(answer=arg.n * arg.n)
+
+        class Client(cls.transport.HttpTransport, client.Client):
+            pass
+
+        cls.calc = calc
+        cls.httpd = _StandInServer(('127.0.0.1', 0), _StandInHandler)
+        cls.httpd.dispatcher = CalcServer()
+        cls.httpd.dispatcher.square_gate = threading.Event()
+        t = threading.Thread(target=cls.httpd.serve_forever)
+        t.daemon = True
+        t.start()
+        cls.Client = Client
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+        sys.path.remove(cls.tmp_dir)
+        shutil.rmtree(cls.tmp_dir)
+
+    def setUp(self):
+        self.httpd.num_connections = 0
+        self.httpd.dispatcher.square_calls = 0
+        self.httpd.dispatcher.square_gate.set()
+
+    def _client(self, **kwargs):
+        c = self.Client('127.0.0.1', self.httpd.server_port, scheme='http', **kwargs)
+        self.addCleanup(c.close)
+        return c
+
+    def test_rpc_reuses_connection(self):
+        c = self._client()
+        for i in range(5):
+            self.assertEqual(c.calc_eval(i, 1).answer, i + 1)
+        self.assertEqual(self.httpd.num_connections, 1)
+
+    def test_route_error(self):
+        c = self._client()
+        with self.assertRaises(self.transport.ApiError) as cm:
+            c.calc_eval(2 ** 31, 1)
+        self.assertTrue(cm.exception.error.is_overflow())
+        # The connection is still usable after an error response.
+        self.assertEqual(c.calc_eval(1, 1).answer, 2)
+        self.assertEqual(self.httpd.num_connections, 1)
+
+    def test_http_error(self):
+        c = self._client()
+        with self.assertRaises(self.transport.HttpError) as cm:
+            c.request(self.calc.eval, 'missing',
+                      self.calc.Expression(left=1, right=1))
+        self.assertEqual(cm.exception.status, 404)
+
+    def test_upload_and_download(self):
+        c = self._client()
+        self.assertEqual(c.calc_upload(b'\xff' * 10, 'abc').answer, 13)
+        result, body = c.calc_download()
+        self.assertEqual(result.answer, 3)
+        self.assertEqual(body, b'\x00abc')
+
+        path = os.path.join(self.tmp_dir, 'download')
+        self.assertEqual(c.calc_download_to_file(path).answer, 3)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'\x00abc')
+
+    def test_retry_on_closed_connection(self):
+        c = self._client()
+        self.assertEqual(c.calc_eval(1, 1).answer, 2)
+        # Simulate the server closing an idle connection.
+        conn, _ = c._pool.get()
+        conn.sock.shutdown(2)
+        c._pool.put(conn)
+        self.assertEqual(c.calc_eval(2, 2).answer, 4)
+        self.assertEqual(self.httpd.num_connections, 2)
+
+    def test_no_retry_on_timeout(self):
+        c = self._client(timeout=0.5)
+        self.assertEqual(c.calc_eval(1, 1).answer, 2)
+        # The server accepts the request on the reused connection, but stalls.
+        gate = self.httpd.dispatcher.square_gate
+        gate.clear()
+        with self.assertRaises(socket.timeout):
+            c.calc_square(3)
+        gate.set()
+        time.sleep(0.2)
+        self.assertEqual(self.httpd.dispatcher.square_calls, 1)
+
+    def test_concurrent_requests(self):
+        c = self._client(pool_size=2)
+        errors = []
+
+        def run():
+            try:
+                for i in range(10):
+                    assert c.calc_eval(i, i).answer == 2 * i
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(c._pool._idle), 2)
+
+    def test_cacheable_route(self):
+        c = self._client()
+        self.assertEqual(c.calc_square(3).answer, 9)
+        self.assertEqual(c.calc_square(3).answer, 9)
+        self.assertEqual(c.calc_square(4).answer, 16)
+        self.assertEqual(self.httpd.dispatcher.square_calls, 2)
+        self.assertEqual((c.route_cache.hits, c.route_cache.misses), (1, 2))
+        # Routes without the attribute are not cached.
+        c.calc_eval(1, 1)
+        self.assertEqual(len(c.route_cache), 2)
+
+        c.route_cache.invalidate(
+            self.calc.square, self.calc.SquareArg(n=3))
+        self.assertEqual(c.calc_square(3).answer, 9)
+        self.assertEqual(self.httpd.dispatcher.square_calls, 3)
+        c.route_cache.invalidate(self.calc.square)
+        self.assertEqual(len(c.route_cache), 0)
+
+    def test_route_cache_ttl_and_size(self):
+        now = [0]
+        c = self._client()
+        c.route_cache_maxsize = 2
+        c._route_cache = self.stone_cache.RouteCache(
+            c.route_cache_maxsize, clock=lambda: now[0])
+        for i in (1, 2, 3):
+            c.calc_square(i)
+        self.assertEqual(len(c.route_cache), 2)
+        c.calc_square(3)
+        self.assertEqual(self.httpd.dispatcher.square_calls, 3)
+        # The least recently used result was evicted.
+        c.calc_square(1)
+        self.assertEqual(self.httpd.dispatcher.square_calls, 4)
+        # Results expire after the ttl of the route, which is 60 seconds.
+        now[0] = 61
+        c.calc_square(1)
+        self.assertEqual(self.httpd.dispatcher.square_calls, 5)
+
+    def test_route_cache_coalesces_calls(self):
+        c = self._client()
+        gate = self.httpd.dispatcher.square_gate
+        gate.clear()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(c.calc_square(5)))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        while c.route_cache.coalesced < 3:
+            time.sleep(0.01)
+        gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual([r.answer for r in results], [25] * 4)
+        self.assertEqual(self.httpd.dispatcher.square_calls, 1)
+        self.assertEqual(c.route_cache.misses, 1)
+
+    def test_route_cache_interrupted_call(self):
+        cache = self.stone_cache.RouteCache()
+        route, arg = self.calc.square, self.calc.SquareArg(n=2)
+        started = threading.Event()
+        gate = threading.Event()
+
+        def interrupted():
+            started.set()
+            gate.wait()
+            raise KeyboardInterrupt
+
+        def leader():
+            try:
+                cache.call(route, arg, None, interrupted)
+            except KeyboardInterrupt:
+                pass
+
+        results = []
+        t1 = threading.Thread(target=leader)
+        t1.start()
+        started.wait()
+        t2 = threading.Thread(
+            target=lambda: results.append(cache.call(route, arg, None, lambda: 4)))
+        t2.start()
+        while cache.coalesced < 1:
+            time.sleep(0.01)
+        gate.set()
+        t1.join()
+        t2.join()
+        # The waiting call makes the call again instead of returning nothing.
+        self.assertEqual(results, [4])
+        self.assertEqual(cache.misses, 2)
+
+    def test_route_cache_invalidate_in_flight(self):
+        cache = self.stone_cache.RouteCache()
+        arg = self.calc.SquareArg(n=2)
+
+        def invalidating(route, invalidated_route, result):
+            def func():
+                cache.invalidate(invalidated_route)
+                return result
+            return cache.call(route, arg, None, func)
+
+        # Invalidating another route doesn't stop the result from being
+        # cached, but invalidating this one does.
+        invalidating(self.calc.square, self.calc.eval, 4)
+        self.assertEqual(len(cache), 1)
+        cache.invalidate()
+        invalidating(self.calc.square, self.calc.square, 4)
+        self.assertEqual(len(cache), 0)
+
+
+class TestTransportBenchmarks(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        results = transport_bench.run_benchmarks(scale=0.01, repeat=1)
+        self.assertEqual(list(results), ['pooled', 'per call', 'pooled, 4 threads',
+                                         'per call, 4 threads'])
+        for result in results.values():
+            self.assertGreaterEqual(result['seconds'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import importlib
+import json
+import os
+import shutil
+import six
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+from stone.bench import server as server_bench
+
+stone_cfg_spec = """\
+namespace stone_cfg
+
+struct Route
+    style String?
+"""
+
+calc_spec = """\
+namespace calc
+
+route eval(Expression, Result, EvalError)
+    "Evaluates an expression."
+
+route ping(Void, Void, Void)
+
+route upload(UploadArg, Result, Void)
+    attrs
+        style = "upload"
+
+route download(Void, Result, Void)
+    attrs
+        style = "download"
+
+struct Expression
+    op Operator = add
+    left Int64
+    right Int64
+
+union Operator
+    add
+    sub
+
+struct Result
+    answer Int64
+
+union EvalError
+    overflow
+
+struct UploadArg
+    name String
+"""
+
+
+def _run_stone(args):
+    p = subprocess.Popen(
+        [sys.executable, '-m', 'stone.cli'] + args,
+        stderr=subprocess.PIPE)
+    _, stderr = p.communicate()
+    if p.wait() != 0:
+        raise AssertionError('Could not execute stone tool: %s' %
+                             stderr.decode('utf-8'))
+
+
+class _QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class TestGeneratedPythonServer(unittest.TestCase):
+    """
+    Tests the dispatcher emitted by the python_server generator.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        pkg_dir = os.path.join(cls.tmp_dir, 'server_test_pkg')
+        os.mkdir(pkg_dir)
+        open(os.path.join(pkg_dir, '__init__.py'), 'w').close()
+        spec_paths = []
+        for name, text in (('stone_cfg', stone_cfg_spec), ('calc', calc_spec)):
+            spec_path = os.path.join(cls.tmp_dir, name + '.stone')
+            with open(spec_path, 'w') as f:
+                f.write(text)
+            spec_paths.append(spec_path)
+
+        _run_stone(['python_types', pkg_dir] + spec_paths + ['-a', 'style'])
+        _run_stone(['python_server', pkg_dir] + spec_paths +
+                   ['-a', 'style', '--', '-m', 'server', '-c', 'Server'])
+
+        sys.path.insert(0, cls.tmp_dir)
+        cls.calc = importlib.import_module('server_test_pkg.calc')
+        cls.bs = importlib.import_module('server_test_pkg.stone_server')
+        server = importlib.import_module('server_test_pkg.server')
+
+        calc = cls.calc
+        bs = cls.bs
+
+        class CalcServer(server.Server):
+
+            def calc_eval(self, arg):
+                if arg.op.is_add():
+                    answer = arg.left + arg.right
+                else:
+                    answer = arg.left - arg.right
+                if answer > 2 ** 31:
+                    raise bs.RouteError(calc.EvalError.overflow)
+                return calc.Result(answer=answer)
+
+            def calc_ping(self, arg):
+                return None
+
+            def calc_upload(self, arg, f):
+                return calc.Result(answer=len(arg.name) + len(f))
+
+            def calc_download(self, arg):
+                return calc.Result(answer=3), b'abc'
+
+        cls.dispatcher = CalcServer()
+
+    @classmethod
+    def tearDownClass(cls):
+        sys.path.remove(cls.tmp_dir)
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_route_table(self):
+        table = self.dispatcher._route_table
+        self.assertEqual(
+            sorted(table.keys()),
+            ['/calc/download', '/calc/eval', '/calc/ping', '/calc/upload'])
+        self.assertIs(table['/calc/eval'].route, self.calc.eval)
+        self.assertEqual(table['/calc/eval'].style, 'rpc')
+        self.assertEqual(table['/calc/upload'].style, 'upload')
+        self.assertEqual(table['/calc/download'].style, 'download')
+
+    def test_dispatch_rpc(self):
+        r = self.dispatcher.dispatch(
+            '/calc/eval', b'{"left": 2, "right": 3}')
+        self.assertEqual(r.status, 200)
+        self.assertEqual(json.loads(r.body.decode('utf-8')), {'answer': 5})
+
+        r = self.dispatcher.dispatch(
+            '/calc/eval', b'{"op": "sub", "left": 2, "right": 3}')
+        self.assertEqual(r.status, 200)
+        self.assertEqual(json.loads(r.body.decode('utf-8')), {'answer': -1})
+
+        r = self.dispatcher.dispatch('/calc/ping', b'')
+        self.assertEqual(r.status, 200)
+        self.assertEqual(r.body, b'null')
+
+    def test_dispatch_route_error(self):
+        r = self.dispatcher.dispatch(
+            '/calc/eval', b'{"left": 2147483648, "right": 1}')
+        self.assertEqual(r.status, 409)
+        self.assertEqual(json.loads(r.body.decode('utf-8')),
+                         {'.tag': 'overflow'})
+
+    def test_dispatch_bad_request(self):
+        r = self.dispatcher.dispatch('/calc/missing', b'{}')
+        self.assertEqual(r.status, 404)
+        r = self.dispatcher.dispatch('/calc/eval', b'{"left": 2}')
+        self.assertEqual(r.status, 400)
+        r = self.dispatcher.dispatch('/calc/eval', b'not json')
+        self.assertEqual(r.status, 400)
+        r = self.dispatcher.dispatch('/calc/eval', b'{"left": "\xff"}')
+        self.assertEqual(r.status, 400)
+        r = self.dispatcher.dispatch('/calc/upload', b'data')
+        self.assertEqual(r.status, 400)
+
+    def test_dispatch_upload_and_download(self):
+        r = self.dispatcher.dispatch(
+            '/calc/upload', b'data', {'stone-api-arg': '{"name": "ab"}'})
+        self.assertEqual(r.status, 200)
+        self.assertEqual(json.loads(r.body.decode('utf-8')), {'answer': 6})
+
+        r = self.dispatcher.dispatch('/calc/download', b'')
+        self.assertEqual(r.status, 200)
+        self.assertEqual(r.body, b'abc')
+        headers = dict(r.headers)
+        self.assertEqual(json.loads(headers[self.bs.RESULT_HEADER]),
+                         {'answer': 3})
+
+    def test_unimplemented_handler(self):
+        server = importlib.import_module('server_test_pkg.server')
+        with self.assertRaises(NotImplementedError):
+            server.Server().dispatch('/calc/ping', b'')
+
+    def test_wsgi_app(self):
+        httpd = make_server('127.0.0.1', 0, self.dispatcher.wsgi_app,
+                            handler_class=_QuietHandler)
+        t = threading.Thread(target=httpd.serve_forever)
+        t.daemon = True
+        t.start()
+        try:
+            conn = six.moves.http_client.HTTPConnection(
+                '127.0.0.1', httpd.server_port)
+            conn.request('POST', '/calc/eval', b'{"left": 1, "right": 1}')
+            resp = conn.getresponse()
+            self.assertEqual(resp.status, 200)
+            self.assertEqual(json.loads(resp.read().decode('utf-8')),
+                             {'answer': 2})
+
+            conn.request('POST', '/calc/upload', b'xyz',
+                         {'Stone-API-Arg': '{"name": "a"}'})
+            resp = conn.getresponse()
+            self.assertEqual(resp.status, 200)
+            self.assertEqual(json.loads(resp.read().decode('utf-8')),
+                             {'answer': 4})
+
+            conn.request('GET', '/calc/eval')
+            resp = conn.getresponse()
+            resp.read()
+            self.assertEqual(resp.status, 405)
+            conn.close()
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    @unittest.skipIf(sys.version_info < (3, 5), 'ASGI requires async syntax')
+    def test_asgi_app(self):
+        import asyncio  # pylint: disable=import-error,useless-suppression
+
+        app = self.dispatcher.asgi_app
+        self.assertIs(self.dispatcher.asgi_app, app)
+        # This is how uvicorn tells an ASGI 3 application, which it calls
+        # with the scope, receive and send, from an ASGI 2 one.
+        self.assertTrue(asyncio.iscoroutinefunction(app))
+
+        def run(app, scope, messages, sent):
+            def receive():
+                f = asyncio.Future()
+                f.set_result(messages.pop(0))
+                return f
+
+            def send(message):
+                sent.append(message)
+                f = asyncio.Future()
+                f.set_result(None)
+                return f
+
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(app(scope, receive, send))
+            finally:
+                asyncio.set_event_loop(None)
+                loop.close()
+
+        def post(app, path, body, headers=()):
+            sent = []
+            scope = {'type': 'http', 'method': 'POST', 'path': path,
+                     'headers': list(headers)}
+            run(app, scope,
+                [{'type': 'http.request', 'body': body[:1], 'more_body': True},
+                 {'type': 'http.request', 'body': body[1:]}],
+                sent)
+            return sent
+
+        sent = []
+        run(app, {'type': 'lifespan'},
+            [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}], sent)
+        self.assertEqual([m['type'] for m in sent],
+                         ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+        sent = post(app, '/calc/eval', b'{"left": 4, "right": 5}')
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-length', b'13'), sent[0]['headers'])
+        self.assertEqual(json.loads(sent[1]['body'].decode('utf-8')),
+                         {'answer': 9})
+
+        sent = post(app, '/calc/upload', b'xyz', [(b'Stone-API-Arg', b'{"name": "a"}')])
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(json.loads(sent[1]['body'].decode('utf-8')),
+                         {'answer': 4})
+
+        sent = []
+        run(app, {'type': 'http', 'method': 'GET', 'path': '/calc/eval'}, [], sent)
+        self.assertEqual(sent[0]['status'], 405)
+
+        # The server is told of the exception after the response is sent.
+        server = importlib.import_module('server_test_pkg.server')
+        sent = []
+        with self.assertRaises(NotImplementedError):
+            run(server.Server().asgi_app, {'type': 'http', 'method': 'POST',
+                                           'path': '/calc/ping'},
+                [{'type': 'http.request', 'body': b''}], sent)
+        self.assertEqual(sent[0]['status'], 500)
+
+
+class TestServerBenchmarks(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        results = server_bench.run_benchmarks(scale=0.001, repeat=1)
+        self.assertEqual(list(results), ['dispatch', 'wsgi', 'http (wsgiref)'])
+        for result in results.values():
+            self.assertGreaterEqual(result['seconds'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
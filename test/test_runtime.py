@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from stone.bench.runtime import generate_types, main, run_benchmarks
+from stone.bench.toolchain import load_baseline
+
+
+class TestRuntimeBenchmarks(unittest.TestCase):
+
+    def test_generate_types(self):
+        folder = tempfile.mkdtemp()
+        try:
+            bench, serializers = generate_types(folder)
+        finally:
+            shutil.rmtree(folder)
+        listing = bench.Listing(entries=[bench.Folder(name='a', id='id:a')],
+                                cursor='c', has_more=True)
+        encoded = serializers.json_encode(bench.Listing_validator, listing)
+        decoded = serializers.json_decode(bench.Listing_validator, encoded)
+        self.assertIsInstance(decoded.entries[0], bench.Folder)
+        self.assertEqual(len(bench.Wide._all_fields_), 36)
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(scale=0.01, repeat=1)
+        for case in ('wide struct', 'deep subtype', 'enumerated subtype', 'union with struct',
+                     'big list'):
+            for operation in ('construct', 'access', 'validate', 'encode',
+                              'encode (old style)', 'decode'):
+                result = results['%s/%s' % (case, operation)]
+                self.assertGreaterEqual(result['seconds'], 0)
+        self.assertIn('union with struct/decode (old style)', results)
+        # The old style of structs with enumerated subtypes can't be decoded.
+        self.assertNotIn('big list/decode (old style)', results)
+
+    def test_main(self):
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'baseline.json')
+            args = ['--scale', '0.01', '--repeat', '1', '--no-memory']
+            self.assertEqual(main(args + ['--save-baseline', path]), 0)
+            baseline = load_baseline(path)
+            self.assertIn('wide struct/encode', baseline['results'])
+            self.assertEqual(main(args + ['--baseline', path, '--threshold', '1e9']), 0)
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from stone.server import ServerError, send_request
+
+ns_text = textwrap.dedent("""\
+    namespace ns
+
+    struct S
+        f String
+    """)
+
+
+@unittest.skipUnless(hasattr(__import__('socket'), 'AF_UNIX'), 'Unix sockets are required.')
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.socket_path = os.path.join(self.tmp_dir, 'stone.sock')
+        self.server = subprocess.Popen(
+            [sys.executable, '-m', 'stone.cli', 'serve', '--socket', self.socket_path],
+            stdout=subprocess.PIPE)
+        self.addCleanup(self._stop_server)
+        self.assertIn(b'Serving on', self.server.stdout.readline())
+
+    def _stop_server(self):
+        if self.server.poll() is None:
+            self.server.kill()
+            self.server.wait()
+        self.server.stdout.close()
+
+    def _request(self, args):
+        return send_request(self.socket_path, {'args': args, 'cwd': self.tmp_dir})
+
+    def test_requests(self):
+        with open(os.path.join(self.tmp_dir, 'ns.stone'), 'w') as f:
+            f.write(ns_text)
+
+        response = self._request(['python_types', 'out', 'ns.stone'])
+        self.assertEqual(response['status'], 0, response['stderr'])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'out', 'ns.py')))
+
+        # The parsed spec is reused, and logs are returned.
+        response = self._request(['-v', 'python_types', 'out', 'ns.stone'])
+        self.assertEqual(response['status'], 0, response['stderr'])
+        self.assertIn('Loaded spec ns.stone from cache', response['stderr'])
+
+        # Errors are returned, and the server keeps running.
+        with open(os.path.join(self.tmp_dir, 'bad.stone'), 'w') as f:
+            f.write(ns_text + '    g Strin\n')
+        response = self._request(['python_types', 'out', 'bad.stone'])
+        self.assertEqual(response['status'], 1)
+        self.assertEqual(response['stderr'],
+                         "bad.stone:5: error: Symbol 'Strin' is undefined.\n")
+        response = self._request(['python_types'])
+        self.assertEqual(response['status'], 2)
+        self.assertIn('the generator and output arguments are required', response['stderr'])
+        response = send_request(self.socket_path, {'args': 'python_types'})
+        self.assertEqual(response['status'], 2)
+
+        # A client that goes away without a request doesn't stop the server.
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=no-member
+        conn.connect(self.socket_path)
+        conn.close()
+        response = self._request(['python_types', 'out', 'ns.stone'])
+        self.assertEqual(response['status'], 0, response['stderr'])
+
+        # The command-line client.
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        p = subprocess.Popen(
+            [sys.executable, '-m', 'stone.server', '--socket', self.socket_path,
+             '-v', 'python_types', 'out2', 'ns.stone'],
+            cwd=self.tmp_dir, env=env, stderr=subprocess.PIPE)
+        _, stderr = p.communicate()
+        self.assertEqual(p.wait(), 0, stderr)
+        self.assertIn(b'Loaded spec ns.stone from cache', stderr)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'out2', 'ns.py')))
+
+        self.assertEqual(send_request(self.socket_path, {'shutdown': True})['status'], 0)
+        self.assertEqual(self.server.wait(), 0)
+        self.assertFalse(os.path.exists(self.socket_path))
+        with self.assertRaises(ServerError):
+            self._request(['python_types', 'out', 'ns.stone'])
+
+
+if __name__ == '__main__':
+    unittest.main()
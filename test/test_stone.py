@@ -5,9 +5,14 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 # pylint: disable=deprecated-method,useless-suppression
 
 import datetime
+import pickle
 import textwrap
 import unittest
 
+import mock
+import ply.yacc as yacc
+
+from stone.lang.lexer import StoneLexer, StoneNull
 from stone.lang.parser import (
     StoneNamespace,
     StoneAlias,
@@ -23,7 +28,9 @@ from stone.data_type import (
     Alias,
     Nullable,
     String,
+    StructField,
 )
+from stone.generator import remove_aliases_from_api
 
 
 class TestStone(unittest.TestCase):
@@ -34,6 +41,28 @@ class TestStone(unittest.TestCase):
     def setUp(self):
         self.parser = StoneParser(debug=False)
 
+    def test_parse_tables_up_to_date(self):
+        # stone/lang/parsetab.py holds precomputed LALR tables so that they
+        # aren't generated on every run. If this fails, the grammar changed:
+        # regenerate the tables by constructing StoneParser(debug=True), and
+        # delete the parser.out file it writes next to them.
+        with mock.patch.object(yacc, 'LRGeneratedTable',
+                               side_effect=AssertionError('parse tables are stale')):
+            StoneParser(debug=False)
+
+    def test_lexers_do_not_share_state(self):
+        # Lexers are cloned from a template that is bound to whichever lexer
+        # was used first; each must keep its own errors and position.
+        StoneLexer().input('')
+        bad, good = StoneLexer(), StoneLexer()
+        bad.input('namespace a\n$\n')
+        good.input('namespace b\n')
+        while bad.token():
+            pass
+        self.assertEqual(good.token().value, 'namespace')
+        self.assertEqual(len(bad.errors), 1)
+        self.assertEqual(good.errors, [])
+
     def test_namespace_decl(self):
         text = textwrap.dedent("""\
             namespace files
@@ -890,6 +919,43 @@ class TestStone(unittest.TestCase):
             t.parse()
         self.assertIn('struct can only extend another struct', cm.exception.msg)
 
+    def test_field_caches(self):
+        text = textwrap.dedent("""\
+            namespace test
+
+            alias OptionalString = String?
+
+            struct A
+                a String
+                o OptionalString
+
+            struct B extends A
+                b UInt64
+                c Boolean = false
+            """)
+        api = TowerOfStone([('test.stone', text)]).parse()
+        ns = api.namespaces['test']
+        a = ns.data_type_by_name['A']
+        b = ns.data_type_by_name['B']
+        self.assertEqual([f.name for f in b.all_fields], ['a', 'o', 'b', 'c'])
+        # They're cached once the types are parsed, and are still lists.
+        self.assertIsInstance(b.all_fields, list)
+        self.assertIs(b.all_fields, b.all_fields)
+        self.assertEqual(sorted(b.field_by_name), ['a', 'b', 'c', 'o'])
+        self.assertIs(b.field_by_name['a'], a.all_fields[0])
+
+        # Changing a parent makes the field lists of its subtypes stale.
+        a.prepend_field(StructField('p', String(), None, None))
+        self.assertEqual([f.name for f in b.all_required_fields], ['p', 'a', 'o', 'b'])
+        self.assertIn('p', b.field_by_name)
+
+        # So does removing an alias that was nullable.
+        self.assertEqual([f.name for f in b.all_optional_fields], ['c'])
+        api = remove_aliases_from_api(api)
+        b = api.namespaces['test'].data_type_by_name['B']
+        self.assertEqual([f.name for f in b.all_optional_fields], ['o', 'c'])
+        self.assertEqual([f.name for f in b.all_fields], ['p', 'a', 'b', 'o', 'c'])
+
     def test_union_semantics(self):
         # Test duplicate fields
         text = textwrap.dedent("""\
@@ -2286,6 +2352,70 @@ class TestStone(unittest.TestCase):
             example.text,
             "This is the text for the example. And I guess it's kind of long.")
 
+    def test_examples_references(self):
+        # Test that examples referenced many times are computed once. Each
+        # example refers to the next one twice, so computing the references
+        # each time would take 2 ** 30 steps.
+        lines = ['namespace test']
+        for i in range(30):
+            lines.extend(['struct S%d' % i,
+                          '    a S%d' % (i + 1),
+                          '    b S%d' % (i + 1),
+                          '    example default',
+                          '        a = default',
+                          '        b = default'])
+        lines.extend(['struct S30', '    v UInt64', '    example default', '        v = 1'])
+        t = TowerOfStone([('test.stone', '\n'.join(lines) + '\n')])
+        t.parse()
+        s_dt = t.api.namespaces['test'].data_type_by_name['S28']
+        self.assertEqual(
+            s_dt.get_examples()['default'].value,
+            {'a': {'a': {'v': 1}, 'b': {'v': 1}}, 'b': {'a': {'v': 1}, 'b': {'v': 1}}})
+
+        # Test an example that refers to itself
+        text = textwrap.dedent("""\
+            namespace test
+
+            struct S
+                s S?
+
+                example default
+                    s = other
+
+                example other
+                    s = default
+            """)
+        t = TowerOfStone([('test.stone', text)])
+        with self.assertRaises(InvalidSpec) as cm:
+            t.parse()
+        self.assertEqual(
+            "Example for 'S' with label 'default' refers to itself, directly or "
+            "through other examples.",
+            cm.exception.msg)
+        self.assertEqual(cm.exception.lineno, 6)
+
+        # Test a cycle through a union
+        text = textwrap.dedent("""\
+            namespace test
+
+            struct S
+                u U
+
+                example default
+                    u = default
+
+            union U
+                a
+                s S
+
+                example default
+                    s = default
+            """)
+        t = TowerOfStone([('test.stone', text)])
+        with self.assertRaises(InvalidSpec) as cm:
+            t.parse()
+        self.assertIn('refers to itself', cm.exception.msg)
+
     def test_examples_enumerated_subtypes(self):
         # Test missing custom example
         text = textwrap.dedent("""\
@@ -2964,6 +3094,59 @@ class TestStone(unittest.TestCase):
         # Check that type that is wrapped by a list and/or nullable is present
         self.assertIn(s4, route_data_types)
 
+    def test_prune_unreachable_data_types(self):
+        text1 = textwrap.dedent("""\
+            namespace ns1
+            import ns2
+            struct Parent
+                f String
+            struct Child extends Parent
+                g ns2.Leaf
+            struct Unused
+                f String
+            alias Kept = String
+            alias NotKept = Unused
+            route r(Parent, List(Kept?), Void)
+            """)
+        text2 = textwrap.dedent("""\
+            namespace ns2
+            struct Leaf
+                f String
+            struct Internal
+                f String
+            route get_internal(Internal, Void, Void)
+            """)
+        text3 = textwrap.dedent("""\
+            namespace ns3
+            struct Orphan
+                f String
+            """)
+        api = TowerOfStone([('ns1.stone', text1), ('ns2.stone', text2),
+                            ('ns3.stone', text3)]).parse()
+        ns1 = api.namespaces['ns1']
+        ns2 = api.namespaces['ns2']
+        removed = api.prune_unreachable_data_types()
+        self.assertEqual(sorted(dt.name for dt in removed), ['NotKept', 'Orphan', 'Unused'])
+        self.assertEqual(list(api.namespaces), ['ns1', 'ns2'])
+        self.assertEqual(ns1.get_imported_namespaces(), [ns2])
+
+        ns2.routes = []
+        ns2.route_by_name = {}
+        removed = api.prune_unreachable_data_types()
+        self.assertEqual([dt.name for dt in removed], ['Internal'])
+        self.assertEqual([dt.name for dt in ns1.data_types], ['Child', 'Parent'])
+        self.assertEqual([alias.name for alias in ns1.aliases], ['Kept'])
+        self.assertEqual(sorted(ns1.data_type_by_name), ['Child', 'Parent'])
+        # The subtype of a route's struct refers to a data type in ns2.
+        self.assertEqual([dt.name for dt in ns2.data_types], ['Leaf'])
+        self.assertEqual(ns1.get_imported_namespaces(), [ns2])
+        self.assertEqual(ns2.get_imported_namespaces(), [])
+
+        ns1.routes = []
+        ns1.route_by_name = {}
+        api.prune_unreachable_data_types()
+        self.assertEqual(list(api.namespaces), [])
+
     def test_whitespace(self):
         text = textwrap.dedent("""\
             namespace test
@@ -3393,6 +3576,76 @@ class TestStone(unittest.TestCase):
         self.assertEqual(cm.exception.lineno, 9)
         self.assertEqual(cm.exception.path, 'ns1.stone')
 
+    def test_parallel_parsing(self):
+        ns1_text = textwrap.dedent("""\
+            namespace ns1
+
+            import ns2
+
+            struct S
+                f ns2.S?
+                g String?
+                example default
+                    f = null
+                    g = null
+            """)
+        ns2_text = textwrap.dedent("""\
+            namespace ns2
+
+            struct S
+                f String
+            """)
+        ns3_text = textwrap.dedent("""\
+            namespace ns3
+
+            union U
+                a
+                b V
+            struct V
+                "Anonymous types are parsed separately."
+                c Dimensions
+                    struct
+                        d String
+            """)
+        specs = [('ns1.stone', ns1_text), ('ns2.stone', ns2_text),
+                 ('ns3.stone', ns3_text)]
+        serial = TowerOfStone(specs).parse()
+        parallel = TowerOfStone(specs, jobs=2).parse()
+        self.assertEqual(list(parallel.namespaces), list(serial.namespaces))
+        for name, namespace in parallel.namespaces.items():
+            self.assertEqual(
+                [dt.name for dt in namespace.data_types],
+                [dt.name for dt in serial.namespaces[name].data_types])
+        s = parallel.namespaces['ns1'].data_type_by_name['S']
+        self.assertEqual(s.get_examples()['default'].value, {})
+        # Parser output is pickled to send it between processes.
+        self.assertIs(pickle.loads(pickle.dumps(StoneNull)), StoneNull)
+
+    def test_parallel_parsing_errors(self):
+        good_text = textwrap.dedent("""\
+            namespace good
+            struct S
+                f String
+            """)
+        bad_text = textwrap.dedent("""\
+            namespace bad
+            struct S
+                f String +
+            """)
+        worse_text = textwrap.dedent("""\
+            namespace worse
+            struct $
+            """)
+        specs = [('good.stone', good_text), ('bad.stone', bad_text),
+                 ('worse.stone', worse_text)]
+        errors = []
+        for jobs in (1, 3):
+            with self.assertRaises(InvalidSpec) as cm:
+                TowerOfStone(specs, jobs=jobs).parse()
+            errors.append((cm.exception.msg, cm.exception.lineno, cm.exception.path))
+        self.assertEqual(errors[0], errors[1])
+        self.assertEqual(errors[0][2], 'bad.stone')
+
 
 if __name__ == '__main__':
     unittest.main()
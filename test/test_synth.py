@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from stone.bench.synth import generate_specs, main
+from stone.data_type import Struct, Union
+from stone.lang.tower import TowerOfStone
+
+
+class TestSynth(unittest.TestCase):
+
+    def test_deterministic(self):
+        specs = generate_specs(namespaces=4, import_density=0.5, seed=1)
+        self.assertEqual(specs, generate_specs(namespaces=4, import_density=0.5, seed=1))
+        self.assertNotEqual(specs, generate_specs(namespaces=4, import_density=0.5, seed=2))
+        # Adding namespaces doesn't change the ones before them.
+        self.assertEqual(specs, generate_specs(namespaces=5, import_density=0.5, seed=1)[:4])
+        # The same specs are generated by Python 2 and 3.
+        digest = hashlib.md5(''.join(
+            filename + text for filename, text in specs).encode('utf-8')).hexdigest()
+        self.assertEqual(digest, '16562d7d295600386b802866eea0cac0')
+
+    def test_valid(self):
+        api = TowerOfStone(generate_specs(
+            namespaces=6,
+            types_per_namespace=16,
+            fields_per_type=3,
+            inheritance_depth=3,
+            union_width=5,
+            subtype_density=0.5,
+            import_density=0.5,
+            example_density=1.0,
+            routes_per_namespace=4,
+            seed=3)).parse()
+        self.assertEqual(sorted(api.namespaces), ['ns0', 'ns1', 'ns2', 'ns3', 'ns4', 'ns5'])
+        for namespace in api.namespaces.values():
+            self.assertEqual(len(namespace.data_types), 16)
+            self.assertEqual(len(namespace.routes), 4)
+            unions = [dt for dt in namespace.data_types if isinstance(dt, Union)]
+            self.assertEqual(len(unions), 4)
+            for union in unions:
+                # Unions also have the implicit catch-all tag.
+                self.assertEqual(len(union.fields), 6)
+                self.assertIn('default', union.get_examples())
+            structs = [dt for dt in namespace.data_types if isinstance(dt, Struct)]
+            for struct in structs:
+                self.assertEqual(len(struct.fields), 3)
+                if not struct.has_enumerated_subtypes():
+                    self.assertIn('default', struct.get_examples())
+        self.assertTrue(any(namespace.get_imported_namespaces()
+                            for namespace in api.namespaces.values()))
+        self.assertTrue(any(dt.has_enumerated_subtypes()
+                            for namespace in api.namespaces.values()
+                            for dt in namespace.data_types if isinstance(dt, Struct)))
+
+    def test_main(self):
+        folder = tempfile.mkdtemp()
+        try:
+            main([folder, '--namespaces', '3', '--seed', '5'])
+            self.assertEqual(sorted(os.listdir(folder)),
+                             ['ns0.stone', 'ns1.stone', 'ns2.stone'])
+            with open(os.path.join(folder, 'ns1.stone'), 'rb') as f:
+                self.assertEqual(f.read().decode('utf-8'),
+                                 generate_specs(namespaces=3, seed=5)[1][1])
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
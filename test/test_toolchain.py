@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict
+import os
+import shutil
+import tempfile
+import unittest
+
+from stone.bench.toolchain import (
+    BASELINE_FORMAT_VERSION,
+    TARGETS,
+    compare,
+    load_baseline,
+    main,
+    run_benchmarks,
+    save_baseline,
+)
+
+tiny = OrderedDict([('tiny', dict(namespaces=2, types_per_namespace=4, routes_per_namespace=2))])
+
+
+class TestToolchainBenchmarks(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(sizes=tiny, repeat=2)
+        names = list(results)
+        self.assertEqual(names[:3], ['tiny/lex', 'tiny/parse', 'tiny/tower'])
+        self.assertIn('tiny/tower/populate examples', names)
+        self.assertIn('tiny/remove aliases', names)
+        self.assertEqual([name for name in names if name.startswith('tiny/target/')],
+                         ['tiny/target/%s' % target for target in TARGETS])
+        for result in results.values():
+            self.assertGreaterEqual(result['seconds'], 0)
+
+    def test_compare(self):
+        def result(seconds, peak_bytes=None):
+            return {'seconds': seconds, 'peak_bytes': peak_bytes}
+
+        baseline = {
+            'version': BASELINE_FORMAT_VERSION,
+            'thresholds': {'seconds': 0.5, 'peak_bytes': 0.1, 'min_seconds': 0.05},
+            'results': {
+                'a': result(1.0, 1000),
+                'b': result(0.01),
+                'c': result(1.0, None),
+            },
+        }
+        self.assertEqual(compare({'a': result(1.4, 1050)}, baseline), [])
+        regressions = compare({'a': result(1.6, 1200)}, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('a: 1.600 seconds is 60% more than the baseline 1.000', regressions)
+        self.assertIn('a: 1200 peak bytes is 20% more than the baseline 1000', regressions)
+        # Short times regress by more than the minimum number of seconds.
+        self.assertEqual(compare({'b': result(0.05)}, baseline), [])
+        self.assertEqual(len(compare({'b': result(0.07)}, baseline)), 1)
+        # Results without a baseline or memory aren't compared.
+        self.assertEqual(compare({'c': result(1.0, 5000), 'd': result(9.0)}, baseline), [])
+        # Thresholds can be overridden.
+        self.assertEqual(compare({'a': result(1.6)}, baseline, {'seconds': 1.0}), [])
+
+    def test_baseline(self):
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'baseline.json')
+            results = {'tiny/lex': {'seconds': 0.5, 'peak_bytes': None}}
+            save_baseline(path, results)
+            baseline = load_baseline(path)
+            self.assertEqual(baseline['results'], results)
+            self.assertEqual(baseline['thresholds']['seconds'], 0.25)
+
+            # Saving a new baseline keeps the thresholds of the old one.
+            baseline['thresholds']['seconds'] = 2.0
+            save_baseline(path, results, baseline['thresholds'])
+            save_baseline(path, results)
+            self.assertEqual(load_baseline(path)['thresholds']['seconds'], 2.0)
+
+            # Everything regresses against a baseline that's fast enough.
+            args = ['--sizes', 'small', '--targets', 'python_types', '--repeat', '1',
+                    '--no-memory']
+            save_baseline(path, {
+                'small/lex': {'seconds': 0.0001, 'peak_bytes': None},
+                'small/target/python_types': {'seconds': 0.0001, 'peak_bytes': None},
+            }, {'seconds': 0.0, 'peak_bytes': 0.0, 'min_seconds': 0.0})
+            self.assertEqual(main(args + ['--baseline', path]), 1)
+            self.assertEqual(main(args + ['--baseline', path, '--threshold', '1e9']), 0)
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()